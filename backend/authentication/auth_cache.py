@@ -0,0 +1,367 @@
+"""
+In-process caches for JWT authentication.
+
+Every authenticated request used to cost two Neo4j queries before any view
+code ran: a BlacklistedToken lookup by the full token string, and a
+UserProfile lookup by the token's user_uid.
+
+TokenBlacklist keeps a bloom filter of the blacklisted tokens. A token the
+filter has never seen is accepted without a query; only the rare filter
+positive is confirmed against Neo4j. The filter is loaded from Neo4j on
+first use and LogoutView adds to it as it writes. Tokens blacklisted by
+other processes are picked up by re-reading the recent additions every
+JWT_BLACKLIST_REFRESH_SECONDS, which bounds how long another worker can
+still accept them.
+
+UserProfileCache holds recently authenticated profiles for
+JWT_USER_CACHE_TTL seconds. A profile is dropped from it when it is saved
+or deleted in this process. REST authentication (get_user_profile) and the
+WebSocket handshake (aget_user_profile, reading with the async driver)
+share it.
+
+The first get_token_blacklist() also starts the periodic expiry of
+blacklisted tokens (token_expiry).
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from neomodel import db
+
+from backend.card_game import neo4j_async
+
+DEFAULT_FILTER_CAPACITY = 100000
+DEFAULT_FILTER_ERROR_RATE = 0.001
+DEFAULT_REFRESH_SECONDS = 30
+DEFAULT_USER_CACHE_TTL = 60
+DEFAULT_USER_CACHE_SIZE = 4096
+
+# Tokens blacklisted this long before the last refresh are read again, for clock skew between workers
+REFRESH_OVERLAP_SECONDS = 5
+
+BLACKLIST_QUERY = """
+MATCH (t:BlacklistedToken)
+WHERE t.blacklisted_at >= $since AND (t.expires_at IS NULL OR t.expires_at > $now)
+RETURN t.token
+"""
+
+USER_PROFILE_QUERY = "MATCH (u:UserProfile {uid: $uid}) RETURN u"
+
+
+def token_text(raw_token):
+    """The token as a string, as BlacklistedToken stores it"""
+    return raw_token.decode() if isinstance(raw_token, bytes) else str(raw_token)
+
+
+def filter_key(stored_token):
+    """
+    The filter entry of a BlacklistedToken.token value. Entries are token
+    hashes, so tokens stored raw and hashed (JWT_BLACKLIST_HASH_TOKENS) are
+    found alike.
+    """
+    from .models import TOKEN_HASH_PREFIX, hash_token
+
+    return stored_token if stored_token.startswith(TOKEN_HASH_PREFIX) else hash_token(stored_token)
+
+
+class BloomFilter:
+    """
+    Fixed size bloom filter over strings.
+    """
+
+    def __init__(self, capacity=DEFAULT_FILTER_CAPACITY, error_rate=DEFAULT_FILTER_ERROR_RATE):
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity: Items the filter is sized for
+            error_rate: False positive rate at capacity
+        """
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        """Bit positions of an item, by double hashing one SHA-256 digest"""
+        digest = hashlib.sha256(item.encode()).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenBlacklist:
+    """
+    Blacklist membership checks answered from a bloom filter, with Neo4j
+    consulted only to confirm a positive.
+    """
+
+    def __init__(self, capacity=DEFAULT_FILTER_CAPACITY, error_rate=DEFAULT_FILTER_ERROR_RATE,
+                 refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        """
+        Initialize the blacklist. Nothing is loaded until the first check.
+
+        Args:
+            capacity: Tokens the filter is sized for; it is rebuilt from the
+                unexpired tokens once more have been added
+            error_rate: Share of unlisted tokens that still need a query
+            refresh_seconds: Interval between reads of tokens blacklisted by
+                other processes
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self._filter = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self.confirmations = 0
+
+    def is_blacklisted(self, raw_token):
+        """
+        Check whether a token is blacklisted.
+
+        Args:
+            raw_token: The token, as str or bytes
+
+        Returns:
+            bool: True if the token is blacklisted
+        """
+        from .models import BlacklistedToken
+
+        token = token_text(raw_token)
+        self._refresh()
+        if filter_key(token) not in self._filter:
+            return False
+
+        self.confirmations += 1
+        return BlacklistedToken.is_blacklisted(token)
+
+    async def ais_blacklisted(self, raw_token):
+        """
+        Check whether a token is blacklisted from async code. Answered on
+        the event loop unless the filter is due a refresh or the token
+        needs confirming, which run in a worker thread.
+
+        Args:
+            raw_token: The token, as str or bytes
+
+        Returns:
+            bool: True if the token is blacklisted
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.time() - loaded_at < self.refresh_seconds:
+            if filter_key(token_text(raw_token)) not in self._filter:
+                return False
+        return await sync_to_async(self.is_blacklisted, thread_sensitive=False)(raw_token)
+
+    def add(self, raw_token):
+        """
+        Add a token that has just been written to BlacklistedToken.
+
+        Args:
+            raw_token: The token, as str or bytes
+        """
+        self._refresh()
+        with self._lock:
+            self._filter.add(filter_key(token_text(raw_token)))
+
+    def _refresh(self):
+        """Load the filter on first use, then add what other processes blacklisted since the last read."""
+        now = time.time()
+        if self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+            return
+
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+                return
+
+            rebuild = self._filter is None or self._filter.count > self.capacity
+            since = 0 if rebuild else self._loaded_at - REFRESH_OVERLAP_SECONDS
+            results, _ = db.cypher_query(BLACKLIST_QUERY, {"since": since, "now": now})
+
+            bloom = BloomFilter(self.capacity, self.error_rate) if rebuild else self._filter
+            for token, in results:
+                bloom.add(filter_key(token))
+            self._filter = bloom
+            self._loaded_at = now
+
+
+class UserProfileCache:
+    """
+    LRU of UserProfile nodes by uid, each kept for a fixed time.
+    """
+
+    def __init__(self, ttl=DEFAULT_USER_CACHE_TTL, max_entries=DEFAULT_USER_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a profile is served before it is read again
+            max_entries: Profiles kept before the least recently used is dropped
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_uid, load):
+        """
+        Get a profile, loading it on a miss.
+
+        Args:
+            user_uid: uid of the UserProfile
+            load: Callable returning the profile, or None if there is none
+
+        Returns:
+            UserProfile: The profile, or None
+        """
+        now = time.monotonic()
+        profile = self._lookup(user_uid, now)
+        if profile is None:
+            profile = self._store(user_uid, load(), now)
+        return profile
+
+    async def aget(self, user_uid, load):
+        """
+        Get a profile from async code, awaiting load on a miss.
+
+        Args:
+            user_uid: uid of the UserProfile
+            load: Coroutine function returning the profile, or None
+
+        Returns:
+            UserProfile: The profile, or None
+        """
+        now = time.monotonic()
+        profile = self._lookup(user_uid, now)
+        if profile is None:
+            profile = self._store(user_uid, await load(), now)
+        return profile
+
+    def _lookup(self, user_uid, now):
+        with self._lock:
+            entry = self._entries.get(user_uid)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_uid)
+                return entry[1]
+        return None
+
+    def _store(self, user_uid, profile, now):
+        if profile is None or self.ttl <= 0:
+            return profile
+
+        with self._lock:
+            self._entries[user_uid] = (now + self.ttl, profile)
+            self._entries.move_to_end(user_uid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return profile
+
+    def invalidate(self, user_uid):
+        """
+        Drop a profile, e.g. after it changed.
+
+        Args:
+            user_uid: uid of the UserProfile
+        """
+        with self._lock:
+            self._entries.pop(user_uid, None)
+
+
+def get_user_profile(user_uid):
+    """
+    Get a UserProfile through the process-wide cache.
+
+    Args:
+        user_uid: uid of the UserProfile
+
+    Returns:
+        UserProfile: The profile, or None if there is none
+    """
+    from .models import UserProfile
+
+    return get_user_profile_cache().get(user_uid, lambda: UserProfile.nodes.get_or_none(uid=user_uid))
+
+
+async def aget_user_profile(user_uid):
+    """
+    Get a UserProfile through the process-wide cache from async code, read
+    with the async Neo4j driver on a miss.
+
+    Args:
+        user_uid: uid of the UserProfile
+
+    Returns:
+        UserProfile: The profile, or None if there is none
+    """
+    from .models import UserProfile
+
+    async def load():
+        results, _ = await neo4j_async.cypher_query(USER_PROFILE_QUERY, {"uid": user_uid})
+        return UserProfile.inflate(results[0][0]) if results else None
+
+    return await get_user_profile_cache().aget(user_uid, load)
+
+
+_blacklist = None
+_user_cache = None
+_lock = threading.Lock()
+
+
+def get_token_blacklist():
+    """
+    Get the process-wide token blacklist.
+
+    Returns:
+        TokenBlacklist: The blacklist configured from settings
+    """
+    global _blacklist
+
+    if _blacklist is None:
+        with _lock:
+            if _blacklist is None:
+                _blacklist = TokenBlacklist(
+                    capacity=getattr(settings, "JWT_BLACKLIST_FILTER_CAPACITY", DEFAULT_FILTER_CAPACITY),
+                    error_rate=getattr(settings, "JWT_BLACKLIST_FILTER_ERROR_RATE", DEFAULT_FILTER_ERROR_RATE),
+                    refresh_seconds=getattr(settings, "JWT_BLACKLIST_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS)
+                )
+
+                # Processes checking the blacklist also keep it from growing without bound
+                from .token_expiry import start_token_expiry
+                start_token_expiry()
+
+    return _blacklist
+
+
+def get_user_profile_cache():
+    """
+    Get the process-wide UserProfile cache.
+
+    Returns:
+        UserProfileCache: The cache configured from settings
+    """
+    global _user_cache
+
+    if _user_cache is None:
+        with _lock:
+            if _user_cache is None:
+                _user_cache = UserProfileCache(
+                    ttl=getattr(settings, "JWT_USER_CACHE_TTL", DEFAULT_USER_CACHE_TTL),
+                    max_entries=getattr(settings, "JWT_USER_CACHE_SIZE", DEFAULT_USER_CACHE_SIZE)
+                )
+
+    return _user_cache
@@ -2,12 +2,14 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.models import TokenUser
 from rest_framework_simplejwt.exceptions import InvalidToken
-from .models import UserProfile, BlacklistedToken
+from .auth_cache import get_token_blacklist, get_user_profile
 
 
 class Neo4jJWTAuthentication(JWTAuthentication):
     """
-    Custom JWT authentication that works with our neomodel UserProfile
+    Custom JWT authentication that works with our neomodel UserProfile.
+    Profiles and blacklist checks are served from auth_cache, so most
+    requests authenticate without a Neo4j query.
     """
 
     def get_user(self, validated_token):
@@ -17,12 +19,8 @@ class Neo4jJWTAuthentication(JWTAuthentication):
         try:
             user_uid = validated_token['user_uid']
 
-            # Get the UserProfile from Neo4j
-            try:
-                profile = UserProfile.nodes.get(uid=user_uid)
-                return profile
-            except UserProfile.DoesNotExist:
-                return None
+            # Get the UserProfile from the cache, or from Neo4j
+            return get_user_profile(user_uid)
 
         except KeyError:
             return None
@@ -35,7 +33,7 @@ class Neo4jJWTAuthentication(JWTAuthentication):
         validated_token = super().get_validated_token(raw_token)
 
         # Check if the token is blacklisted
-        if BlacklistedToken.is_blacklisted(str(raw_token)):
+        if get_token_blacklist().is_blacklisted(raw_token):
             raise InvalidToken('Token is blacklisted')
 
         return validated_token
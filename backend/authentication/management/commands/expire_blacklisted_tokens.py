@@ -0,0 +1,18 @@
+import json
+
+from django.core.management.base import BaseCommand
+from backend.authentication.token_expiry import expire_blacklisted_tokens
+
+class Command(BaseCommand):
+    help = 'Deletes blacklisted tokens that have expired, in batches, and reports the count and duration'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Tokens deleted per transaction (default: JWT_BLACKLIST_CLEANUP_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        report = expire_blacklisted_tokens(batch_size=options['batch_size'])
+        self.stdout.write(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {report['deleted']} expired blacklisted tokens in {report['duration_ms']} ms"
+        ))
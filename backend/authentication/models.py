@@ -1,10 +1,32 @@
-from neomodel import StructuredNode, StringProperty, DateTimeProperty
+from neomodel import StructuredNode, StringProperty, DateTimeProperty, db
+from django.conf import settings
 from django.contrib.auth.hashers import make_password, check_password
+import hashlib
 import uuid
 import logging
 from datetime import datetime
+
+from .auth_cache import get_user_profile_cache
+
 logger = logging.getLogger(__name__)
 
+TOKEN_HASH_PREFIX = "sha256:"
+DEFAULT_CLEANUP_BATCH_SIZE = 1000
+
+CLEANUP_EXPIRED_QUERY = """
+MATCH (t:BlacklistedToken)
+WHERE t.expires_at < $now
+WITH t LIMIT $batch_size
+DETACH DELETE t
+RETURN count(*)
+"""
+
+
+def hash_token(token_string):
+    """The form a token is stored in when JWT_BLACKLIST_HASH_TOKENS is set"""
+    return TOKEN_HASH_PREFIX + hashlib.sha256(token_string.encode()).hexdigest()
+
+
 class UserProfile(StructuredNode):
     """Neo4j model for user profile, linked to Django User"""
     __module__ = 'backend.authentication.models'
@@ -21,6 +43,12 @@ class UserProfile(StructuredNode):
         self.updated_at = datetime.now()
         super().save(*args, **kwargs)
 
+    def post_save(self):
+        get_user_profile_cache().invalidate(self.uid)
+
+    def post_delete(self):
+        get_user_profile_cache().invalidate(self.uid)
+
     # Django authentication system compatibility properties
     @property
     def is_authenticated(self):
@@ -54,27 +82,41 @@ class BlacklistedToken(StructuredNode):
     """Neo4j model for storing blacklisted JWT tokens"""
     __module__ = 'backend.authentication.models'
     uid = StringProperty(unique_index=True, default=lambda: str(uuid.uuid4()))
-    token = StringProperty(unique_index=True)  # The actual token string
+    token = StringProperty(unique_index=True)  # The token string, or its hash_token() form
     user_uid = StringProperty(index=True)  # UID of the user who owned this token
     blacklisted_at = DateTimeProperty(default_now=True)
-    expires_at = DateTimeProperty()  # When the token would have expired
+    expires_at = DateTimeProperty(index=True)  # When the token would have expired
+
+    @classmethod
+    def blacklist(cls, token_string, user_uid, expires_at):
+        """
+        Blacklist a token, stored hashed when JWT_BLACKLIST_HASH_TOKENS is set
+
+        Returns:
+            BlacklistedToken: The saved node
+        """
+        token = hash_token(token_string) if getattr(settings, 'JWT_BLACKLIST_HASH_TOKENS', False) else token_string
+        return cls(token=token, user_uid=user_uid, expires_at=expires_at).save()
 
     @classmethod
     def is_blacklisted(cls, token_string):
-        """Check if a token is blacklisted"""
-        try:
-            cls.nodes.get(token=token_string)
-            return True
-        except cls.DoesNotExist:
-            return False
+        """Check if a token is blacklisted, whether it was stored hashed or not"""
+        return cls.nodes.filter(token__in=[token_string, hash_token(token_string)]).first_or_none() is not None
 
     @classmethod
-    def cleanup_expired(cls):
-        """Remove expired tokens from the blacklist"""
-        now = datetime.now()
-        # Find all expired tokens
-        expired_tokens = cls.nodes.filter(expires_at__lt=now)
-        # Delete them
-        for token in expired_tokens:
-            token.delete()
-        return len(expired_tokens)
+    def cleanup_expired(cls, batch_size=DEFAULT_CLEANUP_BATCH_SIZE):
+        """
+        Remove expired tokens from the blacklist, batch_size nodes per
+        transaction so a large backlog never builds one huge transaction
+
+        Returns:
+            int: Number of tokens removed
+        """
+        now = cls.expires_at.deflate(datetime.now())
+        deleted = 0
+        while True:
+            results, _ = db.cypher_query(CLEANUP_EXPIRED_QUERY, {"now": now, "batch_size": batch_size})
+            batch = results[0][0] if results else 0
+            deleted += batch
+            if batch < batch_size:
+                return deleted
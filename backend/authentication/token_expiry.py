@@ -0,0 +1,114 @@
+"""
+Expiry of blacklisted tokens.
+
+A BlacklistedToken is only needed until the token it blocks would have
+expired anyway. expire_blacklisted_tokens removes the expired ones in
+batches of JWT_BLACKLIST_CLEANUP_BATCH_SIZE nodes, each deleted in its own
+transaction. It runs from the expire_blacklisted_tokens management command
+and, every JWT_BLACKLIST_CLEANUP_INTERVAL seconds, from a background thread
+of each process that authenticates requests. Runs from several processes
+overlap harmlessly.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .models import DEFAULT_CLEANUP_BATCH_SIZE, BlacklistedToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLEANUP_INTERVAL = 3600
+
+
+def expire_blacklisted_tokens(batch_size=None):
+    """
+    Delete the blacklisted tokens that have expired
+
+    Args:
+        batch_size: Nodes deleted per transaction, JWT_BLACKLIST_CLEANUP_BATCH_SIZE if None
+
+    Returns:
+        dict: deleted count and duration_ms
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, "JWT_BLACKLIST_CLEANUP_BATCH_SIZE", DEFAULT_CLEANUP_BATCH_SIZE)
+
+    started = time.perf_counter()
+    deleted = BlacklistedToken.cleanup_expired(batch_size=batch_size)
+    report = {"deleted": deleted, "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+    logger.info(f"Expired {report['deleted']} blacklisted tokens in {report['duration_ms']} ms")
+    return report
+
+
+class TokenExpiryTask:
+    """
+    Background thread running expire_blacklisted_tokens at a fixed interval.
+    """
+
+    def __init__(self, interval=DEFAULT_CLEANUP_INTERVAL):
+        """
+        Initialize the task. The thread starts with start().
+
+        Args:
+            interval: Seconds between runs
+        """
+        self.interval = interval
+        self.last_report = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the thread, once."""
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="blacklisted-token-expiry",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        """Stop the thread after the current run."""
+        self._stop.set()
+
+    def _run(self):
+        """Expire tokens every interval seconds until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_report = expire_blacklisted_tokens()
+            except Exception:
+                logger.exception("Blacklisted token expiry failed")
+
+
+_task = None
+_task_lock = threading.Lock()
+
+
+def start_token_expiry():
+    """
+    Start the process-wide expiry task, unless JWT_BLACKLIST_CLEANUP_INTERVAL is 0.
+
+    Returns:
+        TokenExpiryTask: The running task, or None if disabled
+    """
+    global _task
+
+    interval = getattr(settings, "JWT_BLACKLIST_CLEANUP_INTERVAL", DEFAULT_CLEANUP_INTERVAL)
+    if not interval:
+        return None
+
+    if _task is None:
+        with _task_lock:
+            if _task is None:
+                _task = TokenExpiryTask(interval=interval)
+                _task.start()
+
+    return _task
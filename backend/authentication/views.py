@@ -4,6 +4,7 @@ from rest_framework.views import APIView
 from .serializers import UserSerializer, UserProfileSerializer, RegisterSerializer, ChangePasswordSerializer
 from .models import UserProfile, BlacklistedToken
 from backend.game.models import Player
+from .auth_cache import get_token_blacklist
 from .jwt_auth import get_tokens_for_user
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
@@ -113,11 +114,8 @@ class LogoutView(APIView):
                 expires_at = datetime.fromtimestamp(exp) if exp else datetime.now() + timedelta(days=7)
 
                 # Add the token to our Neo4j blacklist
-                BlacklistedToken(
-                    token=refresh_token,
-                    user_uid=user_uid,
-                    expires_at=expires_at
-                ).save()
+                BlacklistedToken.blacklist(refresh_token, user_uid, expires_at)
+                get_token_blacklist().add(refresh_token)
 
                 return Response({"message": "Logout successful"},
                                status=status.HTTP_200_OK)
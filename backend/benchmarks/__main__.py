@@ -0,0 +1,55 @@
+"""
+Run the benchmark suite and write its report.
+
+Usage (from the repository root):
+
+    python -m backend.benchmarks --output benchmarks.json
+"""
+
+import argparse
+import os
+import sys
+
+import django
+
+# The project settings name their apps relative to backend/ ("authentication",
+# "game", "api"), which manage.py gets on sys.path by being run from there
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    if BACKEND_DIR not in sys.path:
+        sys.path.append(BACKEND_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.card_game.settings")
+    django.setup()
+
+    from backend.benchmarks.suite import OPERATIONS, run_suite, write_report
+
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', default='benchmarks.json', help='File the JSON report is written to')
+    parser.add_argument('--iterations', type=int, default=200, help='Timed calls per operation')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed calls per operation')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+    parser.add_argument('--players', type=int, default=4, help='Players per benchmarked game')
+    parser.add_argument('--only', nargs='+', choices=OPERATIONS, default=OPERATIONS, help='Operations to run')
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        args.only,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        seed=args.seed,
+        num_players=args.players
+    )
+    write_report(report, args.output)
+
+    for name, result in report["operations"].items():
+        print(f"{name:28} {result['ops_per_sec']:>10} ops/s  "
+              f"p50 {result['latency_ms']['p50']:>8} ms  "
+              f"p99 {result['latency_ms']['p99']:>8} ms  "
+              f"{result['queries_per_op']:>7} queries/op")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
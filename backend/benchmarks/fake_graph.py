@@ -0,0 +1,614 @@
+"""
+In-process fake of the Neo4j server behind neomodel.
+
+Replaces the Bolt round trip (Database.cypher_query, the transaction
+calls and neo4j_async.cypher_query) and the execution of neomodel's match queries with an in-memory
+property graph, so the real model code runs - property deflation and
+inflation, hooks, relationship managers - without a database. Every
+statement that would have crossed the wire is counted by kind, which is
+what the benchmarks report as query counts.
+
+Only the statement shapes neomodel generates and the raw queries issued
+by this project are understood; anything else is counted as unhandled
+and returns no rows.
+"""
+
+import itertools
+import re
+import threading
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from unittest import mock
+
+from neomodel.match import INCOMING, OUTGOING, NodeSet, QueryBuilder, Traversal
+from neomodel.match_q import QBase
+from neomodel.util import Database, TransactionProxy
+
+from backend.card_game import neo4j_async
+
+
+class FakeNode:
+    """Stored node in the shape neomodel inflates from"""
+
+    __slots__ = ("element_id", "labels", "_properties")
+
+    def __init__(self, element_id, labels, properties):
+        self.element_id = element_id
+        self.labels = frozenset(labels)
+        self._properties = properties
+
+
+CREATE_NODE = re.compile(r"^CREATE \(n:([\w:]+) \$create_params\) RETURN (n|elementId\(n\))$")
+UPDATE_NODE = re.compile(r"^MATCH \(n\) WHERE elementId\(n\)=\$self SET ")
+DELETE_NODE = re.compile(r"^MATCH \(self\) WHERE elementId\(self\)=\$self DETACH DELETE self$")
+MERGE_REL = re.compile(
+    r"^MATCH \(them\), \(us\) WHERE elementId\(them\)=\$them and elementId\(us\)=\$self "
+    r"MERGE\s*\(us\)(<?-)\[r:`(\w+)`[^\]]*\](->?)\(them\)"
+)
+DELETE_REL = re.compile(
+    r"^MATCH \(a\), \(b\) WHERE elementId\(a\)=\$self and elementId\(b\)=\$them "
+    r"MATCH \(a\)(<?-)\[r:`(\w+)`\](->?)\(b\) DELETE r$"
+)
+DELETE_ALL_RELS = re.compile(
+    r"^MATCH \(a\) WHERE elementId\(a\)=\$self "
+    r"MATCH \(a\)(<?-)\[r:`(\w+)`\](->?)\(b:(\w+)\) DELETE r$"
+)
+
+# Statements staged by game.services.unit_of_work
+UNIT_STATEMENT = re.compile(r"^CALL \{ .* \} RETURN count\(\*\)$")
+UNIT_CREATE = re.compile(r"^CREATE \(n:([\w:]+)\) SET n = \$props$")
+UNIT_UPDATE = re.compile(r"^MATCH \(n:(\w+) \{uid: \$uid\}\) SET n \+= \$props$")
+UNIT_CONNECT = re.compile(
+    r"^MATCH \(a:(\w+) \{uid: \$start\}\), \(b:(\w+) \{uid: \$end\}\) "
+    r"MERGE \(a\)(<?-)\[:(\w+)\](->?)\(b\)$"
+)
+UNIT_REPLACE = re.compile(
+    r"^MATCH \(a:(\w+) \{uid: \$start\}\) OPTIONAL MATCH \(a\)(<?-)\[r:(\w+)\](->?)\(:(\w+)\) DELETE r "
+    r"WITH DISTINCT a MATCH \(b:\w+ \{uid: \$end\}\) MERGE "
+)
+
+FILTER_OPERATORS = {
+    "exact": lambda value, arg: value == arg,
+    "ne": lambda value, arg: value != arg,
+    "in": lambda value, arg: value in arg,
+    "lt": lambda value, arg: value is not None and value < arg,
+    "lte": lambda value, arg: value is not None and value <= arg,
+    "gt": lambda value, arg: value is not None and value > arg,
+    "gte": lambda value, arg: value is not None and value >= arg,
+    "isnull": lambda value, arg: (value is None) == arg,
+}
+
+
+class FakeGraph:
+    """
+    In-memory graph answering neomodel's queries and counting them.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._nodes = {}
+        self._by_label = defaultdict(dict)
+        self._out = defaultdict(list)
+        self._in = defaultdict(list)
+        self._lock = threading.RLock()
+
+        self.queries = 0
+        self.statements = Counter()
+        self.unhandled = Counter()
+
+        self._raw_handlers = [
+            ("UNWIND $rows AS row CREATE (g)-[:HAS_CARD]->", self._create_game_cards),
+            ("MATCH (s:GameState {uid: row.uid}) SET s += row.props", self._write_state_snapshots),
+            ("CREATE (:GameStateDelta", self._create_state_deltas),
+            ("MATCH (d:GameStateDelta {state_uid: row.uid})", self._compact_state_deltas),
+            ("MATCH (d:GameStateDelta {state_uid: $uid})", self._load_state_deltas),
+            ("AS invited_groups", self._game_detail),
+            ("g.created_at AS sort_key", self._player_games),
+        ]
+
+    # Installation
+
+    def install(self):
+        """
+        Route neomodel's database access to this graph.
+
+        Returns:
+            ExitStack: Undoes the patches when closed or used as a context manager
+        """
+        graph = self
+        stack = ExitStack()
+
+        def cypher_query(db, query, params=None, handle_unique=True,
+                         retry_on_session_expire=False, resolve_objects=False):
+            return graph.run(query, params or {})
+
+        async def async_cypher_query(query, params=None):
+            return graph.run(query, params or {})
+
+        def execute(builder, lazy=False):
+            return graph.execute(builder.node_set, lazy)
+
+        def count(builder):
+            return graph.count(builder.node_set)
+
+        def contains(builder, node_element_id):
+            return graph.contains(builder.node_set, node_element_id)
+
+        stack.enter_context(mock.patch.object(Database, "cypher_query", cypher_query))
+        stack.enter_context(mock.patch.object(neo4j_async, "cypher_query", async_cypher_query))
+        stack.enter_context(mock.patch.object(Database, "begin", lambda db, *args, **kwargs: None))
+        stack.enter_context(mock.patch.object(Database, "commit", lambda db: None))
+        stack.enter_context(mock.patch.object(Database, "rollback", lambda db: None))
+        stack.enter_context(mock.patch.object(TransactionProxy, "__enter__", lambda transaction: transaction))
+        stack.enter_context(mock.patch.object(Database, "database_version", "5.0.0"))
+        stack.enter_context(mock.patch.object(Database, "database_edition", "community"))
+        stack.enter_context(mock.patch.object(QueryBuilder, "_execute", execute))
+        stack.enter_context(mock.patch.object(QueryBuilder, "_count", count))
+        stack.enter_context(mock.patch.object(QueryBuilder, "_contains", contains))
+        return stack
+
+    def snapshot(self):
+        """
+        Get the query counters
+
+        Returns:
+            tuple: Total queries and a copy of the per-kind counter
+        """
+        with self._lock:
+            return self.queries, Counter(self.statements)
+
+    def _record(self, kind):
+        with self._lock:
+            self.queries += 1
+            self.statements[kind] += 1
+
+    # Storage
+
+    def add_node(self, labels, properties):
+        """
+        Store a node
+
+        Args:
+            labels: Labels of the node
+            properties (dict): Deflated properties
+
+        Returns:
+            FakeNode: The stored node
+        """
+        with self._lock:
+            node = FakeNode(f"fake:{next(self._ids)}", labels, dict(properties))
+            self._nodes[node.element_id] = node
+            for label in node.labels:
+                self._by_label[label][node.element_id] = node
+            return node
+
+    def remove_node(self, element_id):
+        """Delete a node and its relationships"""
+        with self._lock:
+            node = self._nodes.pop(element_id, None)
+            if node is None:
+                return
+            for label in node.labels:
+                self._by_label[label].pop(element_id, None)
+            for rel_type, end_id in self._out.pop(element_id, []):
+                self._in[end_id].remove((rel_type, element_id))
+            for rel_type, start_id in self._in.pop(element_id, []):
+                self._out[start_id].remove((rel_type, element_id))
+
+    def add_relationship(self, start_id, rel_type, end_id):
+        """Create a relationship unless an identical one exists (MERGE)"""
+        with self._lock:
+            if (rel_type, end_id) not in self._out[start_id]:
+                self._out[start_id].append((rel_type, end_id))
+                self._in[end_id].append((rel_type, start_id))
+
+    def remove_relationship(self, start_id, rel_type, end_id):
+        """Delete a relationship if it exists"""
+        with self._lock:
+            if (rel_type, end_id) in self._out[start_id]:
+                self._out[start_id].remove((rel_type, end_id))
+                self._in[end_id].remove((rel_type, start_id))
+
+    def find(self, label, **properties):
+        """
+        Find stored nodes by label and property values
+
+        Returns:
+            list: Matching FakeNodes in creation order
+        """
+        return [
+            node for node in self._by_label.get(label, {}).values()
+            if all(node._properties.get(key) == value for key, value in properties.items())
+        ]
+
+    def neighbours(self, element_id, rel_type, direction):
+        """Element ids related to a node by type and direction"""
+        if direction == OUTGOING:
+            related = self._out.get(element_id, [])
+        elif direction == INCOMING:
+            related = self._in.get(element_id, [])
+        else:
+            related = self._out.get(element_id, []) + self._in.get(element_id, [])
+        return [other for kind, other in related if kind == rel_type]
+
+    # Statements sent with cypher_query
+
+    def run(self, query, params):
+        """
+        Run one statement
+
+        Args:
+            query (str): Cypher statement
+            params (dict): Statement parameters
+
+        Returns:
+            tuple: Result rows and column names
+        """
+        statement = " ".join(query.split())
+
+        match = CREATE_NODE.match(statement)
+        if match:
+            self._record("create_node")
+            node = self.add_node(match.group(1).split(":"), params["create_params"])
+            result = node if match.group(2) == "n" else node.element_id
+            return [[result]], ["n"]
+
+        if UPDATE_NODE.match(statement):
+            self._record("update_node")
+            node = self._nodes[params["self"]]
+            for key, value in params.items():
+                if key == "self":
+                    continue
+                if value is None:
+                    node._properties.pop(key, None)
+                else:
+                    node._properties[key] = value
+            return [], []
+
+        if DELETE_NODE.match(statement):
+            self._record("delete_node")
+            self.remove_node(params["self"])
+            return [], []
+
+        match = MERGE_REL.match(statement)
+        if match:
+            self._record("merge_relationship")
+            start, end = self._oriented(params["self"], params["them"], match.group(1), match.group(3))
+            self.add_relationship(start, match.group(2), end)
+            return [], []
+
+        match = DELETE_REL.match(statement)
+        if match:
+            self._record("delete_relationship")
+            start, end = self._oriented(params["self"], params["them"], match.group(1), match.group(3))
+            self.remove_relationship(start, match.group(2), end)
+            return [], []
+
+        match = DELETE_ALL_RELS.match(statement)
+        if match:
+            self._record("delete_relationship")
+            direction = INCOMING if match.group(1) == "<-" else OUTGOING
+            for other in self.neighbours(params["self"], match.group(2), direction):
+                if match.group(4) in self._nodes[other].labels:
+                    start, end = self._oriented(params["self"], other, match.group(1), match.group(3))
+                    self.remove_relationship(start, match.group(2), end)
+            return [], []
+
+        if UNIT_STATEMENT.match(statement):
+            self._record("unit_of_work")
+            for index, part in enumerate(self._unit_parts(statement)):
+                prefix = f"s{index}_"
+                part = part.replace("$" + prefix, "$")
+                self._apply(part, {
+                    name[len(prefix):]: value for name, value in params.items() if name.startswith(prefix)
+                })
+            return [[1]], ["count(*)"]
+
+        if self._apply_unit_write(statement, params):
+            self._record("unit_of_work")
+            return [], []
+
+        for fragment, handler in self._raw_handlers:
+            if fragment in statement:
+                self._record("raw")
+                return handler(params)
+
+        self._record("unhandled")
+        with self._lock:
+            self.unhandled[statement[:80]] += 1
+        return [], []
+
+    @staticmethod
+    def _unit_parts(statement):
+        """Bodies of the CALL { ... } subqueries of a unit of work statement"""
+        parts = []
+        depth = 0
+        start = 0
+        for index, char in enumerate(statement):
+            if char == "{":
+                depth += 1
+                if depth == 1:
+                    start = index + 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    parts.append(statement[start:index].strip())
+        return parts
+
+    def _apply(self, statement, params):
+        """Apply one write of a unit of work, which shares the unit's round trip"""
+        if self._apply_unit_write(statement, params):
+            return
+
+        for fragment, handler in self._raw_handlers:
+            if fragment in statement:
+                handler(params)
+                return
+
+        with self._lock:
+            self.unhandled[statement[:80]] += 1
+
+    def _apply_unit_write(self, statement, params):
+        """
+        Apply a node or relationship write staged by a unit of work
+
+        Returns:
+            bool: False if the statement is not one
+        """
+        match = UNIT_CREATE.match(statement)
+        if match:
+            properties = {key: value for key, value in params["props"].items() if value is not None}
+            self.add_node(match.group(1).split(":"), properties)
+            return True
+
+        match = UNIT_UPDATE.match(statement)
+        if match:
+            for node in self.find(match.group(1), uid=params["uid"]):
+                for key, value in params["props"].items():
+                    if value is None:
+                        node._properties.pop(key, None)
+                    else:
+                        node._properties[key] = value
+            return True
+
+        match = UNIT_CONNECT.match(statement)
+        if match:
+            starts = self.find(match.group(1), uid=params["start"])
+            ends = self.find(match.group(2), uid=params["end"])
+            if starts and ends:
+                start, end = self._oriented(starts[0].element_id, ends[0].element_id, match.group(3), match.group(5))
+                self.add_relationship(start, match.group(4), end)
+            return True
+
+        match = UNIT_REPLACE.match(statement)
+        if match:
+            label, left, rel_type, right, other_label = match.groups()
+            starts = self.find(label, uid=params["start"])
+            if not starts:
+                return True
+            us = starts[0].element_id
+            direction = INCOMING if left == "<-" else OUTGOING
+            for other in self.neighbours(us, rel_type, direction):
+                if other_label in self._nodes[other].labels:
+                    start, end = self._oriented(us, other, left, right)
+                    self.remove_relationship(start, rel_type, end)
+            for end in self.find(other_label, uid=params["end"])[:1]:
+                start, end = self._oriented(us, end.element_id, left, right)
+                self.add_relationship(start, rel_type, end)
+            return True
+
+        return False
+
+    @staticmethod
+    def _oriented(us, them, left, right):
+        """Start and end of a relationship written as (us)<left>[r]<right>(them)"""
+        if left == "<-":
+            return them, us
+        return us, them
+
+    # Queries built by neomodel's QueryBuilder
+
+    def execute(self, node_set, lazy=False):
+        """Return the nodes of a NodeSet or Traversal"""
+        self._record("match")
+        with self._lock:
+            nodes = self._resolve(node_set)
+        if lazy:
+            return [node.element_id for node in nodes]
+        target = node_set.source_class if isinstance(node_set, NodeSet) else node_set.target_class
+        return [target.inflate(node) for node in nodes]
+
+    def count(self, node_set):
+        """Count the nodes of a NodeSet or Traversal"""
+        self._record("count")
+        with self._lock:
+            return len(self._resolve(node_set))
+
+    def contains(self, node_set, element_id):
+        """Check whether a node belongs to a NodeSet or Traversal"""
+        self._record("count")
+        with self._lock:
+            return any(node.element_id == element_id for node in self._resolve(node_set))
+
+    def _resolve(self, node_set):
+        if isinstance(node_set, Traversal):
+            nodes = self._traverse(node_set)
+        else:
+            source = node_set.source
+            if isinstance(source, type):
+                nodes = list(self._by_label.get(source.__label__, {}).values())
+            elif isinstance(source, Traversal):
+                nodes = self._traverse(source)
+            else:
+                nodes = [self._nodes[source.element_id]]
+
+            cls = node_set.source_class
+            nodes = [node for node in nodes if self._matches(cls, node._properties, node_set.q_filters)]
+
+            for element in reversed(getattr(node_set, "order_by_elements", [])):
+                prop, _, descending = element.partition(" ")
+                nodes.sort(key=lambda node: (node._properties.get(prop) is None, node._properties.get(prop)),
+                           reverse=bool(descending))
+
+        skip = getattr(node_set, "skip", None) or 0
+        limit = getattr(node_set, "limit", None)
+        return nodes[skip:skip + limit] if limit else nodes[skip:]
+
+    def _traverse(self, traversal):
+        source = traversal.source
+        if isinstance(source, (Traversal, NodeSet)):
+            origins = self._resolve(source)
+        elif isinstance(source, type):
+            origins = list(self._by_label.get(source.__label__, {}).values())
+        else:
+            origins = [self._nodes[source.element_id]]
+
+        definition = traversal.definition
+        label = traversal.target_class.__label__
+        seen = {}
+        for origin in origins:
+            for other in self.neighbours(origin.element_id, definition["relation_type"], definition["direction"]):
+                node = self._nodes[other]
+                if label in node.labels:
+                    seen.setdefault(other, node)
+        return list(seen.values())
+
+    def _matches(self, cls, properties, q_filter):
+        results = (
+            self._matches(cls, properties, child) if isinstance(child, QBase)
+            else self._matches_filter(cls, properties, *child)
+            for child in q_filter.children
+        )
+        matched = all(results) if q_filter.connector == "AND" else any(results)
+        return not matched if q_filter.negated else matched
+
+    @staticmethod
+    def _matches_filter(cls, properties, key, argument):
+        prop, _, operator = key.partition("__")
+        operator = operator or "exact"
+        if operator not in FILTER_OPERATORS:
+            raise NotImplementedError(f"Filter operator not supported by the fake graph: {operator}")
+
+        definition = getattr(cls, prop)
+        if operator == "in":
+            argument = [definition.deflate(value) for value in argument]
+        elif operator != "isnull":
+            argument = definition.deflate(argument)
+        return FILTER_OPERATORS[operator](properties.get(definition.db_property or prop), argument)
+
+    # Raw queries issued by this project
+
+    def _create_game_cards(self, params):
+        game = self.find("Game", uid=params["game_uid"])
+        if not game:
+            return [], []
+        for row in params["rows"]:
+            card = self.add_node(["GameCard", "GameBaseModel"], row["props"])
+            self.add_relationship(game[0].element_id, "HAS_CARD", card.element_id)
+            owner = self.find("Player", uid=row["owner_uid"]) if row["owner_uid"] else []
+            if owner:
+                self.add_relationship(card.element_id, "CONTROLLED_BY", owner[0].element_id)
+        return [], []
+
+    def _write_state_snapshots(self, params):
+        for row in params["rows"]:
+            for state in self.find("GameState", uid=row["uid"]):
+                state._properties.update(row["props"])
+        return [], []
+
+    def _create_state_deltas(self, params):
+        for row in params["rows"]:
+            self.add_node(["GameStateDelta"], row)
+        return [], []
+
+    def _compact_state_deltas(self, params):
+        for row in params["rows"]:
+            for delta in self.find("GameStateDelta", state_uid=row["uid"]):
+                if delta._properties["seq"] <= row["seq"]:
+                    self.remove_node(delta.element_id)
+        return [], []
+
+    def _load_state_deltas(self, params):
+        deltas = [
+            delta._properties for delta in self.find("GameStateDelta", state_uid=params["uid"])
+            if delta._properties["seq"] > params["seq"]
+        ]
+        deltas.sort(key=lambda delta: delta["seq"])
+        return [[delta["seq"], delta["ops"]] for delta in deltas], ["d.seq", "d.ops"]
+
+    def _game_detail(self, params):
+        games = self.find("Game", uid=params["game_uid"])
+        if not games:
+            return [], []
+        game = games[0]
+        with self._lock:
+            def related(rel_type, direction, label):
+                return [
+                    self._nodes[other] for other in self.neighbours(game.element_id, rel_type, direction)
+                    if label in self._nodes[other].labels
+                ]
+
+            def first_uid(rel_type):
+                nodes = related(rel_type, OUTGOING, "Player")
+                return nodes[0]._properties.get("uid") if nodes else None
+
+            game_players = related("HAS_PLAYER", OUTGOING, "GamePlayer")
+            players = []
+            for player in related("PARTICIPATES_IN", INCOMING, "Player"):
+                own = set(self.neighbours(player.element_id, "HAS_GAME_PLAYER", OUTGOING))
+                statuses = [gp._properties.get("status") for gp in game_players if gp.element_id in own]
+                players.append({
+                    "user_uid": player._properties.get("uid"),
+                    "username": player._properties.get("username"),
+                    "display_name": player._properties.get("display_name"),
+                    "status": statuses[0] if statuses and statuses[0] is not None else "unknown",
+                })
+            ai_players = [
+                {"is_ai": True, "ai_difficulty": gp._properties.get("ai_difficulty"),
+                 "status": gp._properties.get("status")}
+                for gp in game_players if gp._properties.get("is_ai")
+            ]
+            invited_groups = [
+                {"group_uid": group._properties.get("uid"), "name": group._properties.get("name")}
+                for group in related("INVITED_GROUP", OUTGOING, "PlayerGroup")
+            ]
+        row = [game, first_uid("CREATED_BY"), first_uid("CURRENT_TURN"), first_uid("WON_BY"),
+               players, ai_players, invited_groups]
+        return [row], ["g", "creator", "current_player", "winner", "players", "ai_players", "invited_groups"]
+
+    def _player_games(self, params):
+        players = self.find("Player", uid=params["player_uid"])
+        if not players:
+            return [], []
+        with self._lock:
+            games = [
+                self._nodes[other] for other in self.neighbours(players[0].element_id, "PARTICIPATES_IN", OUTGOING)
+                if "Game" in self._nodes[other].labels
+            ]
+            if params["statuses"] is not None:
+                games = [game for game in games if game._properties.get("status") in params["statuses"]]
+            if params["after_created_at"] is not None:
+                after = (params["after_created_at"], params["after_uid"])
+                games = [game for game in games
+                         if (game._properties["created_at"], game._properties["uid"]) < after]
+            games.sort(key=lambda game: (game._properties["created_at"], game._properties["uid"]), reverse=True)
+
+            rows = []
+            for game in games[:params.get("limit")]:
+                def first_uid(rel_type):
+                    uids = [self._nodes[other]._properties.get("uid")
+                            for other in self.neighbours(game.element_id, rel_type, OUTGOING)
+                            if "Player" in self._nodes[other].labels]
+                    return uids[0] if uids else None
+
+                players = [
+                    {"user_uid": player._properties.get("uid"),
+                     "username": player._properties.get("username"),
+                     "display_name": player._properties.get("display_name")}
+                    for player in (self._nodes[other]
+                                   for other in self.neighbours(game.element_id, "PARTICIPATES_IN", INCOMING))
+                    if "Player" in player.labels
+                ]
+                rows.append([game, game._properties["created_at"], first_uid("CREATED_BY"),
+                             first_uid("CURRENT_TURN"), first_uid("WON_BY"), players])
+        return rows, ["g", "sort_key", "creator", "current_player", "winner", "players"]
@@ -0,0 +1,303 @@
+"""
+Benchmark suite for the game backend's hot paths.
+
+Each operation runs a fixed number of times against the in-process fake
+graph and the in-memory channel layer, after a warm-up, with the global
+random generator seeded so the same games are dealt on every run. For
+each operation the report records throughput, latency percentiles and
+the number of statements that would have been sent to Neo4j, so two
+reports taken on different commits can be diffed directly.
+"""
+
+import json
+import platform
+import random
+import statistics
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.test import override_settings
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.game.api.notifications import GameNotifications
+from backend.game.consumers import GameConsumer
+from backend.game.models import Game, Player
+from backend.game.services import game_state_engine, game_view_cache
+from backend.game.services.game_service import GameService
+from backend.game.services.game_service_utils.action import Action
+from backend.game.services.game_service_utils.create_action_card_game import create_action_card_game
+from backend.game.services.game_service_utils.create_idiot_rule_set import create_idiot_rule_set
+from backend.game.services.game_service_utils.play_card import play_card
+from backend.game.services.game_state_engine import GameStateEngine
+from backend.game.services.game_view_cache import GameViewCache
+from backend.game.services.rule_interpreter.base import get_rule_interpreter
+from backend.game.services.simulator import SimulatedCard
+
+OPERATIONS = (
+    "create_game",
+    "create_action_card_game",
+    "play_card",
+    "game_state_serialize",
+    "consumer_get_game_data",
+    "notifications_send_to_game",
+)
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+# New games dealt while looking for a playable move before play_card gives up
+MAX_DEALS_PER_MOVE = 50
+
+
+def measure(graph, operation, iterations, warmup=0, setup=None):
+    """
+    Time an operation and count the statements it sends to the graph
+
+    Args:
+        graph (FakeGraph): Graph the operation runs against
+        operation (callable): Called with the arguments returned by setup
+        iterations (int): Timed calls, at least 2
+        warmup (int): Untimed calls made first
+        setup (callable): Untimed, returns the arguments of the next call
+
+    Returns:
+        dict: Throughput, latency percentiles in milliseconds and statements per call
+    """
+    for _ in range(warmup):
+        operation(*(setup() if setup else ()))
+
+    samples = []
+    queries = 0
+    statements = {}
+    for _ in range(iterations):
+        args = setup() if setup else ()
+        queries_before, statements_before = graph.snapshot()
+        started = time.perf_counter()
+        operation(*args)
+        samples.append(time.perf_counter() - started)
+        queries_after, statements_after = graph.snapshot()
+
+        queries += queries_after - queries_before
+        statements_after.subtract(statements_before)
+        for kind, count in statements_after.items():
+            statements[kind] = statements.get(kind, 0) + count
+
+    percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / sum(samples), 1),
+        "latency_ms": {
+            "mean": round(statistics.mean(samples) * 1000, 4),
+            "p50": round(percentiles[49] * 1000, 4),
+            "p95": round(percentiles[94] * 1000, 4),
+            "p99": round(percentiles[98] * 1000, 4),
+        },
+        "queries_per_op": round(queries / iterations, 2),
+        "statements_per_op": {
+            kind: round(count / iterations, 2)
+            for kind, count in sorted(statements.items()) if count
+        },
+    }
+
+
+class BenchmarkSuite:
+    """
+    Seeds a fake graph with players and a rule set and benchmarks operations against it.
+    """
+
+    def __init__(self, iterations=200, warmup=20, seed=0, num_players=4):
+        """
+        Initialize the suite
+
+        Args:
+            iterations (int): Timed calls per operation
+            warmup (int): Untimed calls per operation
+            seed (int): Seed of the global random generator for each operation
+            num_players (int): Players per benchmarked game
+        """
+        if iterations < 2:
+            raise ValueError("iterations must be at least 2")
+
+        self.iterations = iterations
+        self.warmup = warmup
+        self.seed = seed
+        self.num_players = num_players
+        self.graph = None
+        self.engine = None
+
+    def run(self, operations=OPERATIONS):
+        """
+        Run the benchmarks
+
+        Args:
+            operations: Names from OPERATIONS to run
+
+        Returns:
+            dict: The report
+        """
+        unknown = set(operations) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operations: {', '.join(sorted(unknown))}")
+
+        self.graph = FakeGraph()
+        # A private engine that only flushes when told to, so no background
+        # thread writes to the graph while an operation is being measured
+        self.engine = GameStateEngine(enabled=True, flush_interval=3600)
+
+        results = {}
+        with self.graph.install(), \
+                override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS), \
+                mock.patch.object(game_state_engine, "_engine", self.engine), \
+                mock.patch.object(game_view_cache, "_cache", GameViewCache(enabled=False)):
+            # Views are measured uncached, otherwise repeated reads never reach the graph
+            self._seed_graph()
+            for name in OPERATIONS:
+                if name in operations:
+                    random.seed(self.seed)
+                    results[name] = getattr(self, f"bench_{name}")()
+
+        return {
+            "config": {
+                "iterations": self.iterations,
+                "warmup": self.warmup,
+                "seed": self.seed,
+                "players": self.num_players,
+                "game_state_persistence": getattr(settings, "GAME_STATE_PERSISTENCE", "snapshot"),
+                "python": platform.python_version(),
+            },
+            "operations": results,
+            "unhandled_statements": dict(self.graph.unhandled),
+        }
+
+    def _measure(self, operation, setup=None):
+        return measure(self.graph, operation, self.iterations, self.warmup, setup)
+
+    def _seed_graph(self):
+        self.players = [
+            Player(username=f"bench_player_{seat}", display_name=f"Player {seat}").save()
+            for seat in range(self.num_players)
+        ]
+        self.player_uids = [player.uid for player in self.players]
+        self.rule_set = create_idiot_rule_set()
+        self.interpreter = get_rule_interpreter(self.rule_set)
+
+    def bench_create_game(self):
+        """GameService.create_game for a game waiting for players"""
+        return self._measure(lambda: GameService.create_game(
+            self.player_uids[0],
+            max_players=self.num_players,
+            rule_version=self.rule_set.version
+        ))
+
+    def bench_create_action_card_game(self):
+        """Create a game, deal every player's hand and persist the initial state"""
+        return self._measure(lambda: create_action_card_game("Benchmark", self.player_uids, self.rule_set.uid))
+
+    def bench_play_card(self):
+        """Play a valid card, including flushing the move's state write"""
+        self._move_game_uid = None
+
+        def play(game_uid, player_uid, card_uid):
+            result = play_card(game_uid, player_uid, card_uid)
+            if "error" in result:
+                raise RuntimeError(f"play_card failed: {result['error']}")
+            self.engine.flush()
+            if result.get("game_over"):
+                self._move_game_uid = None
+
+        return self._measure(play, self._next_move)
+
+    def _next_move(self):
+        """Find a playable card for the player to move, dealing new games as needed"""
+        for _ in range(MAX_DEALS_PER_MOVE):
+            if self._move_game_uid is None:
+                self._move_game_uid = create_action_card_game(
+                    "Benchmark", self.player_uids, self.rule_set.uid
+                )["game_id"]
+
+            state = self.engine.get_state(self._move_game_uid, lambda: self._load_state(self._move_game_uid))
+            player_state = state.get_player_state(state.current_player_uid)
+            for card in player_state["hand"]:
+                action = Action(type="play_card", card=SimulatedCard(card))
+                if self.interpreter.validate_action(state, player_state, action):
+                    return self._move_game_uid, state.current_player_uid, card["id"]
+
+            # The player to move would have to draw; deal a fresh game instead
+            self.engine.end_game(self._move_game_uid)
+            self._move_game_uid = None
+
+        raise RuntimeError("No playable card found")
+
+    def _load_state(self, game_uid):
+        return Game.nodes.get(uid=game_uid).game_state.single()
+
+    def bench_game_state_serialize(self):
+        """Serialize a dealt game state for one player"""
+        game_uid = create_action_card_game("Benchmark", self.player_uids, self.rule_set.uid)["game_id"]
+        state = self._load_state(game_uid)
+        return self._measure(lambda: state.serialize(for_player_id=self.player_uids[0]))
+
+    def bench_consumer_get_game_data(self):
+        """Build the initial game payload a WebSocket client receives"""
+        game = GameService.create_game(
+            self.player_uids[0],
+            max_players=self.num_players,
+            rule_version=self.rule_set.version
+        )
+        for player_uid in self.player_uids[1:]:
+            GameService.join_game(game.uid, player_uid)
+        consumer = GameConsumer()
+
+        def get_game_data():
+            if async_to_sync(consumer.get_game_data)(game.uid) is None:
+                raise RuntimeError("get_game_data returned no data")
+
+        return self._measure(get_game_data)
+
+    def bench_notifications_send_to_game(self):
+        """Send one notification to a game group with a channel per player"""
+        channel_layer = get_channel_layer()
+        group_name = GameNotifications.get_game_group_name("benchmark")
+        data = {"player_id": self.player_uids[0], "card": {"suit": "hearts", "value": "7"}}
+
+        def subscribe():
+            # Start every send from empty channels so none reaches capacity
+            async_to_sync(channel_layer.flush)()
+            for seat in range(self.num_players):
+                async_to_sync(channel_layer.group_add)(group_name, f"benchmark.channel.{seat}")
+            return ()
+
+        def send():
+            if not GameNotifications.send_to_game("benchmark", "card_played", data):
+                raise RuntimeError("send_to_game failed")
+
+        return self._measure(send, subscribe)
+
+
+def run_suite(operations=OPERATIONS, **options):
+    """
+    Run the benchmark suite
+
+    Args:
+        operations: Names from OPERATIONS to run
+        **options: Passed to BenchmarkSuite
+
+    Returns:
+        dict: The report
+    """
+    return BenchmarkSuite(**options).run(operations)
+
+
+def write_report(report, path):
+    """
+    Write a report as stable, diffable JSON
+
+    Args:
+        report (dict): Report from run_suite
+        path (str): Output file
+    """
+    with open(path, "w") as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+        output.write("\n")
@@ -0,0 +1,70 @@
+"""
+Async Neo4j access for code running on the event loop.
+
+neomodel only drives Neo4j synchronously, so WebSocket consumers had to hop
+through database_sync_to_async's thread pool for every read. cypher_query
+runs a statement on the neo4j package's async driver instead, against the
+database neomodel is configured for (config.DATABASE_URL), and returns rows
+the way neomodel's db.cypher_query does, so returned nodes can be passed to
+StructuredNode.inflate(). Statements are counted by query_stats like
+neomodel's.
+"""
+
+import asyncio
+import time
+import weakref
+from urllib.parse import urlparse
+
+from neo4j import AsyncGraphDatabase
+from neomodel import config
+
+from backend.card_game.query_stats import record_query
+
+# Async drivers are bound to the event loop they were created on
+_drivers = weakref.WeakKeyDictionary()
+
+
+def _connect():
+    """Create an async driver from neomodel's connection URL."""
+    url = urlparse(config.DATABASE_URL)
+    auth = (url.username, url.password) if url.username else None
+    return AsyncGraphDatabase.driver(
+        f"{url.scheme}://{url.hostname}:{url.port or 7687}",
+        auth=auth,
+        max_connection_pool_size=getattr(config, "MAX_CONNECTION_POOL_SIZE", 100)
+    )
+
+
+def get_driver():
+    """
+    Get the async driver for the running event loop.
+
+    Returns:
+        neo4j.AsyncDriver: The driver, created on first use in this loop
+    """
+    loop = asyncio.get_running_loop()
+    driver = _drivers.get(loop)
+    if driver is None:
+        driver = _drivers[loop] = _connect()
+    return driver
+
+
+async def cypher_query(query, params=None):
+    """
+    Run a Cypher statement on the async driver.
+
+    Args:
+        query (str): Cypher statement
+        params (dict): Query parameters
+
+    Returns:
+        tuple: (rows as lists of values, column names)
+    """
+    started = time.perf_counter()
+    try:
+        async with get_driver().session(database=getattr(config, "DATABASE_NAME", None)) as session:
+            result = await session.run(query, params or {})
+            rows = [list(record.values()) async for record in result]
+            return rows, list(result.keys())
+    finally:
+        record_query(query, time.perf_counter() - started)
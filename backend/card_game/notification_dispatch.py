@@ -0,0 +1,433 @@
+"""
+Coalescing dispatch of channel layer notifications.
+
+Inside collect_notifications(), GameNotifications and the GameService
+notification helpers queue their group messages instead of sending each one
+through its own async_to_sync round trip. NotificationBatchMiddleware
+(card_game.middleware) collects per HTTP request and hands the messages to
+the dispatcher once the response is ready. They are coalesced per group: a
+group with one message gets it unchanged, a group with several gets a single
+batch_update, which BatchUpdateConsumerMixin unpacks through the consumer's
+own handlers. Outside a collection messages are sent straight away.
+
+Each dispatch goes out through group_send_many, which on the Redis channel
+layer publishes to all of its groups in a few pipelined round trips.
+
+With NOTIFICATION_DISPATCH_BACKGROUND the coalesced messages are sent from a
+background event loop, so views do not wait on the channel layer. Each group
+(game_<uid>, player_<uid>, ...) has a bounded queue there; messages arriving
+while a send is in flight are coalesced into the next one, and when a queue
+holds NOTIFICATION_DISPATCH_MAX_QUEUE messages the oldest are dropped.
+Clients that miss a state patch this way resync through sync_state.
+
+Messages carry the text frame their client receives, encoded once when the
+message is sent (card_game.json_codec), so consumers forward it as it is
+instead of encoding the same event again for every socket. attach_frames
+adds it to messages made of just a type and data, which reach the client
+unchanged; GameNotifications encodes the frames of its own events.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.consumer import get_handler_name
+from django.conf import settings
+
+from backend.card_game.json_codec import dumps
+
+try:
+    from channels_redis.core import RedisChannelLayer
+except ImportError:  # Only needed for the pipelined Redis path
+    RedisChannelLayer = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE = 256
+
+_pending = ContextVar("pending_notifications", default=None)
+
+
+@contextmanager
+def collect_notifications():
+    """
+    Queue the notifications sent in this context, including sync code it
+    calls through asgiref, which runs with a copy of the context
+
+    Yields:
+        list: (group name, message) pairs, in the order they were sent
+    """
+    messages = []
+    token = _pending.set(messages)
+    try:
+        yield messages
+    finally:
+        _pending.reset(token)
+
+
+def queue_notifications(messages):
+    """
+    Queue messages into the current collection, if there is one
+
+    Args:
+        messages: List of (group name, message) pairs
+
+    Returns:
+        bool: True if queued, False if the caller has to send them itself
+    """
+    pending = _pending.get()
+    if pending is None:
+        return False
+
+    pending.extend(messages)
+    return True
+
+
+def send_to_group(channel_layer, group_name, message):
+    """
+    Send a message to a group, or queue it while notifications are collected
+
+    Args:
+        channel_layer: The channel layer
+        group_name: The group to send to
+        message: The channel message
+    """
+    attach_frames([(group_name, message)])
+    if not queue_notifications([(group_name, message)]):
+        async_to_sync(channel_layer.group_send)(group_name, message)
+
+
+def send_to_groups(channel_layer, messages):
+    """
+    Send messages to several groups in one publish, or queue them while
+    notifications are collected
+
+    Args:
+        channel_layer: The channel layer
+        messages: List of (group name, message) pairs; pairs may share one
+            message dict
+    """
+    attach_frames(messages)
+    if messages and not queue_notifications(messages):
+        async_to_sync(group_send_many)(channel_layer, messages)
+
+
+def attach_frames(messages):
+    """
+    Add the client frame to messages a consumer passes on unchanged, those
+    with just a type and data. A message shared by several groups is only
+    encoded once.
+
+    Args:
+        messages: List of (group name, message) pairs
+    """
+    for group_name, message in messages:
+        if "frame" not in message and message.keys() == {"type", "data"} and "." not in message["type"]:
+            message["frame"] = dumps({"type": message["type"], "data": message["data"]})
+
+
+# Score added per channel write in one script, keeping the writes in order
+SCORE_STEP = 1e-6
+
+# The Lua script channels_redis runs for group_send, over the channels of many groups at once,
+# taking a score for every write instead of one current time
+GROUP_SEND_LUA = """
+    local over_capacity = 0
+    local expiry = ARGV[#ARGV]
+    for i=1,#KEYS do
+        if redis.call('ZCOUNT', KEYS[i], '-inf', '+inf') < tonumber(ARGV[i + #KEYS]) then
+            redis.call('ZADD', KEYS[i], ARGV[i + 2 * #KEYS], ARGV[i])
+            redis.call('EXPIRE', KEYS[i], expiry)
+        else
+            over_capacity = over_capacity + 1
+        end
+    end
+    return over_capacity
+"""
+
+
+async def group_send_many(channel_layer, messages):
+    """
+    Send messages to several groups. On the Redis channel layer the group
+    members are read in one pipeline and every channel is written by one
+    script per Redis host, instead of four round trips per group; other
+    layers get one group_send per group.
+
+    Args:
+        channel_layer: The channel layer
+        messages: List of (group name, message) pairs
+    """
+    if RedisChannelLayer is not None and isinstance(channel_layer, RedisChannelLayer):
+        await _redis_group_send_many(channel_layer, messages)
+        return
+
+    for group_name, message in messages:
+        await channel_layer.group_send(group_name, message)
+
+
+async def _redis_group_send_many(layer, messages):
+    """Pipelined group_send for channels_redis' RedisChannelLayer."""
+    now = int(time.time())
+
+    # Read the members of every group, one pipeline per host
+    groups_by_host = defaultdict(list)
+    for group_name, message in messages:
+        assert layer.valid_group_name(group_name), "Group name not valid"
+        groups_by_host[layer.consistent_hash(group_name)].append((group_name, message))
+
+    deliveries = []
+    for index, host_messages in groups_by_host.items():
+        pipe = layer.connection(index).pipeline(transaction=False)
+        for group_name, message in host_messages:
+            key = layer._group_key(group_name)
+            pipe.zremrangebyscore(key, min=0, max=now - layer.group_expiry)
+            pipe.zrange(key, 0, -1)
+        results = await pipe.execute()
+        for (group_name, message), members in zip(host_messages, results[1::2]):
+            deliveries.append((group_name, [member.decode("utf8") for member in members], message))
+
+    # Write to every channel, one script per host. A channel in several
+    # groups the same message goes to gets it once
+    writes_by_host = defaultdict(list)
+    sent = defaultdict(set)
+    for group_name, channel_names, message in deliveries:
+        channel_names = [name for name in channel_names if name not in sent[id(message)]]
+        if not channel_names:
+            continue
+        sent[id(message)].update(channel_names)
+        channel_keys_by_host, key_messages, key_capacities = layer._map_channel_keys_to_connection(
+            channel_names, message
+        )
+        for index, channel_keys in channel_keys_by_host.items():
+            writes_by_host[index].extend(
+                (key, key_messages[key], key_capacities[key]) for key in channel_keys
+            )
+
+    for index, writes in writes_by_host.items():
+        keys = [key for key, payload, capacity in writes]
+        # Channels pop the lowest score first, so each write is scored after the one before it
+        base = time.time()
+        pipe = layer.connection(index).pipeline(transaction=False)
+        for key in dict.fromkeys(keys):
+            pipe.zremrangebyscore(key, min=0, max=now - int(layer.expiry))
+        pipe.eval(
+            GROUP_SEND_LUA, len(keys), *keys,
+            *[payload for key, payload, capacity in writes],
+            *[capacity for key, payload, capacity in writes],
+            *[base + position * SCORE_STEP for position in range(len(writes))],
+            layer.expiry
+        )
+        over_capacity = (await pipe.execute())[-1]
+        if over_capacity > 0:
+            logger.info(f"{over_capacity} of {len(keys)} channel messages over capacity")
+
+
+def merge_messages(messages):
+    """
+    Merge the messages for one group into a single message
+
+    Args:
+        messages: Channel messages, oldest first
+
+    Returns:
+        dict: The only message, or a batch_update carrying all of them
+    """
+    if len(messages) == 1:
+        return messages[0]
+
+    merged = []
+    for message in messages:
+        if message.get("type") == "batch_update" and "updates" not in message:
+            merged.extend(message["messages"])
+        else:
+            merged.append(message)
+    return {"type": "batch_update", "messages": merged}
+
+
+def coalesce(messages):
+    """
+    Merge collected messages per group, keeping each group's order
+
+    Args:
+        messages: List of (group name, message) pairs
+
+    Returns:
+        list: One (group name, message) pair per group
+    """
+    by_group = {}
+    for group_name, message in messages:
+        by_group.setdefault(group_name, []).append(message)
+    return [(group_name, merge_messages(group_messages)) for group_name, group_messages in by_group.items()]
+
+
+class NotificationDispatcher:
+    """
+    Sends collected notifications, coalesced per group.
+    """
+
+    def __init__(self, background=False, max_queue=DEFAULT_MAX_QUEUE):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            background: Send from a background event loop instead of the caller
+            max_queue: Messages kept per group before the oldest are dropped
+        """
+        self.background = background
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._queues = {}
+        self._draining = None
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def dispatch(self, messages):
+        """
+        Send collected messages from sync code.
+
+        Args:
+            messages: List of (group name, message) pairs
+        """
+        batch = coalesce(messages)
+        if not batch:
+            return
+
+        if self.background:
+            self._ensure_loop().call_soon_threadsafe(self._enqueue, batch)
+        else:
+            async_to_sync(self.send_batch)(batch)
+
+    async def adispatch(self, messages):
+        """
+        Send collected messages from async code.
+
+        Args:
+            messages: List of (group name, message) pairs
+        """
+        batch = coalesce(messages)
+        if not batch:
+            return
+
+        if self.background:
+            self._ensure_loop().call_soon_threadsafe(self._enqueue, batch)
+        else:
+            await self.send_batch(batch)
+
+    @staticmethod
+    async def send_batch(batch):
+        """
+        Send coalesced messages in one multi-group publish.
+
+        Args:
+            batch: List of (group name, message) pairs
+        """
+        try:
+            await group_send_many(get_channel_layer(), batch)
+        except Exception:
+            logger.exception(f"Error sending notifications to {len(batch)} groups")
+
+    def _enqueue(self, batch):
+        """Add messages to the group queues. Runs on the background loop."""
+        for group_name, message in batch:
+            queue = self._queues.setdefault(group_name, deque())
+            if len(queue) >= self.max_queue:
+                queue.popleft()
+                self.dropped += 1
+                logger.warning(f"Notification queue for {group_name} is full, dropped its oldest message")
+            queue.append(message)
+
+        if self._draining is None:
+            self._draining = self._loop.create_task(self._drain())
+
+    async def _drain(self):
+        """Send the queued messages, merging any that pile up while a send is in flight."""
+        try:
+            while self._queues:
+                queues, self._queues = self._queues, {}
+                await self.send_batch([
+                    (group_name, merge_messages(list(queue))) for group_name, queue in queues.items()
+                ])
+        finally:
+            self._draining = None
+
+    def _ensure_loop(self):
+        """Start the background event loop on first use."""
+        if self._loop is not None:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name="notification-dispatcher",
+                    daemon=True
+                ).start()
+                self._loop = loop
+
+        return self._loop
+
+
+class BatchUpdateConsumerMixin:
+    """
+    Consumer mixin unpacking batch_update events. Each message in the batch
+    runs through the consumer's own handler, and the frames those handlers
+    send reach the client as one batch_update frame.
+    """
+
+    _batch_frames = None
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if self._batch_frames is not None and text_data is not None and not close:
+            self._batch_frames.append(text_data)
+            return
+        await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+
+    def event_handler(self, message):
+        """The consumer method handling a channel message, or None"""
+        return getattr(self, get_handler_name(message), None)
+
+    async def batch_update(self, event):
+        """Handle batched updates to reduce message overhead"""
+        outer = self._batch_frames
+        self._batch_frames = frames = [dumps(update) for update in event.get("updates", ())]
+        try:
+            for message in event.get("messages", ()):
+                handler = self.event_handler(message)
+                if handler is not None:
+                    await handler(message)
+        finally:
+            self._batch_frames = outer
+
+        if frames:
+            await self.send(text_data='{"type": "batch_update", "updates": [' + ", ".join(frames) + "]}")
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher():
+    """
+    Get the process-wide notification dispatcher.
+
+    Returns:
+        NotificationDispatcher: The dispatcher configured from settings
+    """
+    global _dispatcher
+
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = NotificationDispatcher(
+                    background=getattr(settings, "NOTIFICATION_DISPATCH_BACKGROUND", False),
+                    max_queue=getattr(settings, "NOTIFICATION_DISPATCH_MAX_QUEUE", DEFAULT_MAX_QUEUE)
+                )
+
+    return _dispatcher
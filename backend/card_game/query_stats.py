@@ -0,0 +1,244 @@
+"""
+Per-request Neo4j query instrumentation.
+
+Wraps neomodel's Database.cypher_query so that, inside collect_queries(),
+every statement is counted and timed and grouped by shape (the statement
+with literals stripped). QueryStatsMiddleware (card_game.middleware)
+collects one QueryStats per HTTP request and QueryStatsConsumerMixin one
+per WebSocket message. Each collection is logged as a JSON line. A shape
+repeated at least QUERY_STATS_N_PLUS_ONE_THRESHOLD times is reported as a
+likely N+1 pattern. Time spent waiting for a connection from the driver's
+pool (neo4j_connection) is reported alongside.
+"""
+
+import functools
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from neomodel.util import Database
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+_current_stats = ContextVar("query_stats", default=None)
+_install_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+
+
+def query_shape(query):
+    """
+    Reduce a statement to its shape so repeats with different literals match
+
+    Args:
+        query (str): Cypher statement
+
+    Returns:
+        str: The statement with whitespace collapsed and literals replaced by ?
+    """
+    shape = _STRING_LITERAL.sub("?", query)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return " ".join(shape.split())
+
+
+class QueryStats:
+    """
+    Queries issued while handling one request or message.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.pool_wait = 0.0
+        self.shapes = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, query, duration):
+        """
+        Record one statement
+
+        Args:
+            query (str): Cypher statement
+            duration (float): Seconds spent waiting for the database
+        """
+        shape = query_shape(query)
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.shapes[shape] += 1
+
+    def record_pool_wait(self, duration):
+        """
+        Record time spent waiting for a pooled connection
+
+        Args:
+            duration (float): Seconds the acquisition took
+        """
+        with self._lock:
+            self.pool_wait += duration
+
+    def repeated(self, threshold):
+        """
+        Get the shapes issued at least threshold times
+
+        Args:
+            threshold (int): Minimum number of repeats
+
+        Returns:
+            list: (shape, count) tuples, most repeated first
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def as_dict(self, threshold):
+        """
+        Summarize the statistics
+
+        Args:
+            threshold (int): Repeats of one shape flagged as N+1
+
+        Returns:
+            dict: Query count, database and pool wait time in milliseconds and repeated shapes
+        """
+        repeated = self.repeated(threshold)
+        return {
+            "queries": self.count,
+            "db_time_ms": round(self.duration * 1000, 3),
+            "pool_wait_ms": round(self.pool_wait * 1000, 3),
+            "n_plus_one": bool(repeated),
+            "repeated": [{"shape": shape, "count": count} for shape, count in repeated],
+        }
+
+
+def instrument(cypher_query):
+    """
+    Wrap a cypher_query implementation so statements are recorded while collecting
+
+    Args:
+        cypher_query (callable): Database.cypher_query or a replacement
+
+    Returns:
+        callable: The wrapped method
+    """
+    @functools.wraps(cypher_query)
+    def wrapper(db, query, *args, **kwargs):
+        stats = _current_stats.get()
+        if stats is None:
+            return cypher_query(db, query, *args, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            return cypher_query(db, query, *args, **kwargs)
+        finally:
+            stats.record(query, time.perf_counter() - started)
+
+    wrapper.query_stats_instrumented = True
+    return wrapper
+
+
+def install():
+    """Instrument neomodel's Database.cypher_query once per process"""
+    with _install_lock:
+        if not getattr(Database.cypher_query, "query_stats_instrumented", False):
+            Database.cypher_query = instrument(Database.cypher_query)
+
+
+def record_query(query, duration):
+    """
+    Record a statement issued outside neomodel, e.g. on the async driver
+
+    Args:
+        query (str): Cypher statement
+        duration (float): Seconds spent waiting for the database
+    """
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(query, duration)
+
+
+def record_pool_wait(duration):
+    """
+    Record time spent waiting for a connection from the driver's pool
+
+    Args:
+        duration (float): Seconds the acquisition took
+    """
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record_pool_wait(duration)
+
+
+def query_stats_enabled():
+    """Check whether queries are collected per request and message"""
+    return getattr(settings, "QUERY_STATS_ENABLED", False)
+
+
+def n_plus_one_threshold():
+    """Repeats of one query shape within a request reported as N+1"""
+    return getattr(settings, "QUERY_STATS_N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+
+
+@contextmanager
+def collect_queries():
+    """
+    Collect the queries issued in this context, including sync code it calls
+    through asgiref, which runs with a copy of the context
+
+    Yields:
+        QueryStats: Filled in as statements run
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def log_query_stats(scope, target, stats):
+    """
+    Log the queries of one request or message as a JSON line
+
+    Args:
+        scope (str): "http" or "websocket"
+        target (str): What was handled, e.g. "GET /api/games/"
+        stats (QueryStats): The collected statistics
+
+    Returns:
+        dict: The logged summary
+    """
+    summary = stats.as_dict(n_plus_one_threshold())
+    payload = {"event": "neo4j_queries", "scope": scope, "target": target, **summary}
+    level = logging.WARNING if summary["n_plus_one"] else logging.INFO
+    logger.log(level, json.dumps(payload, sort_keys=True))
+    return summary
+
+
+class QueryStatsConsumerMixin:
+    """
+    Consumer mixin collecting the Neo4j queries of each message it handles,
+    from the WebSocket handshake and frames to group events.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        install()
+
+    async def dispatch(self, message):
+        if not query_stats_enabled():
+            return await super().dispatch(message)
+
+        with collect_queries() as stats:
+            try:
+                return await super().dispatch(message)
+            finally:
+                if stats.count:
+                    log_query_stats("websocket", f"{message.get('type')} {self.scope.get('path', '')}", stats)
@@ -1,17 +1,20 @@
 """
 WebSocket authentication middleware.
 This module provides middleware for authenticating WebSocket connections.
+
+The token is validated once, here, for the whole connection. Its
+UserProfile comes from the profile cache shared with REST authentication,
+or from Neo4j through the async driver, and the blacklist is checked in
+memory, so a handshake normally needs neither a query nor a thread.
+Consumers read the result from scope['user'] and scope['player_id'].
 """
 
-import re
 from urllib.parse import parse_qs
-from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import TokenError
 
-User = get_user_model()
+from backend.authentication.auth_cache import aget_user_profile, get_token_blacklist
 
 
 class TokenAuthMiddleware:
@@ -40,9 +43,35 @@ class TokenAuthMiddleware:
         Returns:
             The result of the inner application
         """
-        # Get the token from the query string
-        query_string = scope.get('query_string', b'').decode()
-        query_params = parse_qs(query_string)
+        token = self.get_token(scope)
+
+        # Authenticate the token
+        if token:
+            profile = await self.authenticate(token)
+            if profile is not None:
+                scope['user'] = profile
+                scope['player_id'] = profile.uid  # Players share their UserProfile's uid
+                scope['token'] = token
+
+        # If no user was set, set AnonymousUser
+        if 'user' not in scope:
+            scope['user'] = AnonymousUser()
+
+        # Continue processing
+        return await self.inner(scope, receive, send)
+
+    @staticmethod
+    def get_token(scope):
+        """
+        Get the JWT from the query string or the Authorization header.
+
+        Args:
+            scope: The connection scope
+
+        Returns:
+            str: The token, or an empty string
+        """
+        query_params = parse_qs(scope.get('query_string', b'').decode())
         token = query_params.get('token', [''])[0]
 
         # If no token in query string, check for Authorization header
@@ -54,45 +83,30 @@ class TokenAuthMiddleware:
             if auth_header.startswith('Bearer '):
                 token = auth_header[7:]
 
-        # Authenticate the token
-        if token:
-            try:
-                # Validate the token
-                access_token = AccessToken(token)
-                user_id = access_token.payload.get('user_id')
-
-                if user_id:
-                    # Get the user
-                    user = await self.get_user(user_id)
-                    if user:
-                        scope['user'] = user
-                        scope['token'] = token
-            except TokenError:
-                pass
+        return token
 
-        # If no user was set, set AnonymousUser
-        if 'user' not in scope:
-            scope['user'] = AnonymousUser()
-
-        # Continue processing
-        return await self.inner(scope, receive, send)
-
-    @database_sync_to_async
-    def get_user(self, user_id):
+    @staticmethod
+    async def authenticate(token):
         """
-        Get a user by ID.
+        Validate a token and resolve its UserProfile.
 
         Args:
-            user_id: The user ID
+            token: The JWT
 
         Returns:
-            User: The user object or None
+            UserProfile: The profile, or None if the token is invalid,
+                blacklisted or names no profile
         """
         try:
-            return User.objects.get(id=user_id)
-        except User.DoesNotExist:
+            user_uid = AccessToken(token).payload.get('user_uid')
+        except TokenError:
             return None
 
+        if not user_uid or await get_token_blacklist().ais_blacklisted(token):
+            return None
+
+        return await aget_user_profile(user_uid)
+
 
 def TokenAuthMiddlewareStack(inner):
     """
@@ -2,13 +2,19 @@
 Notification system for real-time game events.
 This module provides functionality to send real-time notifications to players
 about game events using Django Channels.
+
+Each message carries the frame its clients receive, encoded once here rather
+than by the consumer of every socket in the group.
 """
 
-import json
 import logging
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from backend.card_game.json_codec import dumps
+from backend.card_game.notification_dispatch import group_send_many, queue_notifications
+from backend.game.services.state_patches import patch_for_player
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +50,31 @@ class GameNotifications:
         """
         return f"game_{game_id}"
 
+    @staticmethod
+    def build_message(event_type, data, private=None):
+        """
+        Build the channel message for an event, with its client frame.
+
+        Args:
+            event_type: The type of event
+            data: The data to send
+            private: Optional data only the receiving player sees
+
+        Returns:
+            dict: The game.notification message
+        """
+        payload = {"type": event_type, "data": data}
+        message = {
+            "type": "game.notification",
+            "event_type": event_type,
+            "data": data
+        }
+        if private is not None:
+            payload["private"] = message["private"] = private
+
+        message["frame"] = dumps(payload)
+        return message
+
     @classmethod
     def send_to_player(cls, player_id, event_type, data):
         """
@@ -61,14 +92,10 @@ class GameNotifications:
             channel_layer = get_channel_layer()
             group_name = cls.get_player_group_name(player_id)
 
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    "type": "game.notification",
-                    "event_type": event_type,
-                    "data": data
-                }
-            )
+            message = cls.build_message(event_type, data)
+
+            if not queue_notifications([(group_name, message)]):
+                async_to_sync(channel_layer.group_send)(group_name, message)
             return True
         except Exception as e:
             logger.error(f"Error sending notification to player {player_id}: {str(e)}")
@@ -92,28 +119,97 @@ class GameNotifications:
             channel_layer = get_channel_layer()
             group_name = cls.get_game_group_name(game_id)
 
-            message = {
-                "type": "game.notification",
-                "event_type": event_type,
-                "data": data
-            }
+            message = cls.build_message(event_type, data)
 
             if exclude_player_id:
                 message["exclude_player_id"] = exclude_player_id
 
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                message
-            )
+            if not queue_notifications([(group_name, message)]):
+                async_to_sync(channel_layer.group_send)(group_name, message)
+            return True
+        except Exception as e:
+            logger.error(f"Error sending notification to game {game_id}: {str(e)}")
+            return False
+
+    @classmethod
+    def fan_out(cls, game_id, event_type, data, private=None, exclude_player_id=None):
+        """
+        Send an event to all players in a game, with private additions for
+        some of them. The public event is built once for the game group; each
+        player with a private overlay is left out of it and instead gets the
+        event plus their overlay on their own group. All messages go out in
+        one multi-group publish, or join the request's collected notifications.
+
+        Args:
+            game_id: The ID of the game
+            event_type: The type of event
+            data: The public data, sent to everyone
+            private: Optional dict of player ID to data only that player sees
+            exclude_player_id: Optional player ID to exclude from the notification
+
+        Returns:
+            bool: True if the notification was sent, False otherwise
+        """
+        private = {
+            player_id: overlay for player_id, overlay in (private or {}).items()
+            if overlay and player_id != exclude_player_id
+        }
+        if not private:
+            return cls.send_to_game(game_id, event_type, data, exclude_player_id=exclude_player_id)
+
+        excluded = list(private)
+        if exclude_player_id:
+            excluded.append(exclude_player_id)
+
+        try:
+            public = cls.build_message(event_type, data)
+            public["exclude_player_ids"] = excluded
+
+            messages = [(cls.get_game_group_name(game_id), public)]
+            for player_id, overlay in private.items():
+                messages.append((
+                    cls.get_player_group_name(player_id),
+                    cls.build_message(event_type, data, private=overlay)
+                ))
+
+            channel_layer = get_channel_layer()
+            if not queue_notifications(messages):
+                async_to_sync(group_send_many)(channel_layer, messages)
             return True
         except Exception as e:
             logger.error(f"Error sending notification to game {game_id}: {str(e)}")
             return False
 
+    @classmethod
+    def send_state_patch(cls, game_id, patch):
+        """
+        Send a state patch to everyone watching a game. Consumers forward it
+        to each player with that player's own hand edits only; the frame for
+        players whose hand did not change is encoded once here.
+
+        Args:
+            game_id: The ID of the game
+            patch: Patch event from StatePatchLog.record
+
+        Returns:
+            bool: True if the patch was sent, False otherwise
+        """
+        try:
+            channel_layer = get_channel_layer()
+            group_name = cls.get_game_group_name(game_id)
+            message = {"type": "state.patch", **patch, "frame": dumps(patch_for_player(patch, None))}
+
+            if not queue_notifications([(group_name, message)]):
+                async_to_sync(channel_layer.group_send)(group_name, message)
+            return True
+        except Exception as e:
+            logger.error(f"Error sending state patch to game {game_id}: {str(e)}")
+            return False
+
     # Specific event notifications
 
     @classmethod
-    def notify_card_played(cls, game_id, player_id, card, effects=None):
+    def notify_card_played(cls, game_id, player_id, card, effects=None, cards_received=None):
         """
         Notify all players that a card was played.
 
@@ -122,6 +218,8 @@ class GameNotifications:
             player_id: The ID of the player who played the card
             card: The card that was played
             effects: Optional effects of the card play
+            cards_received: Optional dict of player ID to the cards the play
+                put in their hand, each sent to that player only
 
         Returns:
             bool: True if the notification was sent, False otherwise
@@ -134,16 +232,22 @@ class GameNotifications:
         if effects:
             data["effects"] = effects
 
-        return cls.send_to_game(game_id, "card_played", data)
+        private = {
+            receiver_id: {"cards_received": cards}
+            for receiver_id, cards in (cards_received or {}).items()
+        }
+
+        return cls.fan_out(game_id, "card_played", data, private=private)
 
     @classmethod
-    def notify_card_drawn(cls, game_id, player_id):
+    def notify_card_drawn(cls, game_id, player_id, card=None):
         """
         Notify all players that a player drew a card.
 
         Args:
             game_id: The ID of the game
             player_id: The ID of the player who drew a card
+            card: Optional card drawn, sent to the drawing player only
 
         Returns:
             bool: True if the notification was sent, False otherwise
@@ -152,7 +256,9 @@ class GameNotifications:
             "player_id": player_id
         }
 
-        return cls.send_to_game(game_id, "card_drawn", data)
+        private = {player_id: {"card": card}} if card else None
+
+        return cls.fan_out(game_id, "card_drawn", data, private=private)
 
     @classmethod
     def notify_one_card_announced(cls, game_id, player_id):
@@ -191,17 +297,21 @@ class GameNotifications:
         return cls.send_to_game(game_id, "turn_changed", data)
 
     @classmethod
-    def notify_game_started(cls, game_id):
+    def notify_game_started(cls, game_id, hands=None):
         """
         Notify all players that the game has started.
 
         Args:
             game_id: The ID of the game
+            hands: Optional dict of player ID to dealt hand, each sent to
+                that player only
 
         Returns:
             bool: True if the notification was sent, False otherwise
         """
-        return cls.send_to_game(game_id, "game_started", {})
+        private = {player_id: {"hand": hand} for player_id, hand in (hands or {}).items()}
+
+        return cls.fan_out(game_id, "game_started", {}, private=private)
 
     @classmethod
     def notify_game_ended(cls, game_id, winner_id, scores):
@@ -3,7 +3,7 @@ from backend.game.api.views import (
     PlayCardView,
     DrawCardView,
     AnnounceOneCardView,
-    GetGameStateView,
+    get_game_state,
     CreateGameView,
     JoinGameView,
     StartGameView
@@ -16,7 +16,7 @@ urlpatterns = [
     path('games/<str:game_id>/start/', StartGameView.as_view(), name='start_game'),
 
     # Game state
-    path('games/<str:game_id>/state/', GetGameStateView.as_view(), name='get_game_state'),
+    path('games/<str:game_id>/state/', get_game_state, name='get_game_state'),
 
     # Game actions
     path('games/<str:game_id>/play-card/', PlayCardView.as_view(), name='play_card'),
@@ -1,13 +1,39 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
 
 from backend.game.models import Game, GameState
 from backend.game.models.player import Player
+from backend.game.services.game_state_engine import get_game_state_engine
+from backend.game.services.game_view_cache import get_game_view_cache
+from backend.game.services.state_patches import get_state_patch_log
 from .notifications import GameNotifications
 
 
+def get_node_or_404(model, **filters):
+    """
+    Get a node by its properties, or raise Http404 if there is none
+
+    Args:
+        model: The node class
+        **filters: Property values to match
+
+    Returns:
+        The matching node
+    """
+    node = model.nodes.get_or_none(**filters)
+    if node is None:
+        raise Http404(f"No {model.__name__} matches the given query.")
+    return node
+
+
 class GameActionView(APIView):
     """Base view for game actions"""
 
@@ -23,23 +49,58 @@ class GameActionView(APIView):
             tuple: (game, player, game_state) or None if validation fails
         """
         # Get the game
-        game = get_object_or_404(Game, uid=game_id)
+        game = get_node_or_404(Game, uid=game_id)
 
         # Get the player
-        player = get_object_or_404(Player, user=request.user)
+        player = get_node_or_404(Player, uid=request.user.uid)
 
         # Check if player is in the game
-        if player.uid not in game.players:
+        if not game.players.is_connected(player):
             return Response(
                 {"error": "You are not a player in this game"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # Get the game state
-        game_state = game.state.get()
+        # Get the live game state
+        game_state = get_game_state_engine().get_state(game.uid, game.game_state.single)
 
         return game, player, game_state
 
+    def serialize_state(self, game, game_state, player):
+        """
+        Serialize the live state for a player without seeing a move half applied
+
+        Args:
+            game: The game
+            game_state: Its live state
+            player: The player whose hand is included
+
+        Returns:
+            dict: The serialized state
+        """
+        with get_game_state_engine().lock(game.uid):
+            return get_game_view_cache().state_view(game_state, player.uid)
+
+    @staticmethod
+    def cards_received(game_state, hand_sizes, exclude_player_id=None):
+        """
+        Find the cards a move appended to each player's hand
+
+        Args:
+            game_state: The state after the move
+            hand_sizes: Hand size per player before the move
+            exclude_player_id: Optional player to leave out, e.g. the mover
+
+        Returns:
+            dict: Player ID to the new cards, for players who received any
+        """
+        received = {}
+        for pid, state in game_state.player_states.items():
+            size = hand_sizes.get(pid, 0)
+            if pid != exclude_player_id and len(state["hand"]) > size:
+                received[pid] = list(state["hand"][size:])
+        return received
+
 
 class PlayCardView(GameActionView):
     """View for playing a card"""
@@ -81,21 +142,33 @@ class PlayCardView(GameActionView):
             )
 
         # Play the card
-        result = game_state.play_card(
-            player_id=player.uid,
-            card=card,
-            target_player_id=target_player_id,
-            chosen_suit=chosen_suit
-        )
+        with get_game_state_engine().lock(game.uid):
+            hand_sizes = {pid: len(state["hand"]) for pid, state in game_state.player_states.items()}
+            result = game_state.play_card(
+                player_id=player.uid,
+                card=card,
+                target_player_id=target_player_id,
+                chosen_suit=chosen_suit
+            )
+            patch = get_state_patch_log().record(game.uid, game_state) if result["success"] else None
+            cards_received = self.cards_received(game_state, hand_sizes, exclude_player_id=player.uid)
+
+        # Write the final state of a finished game straight away
+        if result["success"] and game_state.game_over:
+            get_game_state_engine().end_game(game.uid)
+            get_state_patch_log().forget(game.uid)
 
         # Return the result
         if result["success"]:
+            GameNotifications.send_state_patch(game.uid, patch)
+
             # Send notification
             GameNotifications.notify_card_played(
                 game_id=game.uid,
                 player_id=player.uid,
                 card=card,
-                effects=result.get("effects", {})
+                effects=result.get("effects", {}),
+                cards_received=cards_received
             )
 
             # If the turn changed, send a notification
@@ -106,7 +179,7 @@ class PlayCardView(GameActionView):
                 )
 
             # Get updated game state for the player
-            serialized_state = game_state.serialize(for_player_id=player.uid)
+            serialized_state = self.serialize_state(game, game_state, player)
             return Response({
                 "success": True,
                 "effects": result.get("effects", {}),
@@ -148,21 +221,27 @@ class DrawCardView(GameActionView):
             )
 
         # Draw a card
-        card = game_state.draw_card()
+        with get_game_state_engine().lock(game.uid):
+            card = game_state.draw_card()
+
+            if card:
+                # Add card to player's hand
+                game_state.player_states[player.uid]["hand"].append(card)
+                game_state.commit()
+                patch = get_state_patch_log().record(game.uid, game_state)
 
         if card:
-            # Add card to player's hand
-            game_state.player_states[player.uid]["hand"].append(card)
-            game_state.save()
+            GameNotifications.send_state_patch(game.uid, patch)
 
             # Send notification
             GameNotifications.notify_card_drawn(
                 game_id=game.uid,
-                player_id=player.uid
+                player_id=player.uid,
+                card=card
             )
 
             # Get updated game state for the player
-            serialized_state = game_state.serialize(for_player_id=player.uid)
+            serialized_state = self.serialize_state(game, game_state, player)
 
             return Response({
                 "success": True,
@@ -206,8 +285,12 @@ class AnnounceOneCardView(GameActionView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Set announced_one_card flag
-        game_state.player_states[player.uid]["announced_one_card"] = True
-        game_state.save()
+        with get_game_state_engine().lock(game.uid):
+            game_state.player_states[player.uid]["announced_one_card"] = True
+            game_state.commit()
+            patch = get_state_patch_log().record(game.uid, game_state)
+
+        GameNotifications.send_state_patch(game.uid, patch)
 
         # Send notification to other players
         GameNotifications.notify_one_card_announced(
@@ -222,7 +305,15 @@ class AnnounceOneCardView(GameActionView):
 
 
 class GetGameStateView(GameActionView):
-    """View for getting the current game state"""
+    """
+    View for getting the current game state
+
+    The response carries the state version as an ETag, so a request with a
+    matching If-None-Match is answered 304 without a body. With
+    ?wait_for_version=N the request is also answered 304 while the state is
+    still at version N or older; get_game_state parks such requests until
+    the state advances.
+    """
 
     def get(self, request, game_id):
         """
@@ -233,8 +324,18 @@ class GetGameStateView(GameActionView):
             game_id: The ID of the game
 
         Returns:
-            Response: The current game state
+            Response: The current game state, or 304 if the client has it
         """
+        wait_for_version = request.query_params.get("wait_for_version")
+        if wait_for_version is not None:
+            try:
+                wait_for_version = int(wait_for_version)
+            except ValueError:
+                return Response(
+                    {"error": "wait_for_version must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
         # Get game and validate player
         result = self.get_game_and_validate_player(request, game_id)
         if isinstance(result, Response):
@@ -242,10 +343,63 @@ class GetGameStateView(GameActionView):
 
         game, player, game_state = result
 
-        # Get serialized game state for the player
-        serialized_state = game_state.serialize(for_player_id=player.uid)
+        # Under the game lock so the view matches the version it is tagged with
+        with get_game_state_engine().lock(game.uid):
+            version = game_state.state_version or 0
+            etag = f'"{game_state.uid}-{version}"'
+            if_none_match = request.headers.get("If-None-Match", "")
+            unchanged = (
+                if_none_match.strip() == "*"
+                or etag in (tag.strip() for tag in if_none_match.split(","))
+                or (wait_for_version is not None and version <= wait_for_version)
+            )
 
-        return Response(serialized_state)
+            if unchanged:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                # Get serialized game state for the player
+                response = Response(self.serialize_state(game, game_state, player))
+
+        response["ETag"] = etag
+        response["X-Game-State-Version"] = str(version)
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+
+async def get_game_state(request, game_id):
+    """
+    Serve GetGameStateView, holding ?wait_for_version=N requests until the
+    state advances past N or GAME_STATE_LONG_POLL_TIMEOUT seconds pass.
+
+    The wait happens on the event loop, so a parked request holds no
+    thread. Commits of states owned by this process's engine wake it at
+    once; otherwise the state is checked again every
+    GAME_STATE_LONG_POLL_INTERVAL seconds.
+    """
+    view = sync_to_async(GetGameStateView.as_view())
+    if "wait_for_version" not in request.GET:
+        return await view(request, game_id=game_id)
+
+    engine = get_game_state_engine()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, "GAME_STATE_LONG_POLL_TIMEOUT", 25)
+    interval = getattr(settings, "GAME_STATE_LONG_POLL_INTERVAL", 1.0)
+
+    while True:
+        # Watch before checking so a commit in between still wakes us
+        event = engine.watch(game_id)
+        try:
+            response = await view(request, game_id=game_id)
+            remaining = deadline - loop.time()
+            if response.status_code != status.HTTP_304_NOT_MODIFIED or remaining <= 0:
+                return response
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, interval))
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            engine.unwatch(game_id, event)
 
 
 class CreateGameView(APIView):
@@ -371,15 +525,20 @@ class StartGameView(GameActionView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Initialize game state
-        game_state.initialize_game(game.players, game.rule_set.get())
-        game_state.save()
+        with get_game_state_engine().lock(game.uid):
+            game_state.initialize_game(game.players, game.rule_set.get())
+            game_state.commit()
+            patch = get_state_patch_log().record(game.uid, game_state)
+            hands = {pid: list(state["hand"]) for pid, state in game_state.player_states.items()}
 
         # Update game status
         game.status = "active"
         game.save()
+        get_game_view_cache().invalidate(f"game:{game.uid}")
 
         # Send notification
-        GameNotifications.notify_game_started(game.uid)
+        GameNotifications.notify_game_started(game.uid, hands=hands)
+        GameNotifications.send_state_patch(game.uid, patch)
 
         # Send turn notification
         GameNotifications.notify_turn_changed(
@@ -390,5 +549,5 @@ class StartGameView(GameActionView):
         return Response({
             "success": True,
             "message": "Game started successfully",
-            "game_state": game_state.serialize(for_player_id=player.uid)
+            "game_state": self.serialize_state(game, game_state, player)
         })
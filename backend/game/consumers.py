@@ -1,429 +1,360 @@
-import json
-from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from django.contrib.auth.models import User
-from .models import Game, Player, GamePlayer, PlayerGroup
-
-# Don't import User directly at module level
-# from django.contrib.auth.models import User
-
-class GameConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        self.user = self.scope["user"]
-        self.game_uid = self.scope['url_route']['kwargs'].get('game_uid')
-        self.group_uid = self.scope['url_route']['kwargs'].get('group_uid')
-        self.groups = []  # Track all groups this connection belongs to
-
-        # Always connect to the user's personal channel
-        self.user_group_name = f'user_{self.user.uid}'
-        await self.channel_layer.group_add(
-            self.user_group_name,
-            self.channel_name
-        )
-        self.groups.append(self.user_group_name)
-
-        # If connecting to a specific game, join that game's group too
-        if self.game_uid:
-            self.game_group_name = f'game_{self.game_uid}'
-            await self.channel_layer.group_add(
-                self.game_group_name,
-                self.channel_name
-            )
-            self.groups.append(self.game_group_name)
-
-            # Send initial game state
-            game_data = await self.get_game_data(self.game_uid)
-            if game_data:
-                await self.send(text_data=json.dumps({
-                    'type': 'game_state',
-                    'data': game_data
-                }))
-        # If connecting to a specific player group, join that group's channel
-        elif self.group_uid:
-            self.player_group_name = f'player_group_{self.group_uid}'
-            await self.channel_layer.group_add(
-                self.player_group_name,
-                self.channel_name
-            )
-            self.groups.append(self.player_group_name)
-
-            # Send initial group state
-            group_data = await self.get_player_group_data(self.group_uid)
-            if group_data:
-                await self.send(text_data=json.dumps({
-                    'type': 'player_group_state',
-                    'data': group_data
-                }))
-        else:
-            # If not connecting to a specific game or group, get all active games and groups for the user
-            active_games = await self.get_user_active_games()
-            player_groups = await self.get_user_groups()
-
-            # Send combined data
-            await self.send(text_data=json.dumps({
-                'type': 'user_state',
-                'data': {
-                    'active_games': active_games,
-                    'player_groups': player_groups
-                }
-            }))
-
-        await self.accept()
-
-    async def disconnect(self, close_code):
-        # Leave all groups
-        for group_name in self.groups:
-            await self.channel_layer.group_discard(
-                group_name,
-                self.channel_name
-            )
-
-    # Receive message from WebSocket
-    async def receive(self, text_data):
-        text_data_json = json.loads(text_data)
-        message_type = text_data_json.get('type')
-
-        if message_type == 'ping':
-            await self.send(text_data=json.dumps({
-                'type': 'pong'
-            }))
-        elif message_type == 'subscribe_game':
-            # Allow dynamic subscription to additional games
-            game_uid = text_data_json.get('game_uid')
-            if game_uid and f'game_{game_uid}' not in self.groups:
-                game_group_name = f'game_{game_uid}'
-                await self.channel_layer.group_add(
-                    game_group_name,
-                    self.channel_name
-                )
-                self.groups.append(game_group_name)
-
-                # Send initial game state for the newly subscribed game
-                game_data = await self.get_game_data(game_uid)
-                if game_data:
-                    await self.send(text_data=json.dumps({
-                        'type': 'game_state',
-                        'data': game_data
-                    }))
-        elif message_type == 'unsubscribe_game':
-            # Allow unsubscribing from games to reduce connection load
-            game_uid = text_data_json.get('game_uid')
-            game_group_name = f'game_{game_uid}'
-            if game_group_name in self.groups:
-                await self.channel_layer.group_discard(
-                    game_group_name,
-                    self.channel_name
-                )
-                self.groups.remove(game_group_name)
-        elif message_type == 'subscribe_player_group':
-            # Allow dynamic subscription to player groups
-            group_uid = text_data_json.get('group_uid')
-            if group_uid and f'player_group_{group_uid}' not in self.groups:
-                player_group_name = f'player_group_{group_uid}'
-                await self.channel_layer.group_add(
-                    player_group_name,
-                    self.channel_name
-                )
-                self.groups.append(player_group_name)
-
-                # Send initial group state
-                group_data = await self.get_player_group_data(group_uid)
-                if group_data:
-                    await self.send(text_data=json.dumps({
-                        'type': 'player_group_state',
-                        'data': group_data
-                    }))
-        elif message_type == 'unsubscribe_player_group':
-            # Allow unsubscribing from player groups
-            group_uid = text_data_json.get('group_uid')
-            player_group_name = f'player_group_{group_uid}'
-            if player_group_name in self.groups:
-                await self.channel_layer.group_discard(
-                    player_group_name,
-                    self.channel_name
-                )
-                self.groups.remove(player_group_name)
-
-    # Receive message from room group
-    async def game_update(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'game_update',
-            'data': event['data']
-        }))
+"""
+WebSocket consumer for real-time game and player group events.
 
-    async def game_invitation(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'game_invitation',
-            'data': event['data']
-        }))
+One consumer serves every WebSocket route. A socket belongs to a player
+and can follow any number of games and player groups, so a client needs a
+single connection:
 
-    async def invitation_response(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'invitation_response',
-            'data': event['data']
-        }))
+- /ws/user/ starts with the player's active games and groups
+- /ws/game/<game_uid>/ and /ws/games/<game_id>/ start subscribed to a game
+- /ws/group/<group_uid>/ starts subscribed to a player group
 
-    async def player_joined(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'player_joined',
-            'data': event['data']
-        }))
+Client messages and the channel layer events passed straight on to the
+client are routed through the tables on the class. Reads go to Neo4j on the
+async driver, so they do not hop through the sync thread pool. Broadcast
+events arrive with their client frame already encoded (frame), which is
+sent as it is, so a broadcast is encoded once however many sockets get it.
+"""
 
-    async def player_left(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'player_left',
-            'data': event['data']
-        }))
+import json
+import logging
 
-    async def game_started(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'game_started',
-            'data': event['data']
-        }))
-
-    async def batch_update(self, event):
-        """Handle batched updates to reduce message overhead"""
-        # Send all updates in a single message
-        await self.send(text_data=json.dumps({
-            'type': 'batch_update',
-            'updates': event['updates']
-        }))
-
-    # Group-related message handlers
-    async def group_invitation(self, event):
-        """Handle group invitation notifications"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_invitation',
-            'data': event['data']
-        }))
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
 
-    async def group_invitation_response(self, event):
-        """Handle group invitation response notifications"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_invitation_response',
-            'data': event['data']
-        }))
+from backend.card_game.json_codec import dumps
+from backend.card_game.notification_dispatch import BatchUpdateConsumerMixin
+from backend.card_game.query_stats import QueryStatsConsumerMixin
+from .models import Game
+from .services.game_service_utils import afetch_game_detail, afetch_player_group, afetch_player_overview
+from .services.game_state_engine import get_game_state_engine
+from .services.game_view_cache import get_game_view_cache
+from .services.state_patches import get_state_patch_log, patch_for_player
+
+logger = logging.getLogger(__name__)
+
+
+class GameConsumer(QueryStatsConsumerMixin, BatchUpdateConsumerMixin, AsyncWebsocketConsumer):
+    """
+    WebSocket consumer for game events.
+    Handles real-time communication for the games and groups a player follows.
+    """
+
+    # Client message type -> method handling it
+    CLIENT_MESSAGES = {
+        'ping': 'receive_ping',
+        'subscribe_game': 'subscribe_game',
+        'unsubscribe_game': 'unsubscribe_game',
+        'sync_state': 'receive_sync_state',
+        'subscribe_player_group': 'subscribe_player_group',
+        'unsubscribe_player_group': 'unsubscribe_player_group',
+    }
+
+    # Channel layer events sent on to the client as {'type': ..., 'data': ...}
+    FORWARDED_EVENTS = frozenset({
+        'game_update',
+        'game_invitation',
+        'invitation_response',
+        'player_joined',
+        'player_left',
+        'game_started',
+        'group_invitation',
+        'group_invitation_response',
+        'group_member_joined',
+        'group_member_removed',
+        'group_member_left',
+        'group_removed_from',
+        'group_deleted',
+        'group_game_invitation',
+    })
 
-    async def group_member_joined(self, event):
-        """Handle notifications when a new member joins a group"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_member_joined',
-            'data': event['data']
-        }))
+    async def connect(self):
+        """
+        Handle WebSocket connection.
+        Authenticate the player, join their personal groups and send the
+        initial state for the route.
+        """
+        self.user = self.scope.get('user')
+        self.state_versions = {}  # State version the client holds, per game
+
+        self.player_id = self.authenticate()
+        if self.player_id is None:
+            await self.close()
+            return
 
-    async def group_member_removed(self, event):
-        """Handle notifications when a member is removed from a group"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_member_removed',
-            'data': event['data']
-        }))
+        await self.accept()
 
-    async def group_member_left(self, event):
-        """Handle notifications when a member leaves a group"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_member_left',
-            'data': event['data']
-        }))
+        # Personal channels: GameService notifies user_<uid>, GameNotifications player_<uid>
+        await self.join_group(f'user_{self.player_id}')
+        await self.join_group(f'player_{self.player_id}')
+
+        kwargs = self.scope['url_route']['kwargs']
+        game_uid = kwargs.get('game_uid') or kwargs.get('game_id')
+        group_uid = kwargs.get('group_uid')
+
+        if kwargs.get('game_id'):
+            await self.send_event({
+                'type': 'connection_established',
+                'game_id': game_uid,
+                'player_id': self.player_id
+            })
+
+        if game_uid:
+            await self.subscribe_game({'game_uid': game_uid})
+        elif group_uid:
+            await self.subscribe_player_group({'group_uid': group_uid})
+        else:
+            # Not connecting to a specific game or group: send all active games and groups
+            await self.send_event({
+                'type': 'user_state',
+                'data': await self.get_user_state()
+            })
+
+    def authenticate(self):
+        """
+        Get the player behind the connection. TokenAuthMiddleware has
+        already validated the token and put the player in the scope.
+
+        Returns:
+            str: The player's uid, or None
+        """
+        player_id = self.scope.get('player_id')
+        if player_id:
+            return player_id
+
+        user = self.scope.get('user')
+        if getattr(user, 'is_authenticated', False):
+            return getattr(user, 'uid', None)
+        return None
+
+    async def join_group(self, group_name):
+        """Add the socket to a channel layer group, left again on disconnect"""
+        if group_name not in self.groups:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+            self.groups.append(group_name)
+
+    async def leave_group(self, group_name):
+        """Remove the socket from a channel layer group"""
+        if group_name in self.groups:
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+            self.groups.remove(group_name)
+
+    async def send_event(self, payload):
+        """Encode a message for the client and send it"""
+        await self.send(text_data=dumps(payload))
+
+    # Client messages
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """
+        Handle incoming WebSocket messages.
+
+        Args:
+            text_data: The message data
+        """
+        try:
+            message = json.loads(text_data)
+        except (TypeError, json.JSONDecodeError):
+            logger.error("Received invalid JSON data")
+            return
+
+        handler_name = self.CLIENT_MESSAGES.get(message.get('type'))
+        if handler_name is None:
+            logger.warning(f"Received unknown message type: {message.get('type')}")
+            return
+
+        await getattr(self, handler_name)(message)
+
+    async def receive_ping(self, message):
+        await self.send_event({'type': 'pong'})
+
+    async def subscribe_game(self, message):
+        """Follow a game and send its current state"""
+        game_uid = message.get('game_uid')
+        if not game_uid or f'game_{game_uid}' in self.groups:
+            return
+
+        await self.join_group(f'game_{game_uid}')
+
+        game_data = await self.get_game_data(game_uid)
+        if game_data:
+            await self.send_event({
+                'type': 'game_state',
+                'data': game_data
+            })
+        await self.send_state_snapshot(game_uid)
+
+    async def unsubscribe_game(self, message):
+        """Stop following a game"""
+        game_uid = message.get('game_uid')
+        await self.leave_group(f'game_{game_uid}')
+        self.state_versions.pop(game_uid, None)
+
+    async def receive_sync_state(self, message):
+        """Client noticed a gap in the patches it received"""
+        game_uid = message.get('game_uid')
+        if f'game_{game_uid}' in self.groups:
+            await self.sync_state(game_uid, message.get('version'))
+
+    async def subscribe_player_group(self, message):
+        """Follow a player group and send its current state"""
+        group_uid = message.get('group_uid')
+        if not group_uid or f'player_group_{group_uid}' in self.groups:
+            return
+
+        await self.join_group(f'player_group_{group_uid}')
+
+        group_data = await self.get_player_group_data(group_uid)
+        if group_data:
+            await self.send_event({
+                'type': 'player_group_state',
+                'data': group_data
+            })
+
+    async def unsubscribe_player_group(self, message):
+        """Stop following a player group"""
+        await self.leave_group(f'player_group_{message.get("group_uid")}')
+
+    # Channel layer events
+
+    async def dispatch(self, message):
+        if message['type'] in self.FORWARDED_EVENTS:
+            await self.forward_event(message)
+        else:
+            await super().dispatch(message)
 
-    async def group_removed_from(self, event):
-        """Handle notifications when the user is removed from a group"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_removed_from',
-            'data': event['data']
-        }))
+    def event_handler(self, message):
+        if message.get('type') in self.FORWARDED_EVENTS:
+            return self.forward_event
+        return super().event_handler(message)
 
-    async def group_deleted(self, event):
-        """Handle notifications when a group is deleted"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_deleted',
-            'data': event['data']
-        }))
+    async def forward_event(self, event):
+        """Send a channel layer event on to the client unchanged"""
+        if 'frame' in event:
+            await self.send(text_data=event['frame'])
+            return
 
-    async def group_game_invitation(self, event):
-        """Handle notifications when a group is invited to a game"""
-        await self.send(text_data=json.dumps({
-            'type': 'group_game_invitation',
+        await self.send_event({
+            'type': event['type'],
             'data': event['data']
-        }))
-
-    @database_sync_to_async
-    def get_user_active_games(self):
-        """Get all active games for the current user"""
+        })
+
+    async def game_notification(self, event):
+        """
+        Handle game notification events.
+
+        Args:
+            event: The event data
+        """
+        # Check if this notification should exclude this player
+        exclude_player_id = event.get('exclude_player_id')
+        if exclude_player_id and exclude_player_id == self.player_id:
+            return
+
+        # Players with a private overlay get the event on their own group instead
+        if self.player_id in event.get('exclude_player_ids', ()):
+            return
+
+        if 'frame' in event:
+            await self.send(text_data=event['frame'])
+            return
+
+        message = {
+            'type': event.get('event_type'),
+            'data': event.get('data', {})
+        }
+        if 'private' in event:
+            message['private'] = event['private']
+
+        await self.send_event(message)
+
+    async def state_patch(self, event):
+        """Forward a state patch, or resync a client that missed earlier ones"""
+        game_uid = event['game_uid']
+        version = self.state_versions.get(game_uid)
+        if version is not None and event['version'] <= version:
+            return
+
+        if version is not None and event['from_version'] == version:
+            self.state_versions[game_uid] = event['version']
+            if 'frame' in event and self.player_id not in event['hands']:
+                await self.send(text_data=event['frame'])
+            else:
+                await self.send_event(patch_for_player(event, self.player_id))
+        else:
+            await self.sync_state(game_uid, version)
+
+    async def sync_state(self, game_uid, version):
+        """
+        Bring a client's state up to date, with the missed patches when few
+        enough are kept and a fresh snapshot otherwise
+        """
+        patches = get_state_patch_log().since(game_uid, version) if isinstance(version, int) else None
+        if patches is None:
+            await self.send_state_snapshot(game_uid)
+            return
+
+        for patch in patches:
+            self.state_versions[game_uid] = patch['version']
+            await self.send_event(patch_for_player(patch, self.player_id))
+
+    async def send_state_snapshot(self, game_uid):
+        """Send the versioned state of a game that later patches apply to"""
+        snapshot = await self.get_state_snapshot(game_uid)
+        if snapshot:
+            self.state_versions[game_uid] = snapshot['version']
+            await self.send_event({
+                'type': 'state_snapshot',
+                **snapshot
+            })
+
+    # Data access
+
+    async def get_user_state(self):
+        """Get the player's active games and groups"""
         try:
-            player = Player.nodes.get(uid=self.user.uid)
-            games = player.games.filter(status__in=['waiting', 'in_progress'])
-
-            return [
-                {
-                    "game_uid": game.game_uid,
-                    "status": game.status,
-                    "game_type": game.game_type
-                }
-                for game in games
-            ]
+            return await afetch_player_overview(self.player_id)
         except Exception as e:
-            print(f"Error getting user active games: {str(e)}")
-            return []
+            logger.error(f"Error getting user state: {str(e)}")
+            return {'active_games': [], 'player_groups': []}
 
-    @database_sync_to_async
-    def get_user_groups(self):
-        """Get all groups the user is a member of"""
+    async def get_game_data(self, game_uid):
+        """Get a game's detail payload"""
         try:
-            player = Player.nodes.get(uid=self.user.uid)
-            groups = player.member_of_groups.all()
-
-            return [
-                {
-                    "group_uid": group.group_uid,
-                    "name": group.name,
-                    "is_owner": group.owner.is_connected(player),
-                    "member_count": len(list(group.members.all()))
-                }
-                for group in groups
-            ]
+            return await get_game_view_cache().agame_detail(game_uid, lambda: afetch_game_detail(game_uid))
         except Exception as e:
-            print(f"Error getting user groups: {str(e)}")
-            return []
+            logger.error(f"Error getting game data: {str(e)}")
+            return None
 
-    @database_sync_to_async
-    def get_player_group_data(self, group_uid):
-        """Get detailed data for a player group"""
+    async def get_player_group_data(self, group_uid):
+        """Get detailed data for a player group the player belongs to"""
         try:
-            group = PlayerGroup.nodes.get(uid=group_uid)
-            player = Player.nodes.get(uid=self.user.uid)
-
-            # Check if user is a member
-            if not group.members.is_connected(player):
-                return None
-
-            # Get all members
-            members = []
-            for member in group.members.all():
-                members.append({
-                    "user_uid": member.uid,
-                    "username": member.username,
-                    "display_name": member.display_name,
-                    "is_owner": group.owner.is_connected(member)
-                })
-
-            # Get active games the group is participating in
-            active_games = []
-            for game in group.games.filter(status__in=['waiting', 'in_progress']):
-                active_games.append({
-                    "game_uid": game.game_uid,
-                    "game_type": game.game_type,
-                    "status": game.status
-                })
-
-            return {
-                "group_uid": group.uid,
-                "name": group.name,
-                "description": group.description,
-                "is_public": group.is_public,
-                "created_at": group.created_at.isoformat() if group.created_at else None,
-                "is_owner": group.owner.is_connected(player),
-                "members": members,
-                "active_games": active_games
-            }
+            return await afetch_player_group(group_uid, self.player_id)
         except Exception as e:
-            print(f"Error getting player group data: {str(e)}")
+            logger.error(f"Error getting player group data: {str(e)}")
             return None
 
     @database_sync_to_async
-    def get_game_data(self, game_uid):
+    def get_state_snapshot(self, game_uid):
+        """
+        Get the player's view of a game's live state with its version. The
+        live state belongs to the game state engine, whose locks are taken
+        off the event loop.
+        """
         try:
-            game = Game.nodes.get(game_uid=game_uid)
-
-            # Format the response
-            players = []
-            for p in game.players.all():
-                # Find the GamePlayer for this player
-                game_player = None
-                for gp in p.game_players.all():
-                    try:
-                        if gp.game.get().game_uid == game.game_uid:
-                            game_player = gp
-                            break
-                    except:
-                        continue
-
-                player_data = {
-                    "user_uid": p.user_uid,
-                    "username": p.username,
-                    "display_name": p.display_name,
-                    "status": game_player.status if game_player else "unknown"
+            engine = get_game_state_engine()
+            state = engine.get_state(game_uid, lambda: Game.nodes.get(uid=game_uid).game_state.single())
+            if state is None:
+                return None
+
+            with engine.lock(game_uid):
+                return {
+                    "game_uid": game_uid,
+                    "version": state.state_version or 0,
+                    "data": get_game_view_cache().state_view(state, self.player_id)
                 }
-                players.append(player_data)
-
-            # Add AI players
-            for gp in game.game_players.all():
-                if gp.is_ai:
-                    ai_player = {
-                        "is_ai": True,
-                        "ai_difficulty": gp.ai_difficulty,
-                        "status": gp.status
-                    }
-                    players.append(ai_player)
-
-            current_player = None
-            if game.current_player.all():
-                current_player = game.current_player.get().user_uid
-
-            winner = None
-            if game.winner.all():
-                winner = game.winner.get().user_uid
-
-            creator = None
-            if game.creator.all():
-                creator = game.creator.get().user_uid
-
-            # Get invited groups
-            invited_groups = []
-            for group in game.invited_groups.all():
-                invited_groups.append({
-                    "group_uid": group.uid,
-                    "name": group.name
-                })
-
-            game_data = {
-                "game_uid": game.uid,
-                "game_type": game.game_type,
-                "max_players": game.max_players,
-                "time_limit": game.time_limit,
-                "use_ai": game.use_ai,
-                "status": game.status,
-                "current_turn": game.current_turn,
-                "created_at": game.created_at.isoformat() if game.created_at else None,
-                "started_at": game.started_at.isoformat() if game.started_at else None,
-                "ended_at": game.ended_at.isoformat() if game.ended_at else None,
-                "completed_at": game.completed_at.isoformat() if game.completed_at else None,
-                "players": players,
-                "creator": creator,
-                "current_player": current_player,
-                "winner": winner,
-                "rule_version": game.rule_version,
-                "is_tournament": game.is_tournament,
-                "tournament_round": game.tournament_round,
-                "invited_groups": invited_groups
-            }
-
-            return game_data
         except Game.DoesNotExist:
             return None
         except Exception as e:
-            print(f"Error getting game data: {str(e)}")
-            return None
-
-    # Use lazy imports for Django models when needed
-    @database_sync_to_async
-    def get_user(self, uid):
-        try:
-            return User.objects.get(uid=uid)
-        except User.DoesNotExist:
+            logger.error(f"Error getting game state snapshot: {str(e)}")
             return None
@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand
+from game.services.simulator import simulate, RULE_SETS, DEFAULT_MAX_TURNS
+
+class Command(BaseCommand):
+    help = 'Plays many games of a rule set in memory and reports throughput and rule coverage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=str, default='idiot', choices=sorted(RULE_SETS), help='Rule set to simulate')
+        parser.add_argument('--games', type=int, default=1000, help='Number of games')
+        parser.add_argument('--players', type=int, default=4, help='Players per game')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the first game')
+        parser.add_argument('--max-turns', type=int, default=DEFAULT_MAX_TURNS, help='Turns before a game is abandoned')
+
+    def handle(self, *args, **options):
+        report = simulate(
+            rule_set_name=options['rules'],
+            games=options['games'],
+            num_players=options['players'],
+            workers=options['workers'],
+            seed=options['seed'],
+            max_turns=options['max_turns']
+        )
+        self.stdout.write(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Simulated {report['games']} games at {report['games_per_second']} games/sec"
+        ))
@@ -10,6 +10,7 @@ from backend.game.models.game_player import GamePlayer
 from backend.game.models.player_group import PlayerGroup
 from backend.game.models.player_group_invitation import PlayerGroupInvitation
 from backend.game.models.game_state import GameState
+from backend.game.models.game_state_delta import GameStateDelta
 
 __all__ = [
     'GameBaseModel',
@@ -22,6 +23,7 @@ __all__ = [
     'GameAction',
     'GamePlayer',
     'GameState',
+    'GameStateDelta',
     'PlayerGroup',
     'PlayerGroupInvitation',
 ]
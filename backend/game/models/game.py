@@ -45,3 +45,4 @@ class Game(GameBaseModel):
     participating_groups = RelationshipFrom('backend.game.models.player_group.PlayerGroup', 'PARTICIPATED_IN')
     parent_tournament = RelationshipTo('backend.game.models.game.Game', 'PART_OF_TOURNAMENT', cardinality=ZeroOrOne)
     tournament_games = RelationshipFrom('backend.game.models.game.Game', 'PART_OF_TOURNAMENT')
+    game_state = RelationshipFrom('backend.game.models.game_state.GameState', 'STATE_OF', cardinality=ZeroOrOne)
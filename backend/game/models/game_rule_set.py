@@ -30,7 +30,12 @@ class GameRuleSet(GameBaseModel):
             existing = self.__class__.nodes.filter(name=self.name, uid__ne=self.uid)
             if existing and len(existing) > 0:
                 raise ValueError(f"A rule set with name '{self.name}' already exists")
-        return super().save()
+        result = super().save()
+
+        # Games pick up the new parameters on their next move
+        from backend.game.services.rule_interpreter.compiled_rule_set import invalidate_compiled_rule_set
+        invalidate_compiled_rule_set(self.uid)
+        return result
 
     @classmethod
     def create_action_card_game(cls, name, description, card_actions, targeting_rules,
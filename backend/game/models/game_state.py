@@ -1,7 +1,43 @@
+import copy
+import json
+from collections import deque
+from datetime import datetime
+
+from django.conf import settings
 from neomodel import (
-    StringProperty, ArrayProperty, JSONProperty, RelationshipTo, BooleanProperty
+    StringProperty, ArrayProperty, JSONProperty, RelationshipTo, BooleanProperty, IntegerProperty,
+    RelationshipManager
 )
+from neomodel.properties import validator
 from backend.game.models.base import GameBaseModel
+from backend.game.models.game_state_delta import (
+    capture_properties, diff_properties, apply_ops, load_deltas, save_state_writes, compact_deltas
+)
+
+class DrawPileProperty(JSONProperty):
+    """JSON list stored as before, held in memory as a deque so draws from the top are O(1)"""
+
+    @validator
+    def inflate(self, value):
+        return deque(json.loads(value))
+
+    @validator
+    def deflate(self, value):
+        return json.dumps(list(value))
+
+
+class PlayerState(dict):
+    """Entry of player_states, also usable as a player object with an id"""
+
+    @property
+    def id(self):
+        return self["id"]
+
+
+def delta_persistence_enabled():
+    """Check whether game states are persisted as deltas between snapshots"""
+    return getattr(settings, "GAME_STATE_PERSISTENCE", "snapshot") == "delta"
+
 
 class GameState(GameBaseModel):
     """Model to store the current state of a game"""
@@ -10,24 +46,192 @@ class GameState(GameBaseModel):
     direction = StringProperty(default="clockwise")
     skipped_players = ArrayProperty(StringProperty())
     discard_pile = JSONProperty(default=[])
-    draw_pile = JSONProperty(default=[])
+    draw_pile = DrawPileProperty(default=[])
     player_states = JSONProperty(default={})
     game_over = BooleanProperty(default=False)
     winner_id = StringProperty()
     current_suit = StringProperty()  # For tracking chosen suit from Jack
+    rule_set_uid = StringProperty()  # With rule_set_version, looks up the compiled rule set without traversing to it
+    rule_set_version = StringProperty()
+    snapshot_seq = IntegerProperty(default=0)  # Last delta folded into the stored properties
+    state_version = IntegerProperty(default=0)  # Bumped by every commit, keys the cached views
 
     # Relationships
     game = RelationshipTo('backend.game.models.game.Game', 'STATE_OF')
 
+    # Set by the GameStateEngine when it owns this state
+    _write_behind = None
+
+    # Delta persistence bookkeeping: last recorded seq and the properties as persisted
+    _delta_seq = 0
+    _baseline = None
+
+    @classmethod
+    def inflate(cls, node):
+        """Inflate a stored state, replaying any deltas recorded since its snapshot"""
+        state = super().inflate(node)
+        if delta_persistence_enabled():
+            state.restore()
+        return state
+
     @property
     def current_player(self):
         """Get the current player object"""
-        return self.player_states.get(self.current_player_uid, {})
+        return self.get_player_state(self.current_player_uid) or {}
 
     @property
     def players(self):
         """Get all player objects"""
-        return [self.player_states[pid] for pid in self.player_states]
+        return [self.get_player_state(pid) for pid in self.player_states]
+
+    def get_player_state(self, player_id):
+        """Get a player's state, converted in place so the interpreter can read its id"""
+        player_state = self.player_states.get(player_id)
+        if type(player_state) is dict:
+            player_state = self.player_states[player_id] = PlayerState(player_state)
+        return player_state
+
+    def save(self, *args, **kwargs):
+        """Save the full state, folding any recorded deltas into the snapshot"""
+        self.snapshot_seq = self._delta_seq
+        super().save(*args, **kwargs)
+
+        if delta_persistence_enabled():
+            if self._delta_seq:
+                compact_deltas([{"uid": self.uid, "seq": self._delta_seq}])
+            self._baseline = capture_properties(self)
+        return self
+
+    def commit(self, unit=None):
+        """
+        Persist the state, deferring to the write-behind engine when it owns this state
+
+        Args:
+            unit (UnitOfWork): Write the state with the rest of a move's writes.
+                An engine-owned state is written there too, along with any of its
+                changes not flushed yet, and counts as flushed once the unit commits.
+                The state only takes its new version, and drops its cached views,
+                once the unit commits
+        """
+        version = (self.state_version or 0) + 1
+        engine = self._write_behind
+        if unit is not None and hasattr(self, "element_id_property"):
+            # The write carries the new version, which the live state takes on with the commit
+            previous, self.state_version = self.state_version, version
+            try:
+                unit.write_state(self)
+            finally:
+                self.state_version = previous
+            unit.on_commit(lambda: self._bump_version(version))
+            if engine is not None:
+                unit.on_commit(lambda: engine.mark_written(self))
+        elif engine is not None and unit is not None:
+            unit.on_commit(lambda: self._bump_version(version))
+            unit.on_commit(lambda: engine.mark_dirty(self))
+        else:
+            self._bump_version(version)
+            if engine is not None:
+                engine.mark_dirty(self)
+            else:
+                self.persist()
+
+    def _bump_version(self, version):
+        """Move to a committed version, dropping the views cached for the previous one"""
+        from backend.game.services.game_view_cache import get_game_view_cache
+
+        self.state_version = version
+        get_game_view_cache().invalidate(f"state:{self.uid}", version)
+
+    def checkpoint(self):
+        """
+        Copy the live state before a move changes it in place
+
+        Returns:
+            dict: Checkpoint for rollback
+        """
+        return {
+            name: copy.deepcopy(value) for name, value in vars(self).items()
+            if not name.startswith("_") and not isinstance(value, RelationshipManager)
+        }
+
+    def rollback(self, checkpoint):
+        """
+        Undo the changes made since a checkpoint, e.g. when a move's writes fail
+
+        Args:
+            checkpoint (dict): Taken by checkpoint()
+        """
+        for name, value in list(vars(self).items()):
+            if name not in checkpoint and not name.startswith("_") and not isinstance(value, RelationshipManager):
+                delattr(self, name)
+        for name, value in checkpoint.items():
+            setattr(self, name, value)
+
+    def persist(self):
+        """Write the state now, as a delta when delta persistence is enabled"""
+        if not hasattr(self, "element_id_property") or self._baseline is None:
+            self.save()
+            return
+
+        write = self.prepare_write()
+        if write is not None:
+            save_state_writes([write])
+            self.write_applied(write)
+
+    def prepare_write(self):
+        """
+        Build the pending write for this state without touching the database
+
+        Returns:
+            dict: Write for save_state_writes, or None if nothing changed
+        """
+        if self._baseline is None:
+            self.updated_at = datetime.now()
+            return {
+                "uid": self.uid,
+                "seq": self._delta_seq,
+                "props": self.deflate(self.__properties__, self),
+                "ops": None
+            }
+
+        current = capture_properties(self)
+        ops = diff_properties(self._baseline, current)
+        if not ops:
+            return None
+
+        seq = self._delta_seq + 1
+        encoded = json.dumps(ops, separators=(",", ":"))
+        interval = getattr(settings, "GAME_STATE_SNAPSHOT_INTERVAL", 50)
+
+        # Compact into a snapshot every interval deltas, or when the delta is no smaller
+        if seq - self.snapshot_seq >= interval or len(encoded) >= len(json.dumps(current)):
+            self.updated_at = datetime.now()
+            self.snapshot_seq = seq
+            props = self.deflate(self.__properties__, self)
+            encoded = None
+        else:
+            props = None
+
+        return {"uid": self.uid, "seq": seq, "props": props, "ops": encoded, "baseline": current}
+
+    def write_applied(self, write):
+        """Record that a write from prepare_write has been persisted"""
+        self._delta_seq = write["seq"]
+        if delta_persistence_enabled():
+            self._baseline = write.get("baseline") or capture_properties(self)
+
+    def restore(self):
+        """Replay the deltas recorded since the stored snapshot"""
+        values = capture_properties(self)
+        self._delta_seq = self.snapshot_seq or 0
+
+        for seq, ops in load_deltas(self.uid, self._delta_seq):
+            apply_ops(values, ops)
+            self._delta_seq = seq
+
+        for name, value in values.items():
+            setattr(self, name, value)
+        self._baseline = capture_properties(self)
 
     def draw_card(self):
         """Draw a card from the draw pile"""
@@ -39,7 +243,11 @@ class GameState(GameBaseModel):
         if not self.draw_pile:
             return None
 
-        return self.draw_pile.pop(0)
+        # Piles assigned as plain lists are converted once so every draw is O(1)
+        if not isinstance(self.draw_pile, deque):
+            self.draw_pile = deque(self.draw_pile)
+
+        return self.draw_pile.popleft()
 
     def play_card(self, player_id, card, target_player_id=None, chosen_suit=None):
         """
@@ -86,7 +294,7 @@ class GameState(GameBaseModel):
         if "next_player_set" not in effects:
             self._update_next_player()
 
-        self.save()
+        self.commit()
         return {"success": True, "effects": effects}
 
     def _can_play_card(self, card):
@@ -111,13 +319,8 @@ class GameState(GameBaseModel):
 
     def _apply_card_effects(self, card, player_id, target_player_id=None, chosen_suit=None):
         """Apply effects of the played card"""
-        # Get rule set to determine card actions
-        rule_set = self.game.get().rule_set.get()
-        card_key = f"{card['suit'].lower()}_{card['value']}"
-
-        # Get card action from rule set
-        card_actions = rule_set.parameters.get("card_actions", {})
-        action = card_actions.get(card_key, {})
+        # Get card action from the compiled rule set
+        action = self._compiled_rules().action_for(card["suit"], card["value"]) or {}
 
         effects = {"action_type": action.get("action_type")}
 
@@ -155,6 +358,21 @@ class GameState(GameBaseModel):
 
         return effects
 
+    def _compiled_rules(self):
+        """Get the compiled rule set of the game, only traversing to it when it isn't cached"""
+        from backend.game.services.rule_interpreter.compiled_rule_set import (
+            get_cached_rule_set, get_compiled_rule_set
+        )
+
+        compiled = get_cached_rule_set(self.rule_set_uid, self.rule_set_version)
+        if compiled is None:
+            rule_set = self.game.get().rule_set.get()
+            compiled = get_compiled_rule_set(rule_set)
+            if get_cached_rule_set(getattr(rule_set, "uid", None), compiled.version) is compiled:
+                self.rule_set_uid = rule_set.uid
+                self.rule_set_version = compiled.version
+        return compiled
+
     def _update_next_player(self):
         """Update the next player based on current direction and skipped players"""
         players = list(self.player_states.keys()) if self.player_states else []
@@ -208,6 +426,10 @@ class GameState(GameBaseModel):
                 "penalties": 0
             }
 
+        if isinstance(getattr(rule_set, "uid", None), str) and isinstance(rule_set.version, str):
+            self.rule_set_uid = rule_set.uid
+            self.rule_set_version = rule_set.version
+
         # Initialize deck based on rule set
         self._initialize_deck(rule_set)
 
@@ -396,7 +618,8 @@ class GameState(GameBaseModel):
         self.game_over = False
         winner_id = self.winner_id  # Store temporarily to set first player
         self.winner_id = None
-        self.direction = self.game.get().rule_set.get().parameters.get("turn_flow", {}).get("initial_direction", "clockwise")
+        compiled = self._compiled_rules()
+        self.direction = compiled.initial_direction
         self.skipped_players = []
         self.current_suit = None
 
@@ -409,10 +632,10 @@ class GameState(GameBaseModel):
             }
 
         # Reinitialize deck
-        self._initialize_deck(self.game.get().rule_set.get())
+        self._initialize_deck(compiled.rule_set)
 
         # Deal cards
-        self._deal_initial_cards(self.game.get().rule_set.get())
+        self._deal_initial_cards(compiled.rule_set)
 
         # Set first player (winner of last round goes first)
         if winner_id and winner_id in player_ids:
@@ -433,4 +656,4 @@ class GameState(GameBaseModel):
         else:
             self.next_player_uid = None
 
-        self.save()
+        self.commit()
@@ -0,0 +1,239 @@
+import json
+
+from neomodel import StructuredNode, StringProperty, IntegerProperty, JSONProperty, db
+
+# GameState properties that are recorded as deltas between snapshots
+TRACKED_PROPERTIES = (
+    "current_player_uid",
+    "next_player_uid",
+    "direction",
+    "skipped_players",
+    "discard_pile",
+    "draw_pile",
+    "player_states",
+    "game_over",
+    "winner_id",
+    "current_suit",
+    "rule_set_uid",
+    "rule_set_version",
+    "state_version",
+)
+
+
+class GameStateDelta(StructuredNode):
+    """
+    Append-only record of the changes made to a GameState by one commit.
+
+    Deltas with a seq greater than the state's snapshot_seq are replayed on
+    top of the stored snapshot when the state is loaded.
+    """
+    state_uid = StringProperty(index=True)
+    seq = IntegerProperty()
+    ops = JSONProperty()
+
+
+def capture_properties(state):
+    """
+    Take a detached copy of the tracked properties of a state.
+
+    Args:
+        state: The GameState to copy
+
+    Returns:
+        dict: Deep copy of the tracked properties
+    """
+    values = {name: getattr(state, name, None) for name in TRACKED_PROPERTIES}
+    return json.loads(json.dumps(values, default=list))
+
+
+def diff_properties(old, new):
+    """
+    Compute the operations turning one set of tracked properties into another.
+
+    Operations are compact lists:
+        ["s", path, value]                    set the value at path
+        ["d", path]                           delete the key at path
+        ["l", path, removed_indices, added]   drop items from a list and append others
+
+    Args:
+        old: Properties as last persisted
+        new: Current properties
+
+    Returns:
+        list: The operations, empty if nothing changed
+    """
+    ops = []
+    _diff_value(old, new, [], ops)
+    return ops
+
+
+def _diff_value(old, new, path, ops):
+    """Append the operations turning old into new at path."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        common = [key for key in old if key in new]
+        # Player order is turn order, so a reordering is written in full
+        if path and common != [key for key in new if key in old]:
+            ops.append(["s", path, new])
+            return
+        for key in old:
+            if key not in new:
+                ops.append(["d", path + [key]])
+        for key, value in new.items():
+            if key in old:
+                _diff_value(old[key], value, path + [key], ops)
+            else:
+                ops.append(["s", path + [key], value])
+    elif isinstance(old, list) and isinstance(new, list):
+        if old != new:
+            ops.append(_diff_list(old, new, path))
+    elif old != new or type(old) is not type(new):
+        ops.append(["s", path, new])
+
+
+def _diff_list(old, new, path):
+    """Build the smaller of a list edit and a full replacement."""
+    removed = []
+    matched = 0
+    for index, item in enumerate(old):
+        if matched < len(new) and item == new[matched]:
+            matched += 1
+        else:
+            removed.append(index)
+
+    edit = ["l", path, removed, new[matched:]]
+    replacement = ["s", path, new]
+    if len(json.dumps(edit)) < len(json.dumps(replacement)):
+        return edit
+    return replacement
+
+
+def apply_ops(values, ops):
+    """
+    Apply recorded operations to a set of tracked properties in place.
+
+    Args:
+        values: Properties to update
+        ops: Operations produced by diff_properties
+    """
+    for op in ops:
+        kind, path = op[0], op[1]
+        parent = values
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+
+        if kind == "s":
+            parent[key] = op[2]
+        elif kind == "d":
+            parent.pop(key, None)
+        elif kind == "l":
+            removed = set(op[2])
+            parent[key] = [item for index, item in enumerate(parent[key]) if index not in removed] + op[3]
+
+
+def load_deltas(state_uid, after_seq):
+    """
+    Fetch the deltas recorded for a state since its snapshot.
+
+    Args:
+        state_uid: The uid of the GameState
+        after_seq: Only deltas with a greater seq are returned
+
+    Returns:
+        list: (seq, ops) tuples in commit order
+    """
+    results, _ = db.cypher_query(
+        "MATCH (d:GameStateDelta {state_uid: $uid}) "
+        "WHERE d.seq > $seq "
+        "RETURN d.seq, d.ops ORDER BY d.seq",
+        {"uid": state_uid, "seq": after_seq}
+    )
+    return [(seq, json.loads(ops)) for seq, ops in results]
+
+
+def save_state_writes(writes):
+    """
+    Persist prepared state writes in a single transaction.
+
+    Args:
+        writes: Dicts from GameState.prepare_write
+    """
+    with db.transaction:
+        for query, params in state_write_statements(writes):
+            db.cypher_query(query, params)
+
+
+def state_write_statements(writes):
+    """
+    Build the statements persisting prepared state writes.
+
+    Snapshot writes replace the stored properties and drop the deltas they
+    fold in; delta writes append one GameStateDelta each.
+
+    Args:
+        writes: Dicts from GameState.prepare_write
+
+    Returns:
+        list: (query, params) tuples, to run in order in one transaction
+    """
+    snapshots = [
+        {"uid": write["uid"], "props": write["props"], "seq": write["seq"]}
+        for write in writes if write["props"] is not None
+    ]
+    deltas = [
+        {"state_uid": write["uid"], "seq": write["seq"], "ops": write["ops"]}
+        for write in writes if write["props"] is None
+    ]
+
+    statements = []
+    if snapshots:
+        statements.append((
+            "UNWIND $rows AS row "
+            "MATCH (s:GameState {uid: row.uid}) "
+            "SET s += row.props",
+            {"rows": snapshots}
+        ))
+        compaction = compact_deltas_statement([row for row in snapshots if row["seq"]])
+        if compaction is not None:
+            statements.append(compaction)
+    if deltas:
+        statements.append((
+            "UNWIND $rows AS row "
+            "CREATE (:GameStateDelta {state_uid: row.state_uid, seq: row.seq, ops: row.ops})",
+            {"rows": deltas}
+        ))
+    return statements
+
+
+def compact_deltas(rows):
+    """
+    Delete the deltas already folded into a snapshot.
+
+    Args:
+        rows: Dicts with the state "uid" and the snapshot "seq"
+    """
+    statement = compact_deltas_statement(rows)
+    if statement is not None:
+        db.cypher_query(*statement)
+
+
+def compact_deltas_statement(rows):
+    """
+    Build the statement deleting the deltas already folded into a snapshot.
+
+    Args:
+        rows: Dicts with the state "uid" and the snapshot "seq"
+
+    Returns:
+        tuple: (query, params), or None if there is nothing to delete
+    """
+    if not rows:
+        return None
+
+    return (
+        "UNWIND $rows AS row "
+        "MATCH (d:GameStateDelta {state_uid: row.uid}) "
+        "WHERE d.seq <= row.seq "
+        "DELETE d",
+        {"rows": [{"uid": row["uid"], "seq": row["seq"]} for row in rows]}
+    )
@@ -0,0 +1,80 @@
+"""
+Compact integer encoding for cards.
+
+Every suit/value pair of a rule set's deck_configuration maps to a small
+integer (suit_index * len(values) + value_index), which compiled rule sets
+use to index their per-card lookup tables. Hands and piles keep the usual
+{"suit", "value"} dicts.
+"""
+
+DEFAULT_SUITS = ["hearts", "diamonds", "clubs", "spades"]
+DEFAULT_VALUES = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+class CardCodec:
+    """
+    Lookup tables between card dicts and integer card codes for one deck.
+    """
+
+    def __init__(self, deck_config=None):
+        """
+        Build the lookup tables.
+
+        Args:
+            deck_config: The rule set's deck_configuration
+        """
+        deck_config = deck_config or {}
+        self.suits = list(deck_config.get("suits", DEFAULT_SUITS))
+        self.values = list(deck_config.get("values", DEFAULT_VALUES))
+
+        # Special cards get suits of their own after the standard ones
+        for special in deck_config.get("special_cards", []):
+            suit = f"special_{special['type']}"
+            value = special.get("value", "special")
+            if suit not in self.suits:
+                self.suits.append(suit)
+            if value not in self.values:
+                self.values.append(value)
+
+        self._suit_index = {suit: i for i, suit in enumerate(self.suits)}
+        self._value_index = {value: i for i, value in enumerate(self.values)}
+        self._width = len(self.values)
+        self._cards = [
+            {"suit": suit, "value": value}
+            for suit in self.suits
+            for value in self.values
+        ]
+
+    @property
+    def size(self):
+        """Number of distinct card codes"""
+        return len(self._cards)
+
+    def encode(self, suit, value):
+        """
+        Get the code of a card.
+
+        Args:
+            suit: Suit name
+            value: Value name
+
+        Returns:
+            int: The card code, or None if the card is not part of the deck
+        """
+        suit_index = self._suit_index.get(suit)
+        value_index = self._value_index.get(value)
+        if suit_index is None or value_index is None:
+            return None
+        return suit_index * self._width + value_index
+
+    def decode(self, code):
+        """
+        Get the card dict for a code.
+
+        Args:
+            code: A card code
+
+        Returns:
+            dict: New dict with suit and value
+        """
+        return dict(self._cards[code])
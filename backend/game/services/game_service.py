@@ -1,7 +1,8 @@
 from backend.game.models import Game, Player, GameCard, GameRuleSet, GameAction, GamePlayer
 from datetime import datetime
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from backend.card_game.notification_dispatch import send_to_group, send_to_groups
+from backend.game.services.game_view_cache import invalidates_game_views
 
 class GameService:
     """Service for handling game logic and operations"""
@@ -51,6 +52,7 @@ class GameService:
         return game
 
     @staticmethod
+    @invalidates_game_views
     def invite_player(game_uid, player_uid, inviter_uid):
         """Invite a player to join a game"""
         game = Game.nodes.get(uid=game_uid)
@@ -91,6 +93,7 @@ class GameService:
         return game_player
 
     @staticmethod
+    @invalidates_game_views
     def add_ai_player(game_uid, creator_uid, difficulty="medium"):
         """Add an AI player to a game"""
         game = Game.nodes.get(uid=game_uid)
@@ -133,6 +136,7 @@ class GameService:
         return game_player
 
     @staticmethod
+    @invalidates_game_views
     def accept_invitation(game_uid, player_uid):
         """Accept an invitation to join a game"""
         game = Game.nodes.get(uid=game_uid)
@@ -143,7 +147,7 @@ class GameService:
         game_player = None
 
         for gp in game_players:
-            if gp.game.get().game_uid == game_uid:
+            if gp.game.get().uid == game_uid:
                 game_player = gp
                 break
 
@@ -167,9 +171,10 @@ class GameService:
         return game_player
 
     @staticmethod
+    @invalidates_game_views
     def decline_invitation(game_uid, player_uid):
         """Decline an invitation to join a game"""
-        game = Game.nodes.get(game_uid=game_uid)
+        game = Game.nodes.get(uid=game_uid)
         player = Player.nodes.get(user_uid=player_uid)
 
         # Find the GamePlayer for this player and game
@@ -177,7 +182,7 @@ class GameService:
         game_player = None
 
         for gp in game_players:
-            if gp.game.get().game_uid == game_uid:
+            if gp.game.get().uid == game_uid:
                 game_player = gp
                 break
 
@@ -209,6 +214,7 @@ class GameService:
         return list(results)
 
     @staticmethod
+    @invalidates_game_views
     def join_game(game_uid, player_uid):
         """Add a player to an existing game"""
         game = Game.nodes.get(uid=game_uid)
@@ -238,6 +244,7 @@ class GameService:
         return game
 
     @staticmethod
+    @invalidates_game_views
     def start_game(game_uid):
         """Start a game that is in waiting status"""
         game = Game.nodes.get(uid=game_uid)
@@ -275,6 +282,7 @@ class GameService:
         return game
 
     @staticmethod
+    @invalidates_game_views
     def play_card(game_uid, player_uid, card_instance_uid, target_position):
         """Play a card from a player's hand to the field"""
         game = Game.nodes.get(uid=game_uid)
@@ -307,6 +315,7 @@ class GameService:
         return card_instance
 
     @staticmethod
+    @invalidates_game_views
     def end_turn(game_uid, player_uid):
         """End the current player's turn and move to the next player"""
         game = Game.nodes.get(uid=game_uid)
@@ -343,6 +352,7 @@ class GameService:
         return game
 
     @staticmethod
+    @invalidates_game_views
     def end_game(game_uid, winner_uid=None):
         """End a game and set the winner if provided"""
         game = Game.nodes.get(uid=game_uid)
@@ -368,7 +378,7 @@ class GameService:
 
             # Prepare the notification data
             invitation_data = {
-                'game_uid': game.game_uid,
+                'game_uid': game.uid,
                 'game_type': game.game_type,
                 'max_players': game.max_players,
                 'time_limit': game.time_limit,
@@ -378,7 +388,8 @@ class GameService:
             }
 
             # Send to the player's personal channel
-            async_to_sync(channel_layer.group_send)(
+            send_to_group(
+                channel_layer,
                 f'user_{player.uid}',
                 {
                     'type': 'game_invitation',
@@ -395,8 +406,9 @@ class GameService:
                 'timestamp': datetime.now().isoformat()
             }
 
-            async_to_sync(channel_layer.group_send)(
-                f'game_{game.game_uid}',
+            send_to_group(
+                channel_layer,
+                f'game_{game.uid}',
                 {
                     'type': 'player_joined',
                     'data': player_data
@@ -417,13 +429,14 @@ class GameService:
                 'username': player.username,
                 'display_name': player.display_name,
                 'response': response,
-                'game_uid': game.game_uid,
+                'game_uid': game.uid,
                 'timestamp': datetime.now().isoformat()
             }
 
             # Send to the game channel
-            async_to_sync(channel_layer.group_send)(
-                f'game_{game.game_uid}',
+            send_to_group(
+                channel_layer,
+                f'game_{game.uid}',
                 {
                     'type': 'invitation_response',
                     'data': response_data
@@ -437,7 +450,8 @@ class GameService:
             creator_data = response_data.copy()
             creator_data['is_creator_notification'] = True
 
-            async_to_sync(channel_layer.group_send)(
+            send_to_group(
+                channel_layer,
                 f'user_{creator.uid}',
                 {
                     'type': 'invitation_response',
@@ -460,7 +474,7 @@ class GameService:
                     'is_ai': True,
                     'ai_difficulty': player.get('ai_difficulty', 'medium'),
                     'status': 'accepted',
-                    'game_uid': game.game_uid,
+                    'game_uid': game.uid,
                     'timestamp': datetime.now().isoformat()
                 }
             else:
@@ -470,36 +484,32 @@ class GameService:
                     'username': player.username,
                     'display_name': player.display_name,
                     'status': 'accepted',
-                    'game_uid': game.game_uid,
+                    'game_uid': game.uid,
                     'timestamp': datetime.now().isoformat()
                 }
 
             # Send to the game channel
-            async_to_sync(channel_layer.group_send)(
-                f'game_{game.game_uid}',
-                {
-                    'type': 'player_joined',
-                    'data': player_data
-                }
-            )
+            messages = [(f'game_{game.uid}', {
+                'type': 'player_joined',
+                'data': player_data
+            })]
 
             # Also update all players individually to ensure they receive the update
             # even if they're not actively listening to this game channel
+            update = {
+                'type': 'game_update',
+                'data': {
+                    'update_type': 'player_joined',
+                    'game_uid': game.uid,
+                    'player': player_data
+                }
+            }
             for p in game.players.all():
                 if not isinstance(player, dict) and p.uid == player.uid:
                     continue  # Skip sending to the player who just joined
+                messages.append((f'user_{p.uid}', update))
 
-                async_to_sync(channel_layer.group_send)(
-                    f'user_{p.uid}',
-                    {
-                        'type': 'game_update',
-                        'data': {
-                            'update_type': 'player_joined',
-                            'game_uid': game.game_uid,
-                            'player': player_data
-                        }
-                    }
-                )
+            send_to_groups(channel_layer, messages)
         except Exception as e:
             print(f"Error sending player joined notification: {str(e)}")
 
@@ -510,38 +520,34 @@ class GameService:
             channel_layer = get_channel_layer()
 
             # Prepare game started data
+            current_player = game.current_player.single()
+            current_player_uid = current_player.uid if current_player else None
             game_data = {
-                'game_uid': game.game_uid,
+                'game_uid': game.uid,
                 'started_at': game.started_at.isoformat() if game.started_at else None,
-                'current_player': game.current_player.get().uid if game.current_player.all() else None,
+                'current_player': current_player_uid,
                 'timestamp': datetime.now().isoformat()
             }
 
             # Send to the game channel
-            async_to_sync(channel_layer.group_send)(
-                f'game_{game.game_uid}',
-                {
-                    'type': 'game_started',
-                    'data': game_data
-                }
-            )
-
-            # Also send to each player's personal channel with player-specific data
+            messages = [(f'game_{game.uid}', {
+                'type': 'game_started',
+                'data': game_data
+            })]
+
+            # Also send to each player's personal channel with player-specific data;
+            # everyone but the current player shares one message
+            waiting = {'type': 'game_started', 'data': dict(game_data, is_your_turn=False)}
             for player in game.players.all():
-                # Add player-specific data
-                player_data = game_data.copy()
-                player_data['is_your_turn'] = (
-                    game.current_player.all() and
-                    game.current_player.get().uid == player.uid
-                )
-
-                async_to_sync(channel_layer.group_send)(
-                    f'user_{player.uid}',
-                    {
+                if player.uid == current_player_uid:
+                    messages.append((f'user_{player.uid}', {
                         'type': 'game_started',
-                        'data': player_data
-                    }
-                )
+                        'data': dict(game_data, is_your_turn=True)
+                    }))
+                else:
+                    messages.append((f'user_{player.uid}', waiting))
+
+            send_to_groups(channel_layer, messages)
         except Exception as e:
             print(f"Error sending game started notification: {str(e)}")
 
@@ -573,14 +579,10 @@ class GameService:
                     'data': update['data']
                 })
 
-            # Send batched updates to each channel
-            for channel, messages in channel_updates.items():
-                async_to_sync(channel_layer.group_send)(
-                    channel,
-                    {
-                        'type': 'batch_update',
-                        'updates': messages
-                    }
-                )
+            # Send batched updates to every channel in one publish
+            send_to_groups(channel_layer, [
+                (channel, {'type': 'batch_update', 'updates': messages})
+                for channel, messages in channel_updates.items()
+            ])
         except Exception as e:
             print(f"Error sending batch game updates: {str(e)}")
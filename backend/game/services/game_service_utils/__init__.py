@@ -1,17 +1,30 @@
 from .action import Action
 from .create_action_card_game import create_action_card_game
 from .create_game_card import create_game_card
+from .bulk_create_game_cards import bulk_create_game_cards
 from .create_deck import create_deck
 from .play_card import play_card
 from .create_uno_rule_set import create_uno_rule_set
 from .create_idiot_rule_set import create_idiot_rule_set
+from .fetch_game_detail import afetch_game_detail, fetch_game_detail, serialize_game_detail, serialize_game_summary
+from .list_player_games import list_player_games, InvalidCursor
+from .fetch_player_overview import afetch_player_group, afetch_player_overview
 
 __all__ = [
     "Action",
     "create_action_card_game",
     "create_game_card",
+    "bulk_create_game_cards",
     "create_deck",
     "play_card",
     "create_uno_rule_set",
-    "create_idiot_rule_set"
+    "create_idiot_rule_set",
+    "afetch_game_detail",
+    "fetch_game_detail",
+    "serialize_game_detail",
+    "serialize_game_summary",
+    "list_player_games",
+    "InvalidCursor",
+    "afetch_player_group",
+    "afetch_player_overview"
 ]
@@ -0,0 +1,46 @@
+from neomodel import db
+from backend.game.models.game_card import GameCard
+
+
+def bulk_create_game_cards(game, cards):
+    """
+    Create GameCard instances for a game in a single query
+
+    Args:
+        game (Game): Game instance
+        cards (list): (card_data, player, location) tuples, player may be None
+
+    Returns:
+        list: uids of the created game cards, in the order given
+    """
+    rows = []
+    for card_data, player, location in cards:
+        game_card = GameCard(
+            location=location,
+            state={
+                "suit": card_data["suit"],
+                "value": card_data["value"]
+            }
+        )
+        rows.append({
+            "props": GameCard.deflate(game_card.__properties__, game_card),
+            "owner_uid": player.uid if player else None
+        })
+
+    if not rows:
+        return []
+
+    labels = ":".join(GameCard.inherited_labels())
+    db.cypher_query(
+        "MATCH (g:Game {uid: $game_uid}) "
+        "UNWIND $rows AS row "
+        f"CREATE (g)-[:HAS_CARD]->(c:{labels}) "
+        "SET c = row.props "
+        "WITH c, row "
+        "OPTIONAL MATCH (p:Player {uid: row.owner_uid}) "
+        "FOREACH (owner IN CASE WHEN p IS NULL THEN [] ELSE [p] END | "
+        "CREATE (c)-[:CONTROLLED_BY]->(owner))",
+        {"game_uid": game.uid, "rows": rows}
+    )
+
+    return [row["props"]["uid"] for row in rows]
@@ -1,7 +1,8 @@
+from collections import deque
 from datetime import datetime
 from backend.game.models import Game, GameRuleSet, GamePlayer, GameState, Player
 from backend.game.services.game_service_utils.action import Action
-from backend.game.services.game_service_utils.create_game_card import create_game_card
+from backend.game.services.game_service_utils.bulk_create_game_cards import bulk_create_game_cards
 from backend.game.services.game_service_utils.create_deck import create_deck
 
 def create_action_card_game(name, player_uids, rule_set_uid):
@@ -45,6 +46,7 @@ def create_action_card_game(name, player_uids, rule_set_uid):
     # Shuffle the deck
     import random
     random.shuffle(deck)
+    deck = deque(deck)
 
     # Get player objects and create GamePlayer instances
     players = []
@@ -65,46 +67,42 @@ def create_action_card_game(name, player_uids, rule_set_uid):
         players.append(player)
 
     # Deal cards to players
-    player_states = {}
     cards_per_player = dealing_config.get("cards_per_player", 7)
-
+    dealt = []
     for player in players:
-        hand = []
         for _ in range(cards_per_player):
             if deck:
-                card_data = deck.pop(0)
-                # Create a GameCard for each card in hand
-                game_card = create_game_card(game, card_data, player, 'hand')
-                hand.append({
-                    "id": game_card.uid,
-                    "suit": card_data["suit"],
-                    "value": card_data["value"]
-                })
-
-        player_states[player.uid] = {
+                dealt.append((deck.popleft(), player, 'hand'))
+
+    # Add a card to discard pile and keep the remaining deck as draw pile
+    dealt.append((deck.popleft(), None, 'field'))
+    dealt.extend((card_data, None, 'deck') for card_data in deck)
+
+    # Create every GameCard in one round trip
+    card_uids = bulk_create_game_cards(game, dealt)
+
+    player_states = {
+        player.uid: {
             "id": player.uid,
-            "hand": hand,
+            "hand": [],
             "score": 0
         }
-
-    # Add a card to discard pile
-    first_card = deck.pop(0)
-    discard_game_card = create_game_card(game, first_card, None, 'field')
-    discard_pile = [{
-        "id": discard_game_card.uid,
-        "suit": first_card["suit"],
-        "value": first_card["value"]
-    }]
-
-    # Store remaining deck as draw pile
+        for player in players
+    }
+    discard_pile = []
     draw_pile = []
-    for card_data in deck:
-        game_card = create_game_card(game, card_data, None, 'deck')
-        draw_pile.append({
-            "id": game_card.uid,
+    for (card_data, player, location), card_uid in zip(dealt, card_uids):
+        card = {
+            "id": card_uid,
             "suit": card_data["suit"],
             "value": card_data["value"]
-        })
+        }
+        if location == 'hand':
+            player_states[player.uid]["hand"].append(card)
+        elif location == 'field':
+            discard_pile.append(card)
+        else:
+            draw_pile.append(card)
 
     # Create the game state
     game_state = GameState(
@@ -113,7 +111,9 @@ def create_action_card_game(name, player_uids, rule_set_uid):
         skipped_players=[],
         discard_pile=discard_pile,
         draw_pile=draw_pile,
-        player_states=player_states
+        player_states=player_states,
+        rule_set_uid=rule_set.uid,
+        rule_set_version=rule_set.version
     ).save()
 
     # Link the game state to the game
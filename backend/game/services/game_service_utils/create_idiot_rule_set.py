@@ -1,8 +1,8 @@
 from backend.game.models import GameRuleSet
 
-def create_idiot_rule_set(initial_direction="clockwise", cards_per_player=4, min_cards=2, max_cards=8):
+def idiot_rule_set_config(initial_direction="clockwise", cards_per_player=4, min_cards=2, max_cards=8):
     """
-    Create a rule set for the Idiot card game
+    Build the configuration of a rule set for the Idiot card game
 
     Args:
         initial_direction (str): Initial direction of play ("clockwise" or "counterclockwise")
@@ -11,7 +11,7 @@ def create_idiot_rule_set(initial_direction="clockwise", cards_per_player=4, min
         max_cards (int): Maximum number of cards that can be dealt
 
     Returns:
-        GameRuleSet: The created rule set
+        dict: Keyword arguments for GameRuleSet.create_idiot_card_game
 
     Raises:
         ValueError: If any of the parameters are invalid
@@ -477,8 +477,8 @@ def create_idiot_rule_set(initial_direction="clockwise", cards_per_player=4, min
         "max_cards": max_cards
     }
 
-    # Use the new method specifically for Idiot game
-    return GameRuleSet.create_idiot_card_game(
+    # Arguments for the Idiot-specific rule set constructor
+    return dict(
         name="Idiot Card Game",
         description="A complex card game with special actions for each card value",
         card_actions=card_actions,
@@ -489,3 +489,28 @@ def create_idiot_rule_set(initial_direction="clockwise", cards_per_player=4, min
         deck_configuration=deck_configuration,
         dealing_config=dealing_config
     )
+
+
+def create_idiot_rule_set(initial_direction="clockwise", cards_per_player=4, min_cards=2, max_cards=8):
+    """
+    Create and save a rule set for the Idiot card game
+
+    Args:
+        initial_direction (str): Initial direction of play ("clockwise" or "counterclockwise")
+        cards_per_player (int): Default number of cards dealt to each player
+        min_cards (int): Minimum number of cards that can be dealt
+        max_cards (int): Maximum number of cards that can be dealt
+
+    Returns:
+        GameRuleSet: The created rule set
+
+    Raises:
+        ValueError: If any of the parameters are invalid
+    """
+    config = idiot_rule_set_config(
+        initial_direction=initial_direction,
+        cards_per_player=cards_per_player,
+        min_cards=min_cards,
+        max_cards=max_cards
+    )
+    return GameRuleSet.create_idiot_card_game(**config)
@@ -1,8 +1,8 @@
 from backend.game.models import GameRuleSet
 
-def create_uno_rule_set(initial_direction="clockwise", cards_per_player=7, min_cards=1, max_cards=12):
+def uno_rule_set_config(initial_direction="clockwise", cards_per_player=7, min_cards=1, max_cards=12):
     """
-    Create a rule set for an Uno-like game
+    Build the configuration of a rule set for an Uno-like game
 
     Args:
         initial_direction (str): Initial direction of play ("clockwise" or "counterclockwise")
@@ -11,7 +11,7 @@ def create_uno_rule_set(initial_direction="clockwise", cards_per_player=7, min_c
         max_cards (int): Maximum number of cards that can be dealt
 
     Returns:
-        GameRuleSet: The created rule set
+        dict: Keyword arguments for GameRuleSet.create_action_card_game
     """
     card_actions = {
         "hearts_2": {
@@ -119,7 +119,7 @@ def create_uno_rule_set(initial_direction="clockwise", cards_per_player=7, min_c
         "max_cards": max_cards
     }
 
-    return GameRuleSet.create_action_card_game(
+    return dict(
         name="Uno-like Game",
         description="A game similar to Uno with action cards",
         card_actions=card_actions,
@@ -129,3 +129,25 @@ def create_uno_rule_set(initial_direction="clockwise", cards_per_player=7, min_c
         deck_configuration=deck_configuration,
         dealing_config=dealing_config
     )
+
+
+def create_uno_rule_set(initial_direction="clockwise", cards_per_player=7, min_cards=1, max_cards=12):
+    """
+    Create and save a rule set for an Uno-like game
+
+    Args:
+        initial_direction (str): Initial direction of play ("clockwise" or "counterclockwise")
+        cards_per_player (int): Default number of cards dealt to each player
+        min_cards (int): Minimum number of cards that can be dealt
+        max_cards (int): Maximum number of cards that can be dealt
+
+    Returns:
+        GameRuleSet: The created rule set
+    """
+    config = uno_rule_set_config(
+        initial_direction=initial_direction,
+        cards_per_player=cards_per_player,
+        min_cards=min_cards,
+        max_cards=max_cards
+    )
+    return GameRuleSet.create_action_card_game(**config)
@@ -0,0 +1,138 @@
+from neomodel import db
+from backend.card_game import neo4j_async
+from backend.game.models.game import Game
+
+GAME_DETAIL_QUERY = """
+MATCH (g:Game {uid: $game_uid})
+RETURN g,
+    head([(g)-[:CREATED_BY]->(p:Player) | p.uid]) AS creator,
+    head([(g)-[:CURRENT_TURN]->(p:Player) | p.uid]) AS current_player,
+    head([(g)-[:WON_BY]->(p:Player) | p.uid]) AS winner,
+    [(p:Player)-[:PARTICIPATES_IN]->(g) | {
+        user_uid: p.uid,
+        username: p.username,
+        display_name: p.display_name,
+        status: coalesce(head([(p)-[:HAS_GAME_PLAYER]->(gp:GamePlayer)<-[:HAS_PLAYER]-(g) | gp.status]), 'unknown')
+    }] AS players,
+    [(g)-[:HAS_PLAYER]->(gp:GamePlayer) WHERE gp.is_ai | {
+        is_ai: true,
+        ai_difficulty: gp.ai_difficulty,
+        status: gp.status
+    }] AS ai_players,
+    [(g)-[:INVITED_GROUP]->(pg:PlayerGroup) | {group_uid: pg.uid, name: pg.name}] AS invited_groups
+"""
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def serialize_game_summary(game, players, creator=None, current_player=None, winner=None):
+    """
+    Build the payload describing a game in listings
+
+    Args:
+        game (Game): Game instance
+        players (list): Players as dicts, at least user_uid, username and display_name
+        creator (str): uid of the creating player, if any
+        current_player (str): uid of the player whose turn it is, if any
+        winner (str): uid of the winning player, if any
+
+    Returns:
+        dict: Game summary payload
+    """
+    return {
+        "game_uid": game.uid,
+        "game_type": game.game_type,
+        "max_players": game.max_players,
+        "time_limit": game.time_limit,
+        "use_ai": game.use_ai,
+        "status": game.status,
+        "current_turn": game.current_turn,
+        "created_at": _isoformat(game.created_at),
+        "started_at": _isoformat(game.started_at),
+        "ended_at": _isoformat(game.ended_at),
+        "completed_at": _isoformat(game.completed_at),
+        "players": list(players),
+        "creator": creator,
+        "current_player": current_player,
+        "winner": winner,
+        "rule_version": game.rule_version
+    }
+
+
+def serialize_game_detail(game, players, ai_players=(), creator=None, current_player=None,
+                          winner=None, invited_groups=()):
+    """
+    Build the game detail payload shared by the REST API and the WebSocket consumer
+
+    Args:
+        game (Game): Game instance
+        players (list): Human players as dicts with user_uid, username, display_name and status
+        ai_players (list): AI players as dicts with is_ai, ai_difficulty and status
+        creator (str): uid of the creating player, if any
+        current_player (str): uid of the player whose turn it is, if any
+        winner (str): uid of the winning player, if any
+        invited_groups (list): Invited groups as dicts with group_uid and name
+
+    Returns:
+        dict: Game detail payload
+    """
+    game_data = serialize_game_summary(
+        game,
+        list(players) + list(ai_players),
+        creator=creator,
+        current_player=current_player,
+        winner=winner
+    )
+    game_data.update({
+        "is_tournament": game.is_tournament,
+        "tournament_round": game.tournament_round,
+        "invited_groups": list(invited_groups)
+    })
+    return game_data
+
+
+def fetch_game_detail(game_uid):
+    """
+    Load a game's detail payload in a single query
+
+    Args:
+        game_uid (str): uid of the game
+
+    Returns:
+        dict: Game detail payload, or None if there is no such game
+    """
+    results, _ = db.cypher_query(GAME_DETAIL_QUERY, {"game_uid": game_uid})
+    return _game_detail_from_rows(results)
+
+
+async def afetch_game_detail(game_uid):
+    """
+    Load a game's detail payload in a single query on the async driver
+
+    Args:
+        game_uid (str): uid of the game
+
+    Returns:
+        dict: Game detail payload, or None if there is no such game
+    """
+    results, _ = await neo4j_async.cypher_query(GAME_DETAIL_QUERY, {"game_uid": game_uid})
+    return _game_detail_from_rows(results)
+
+
+def _game_detail_from_rows(results):
+    """Build the detail payload from the rows of GAME_DETAIL_QUERY"""
+    if not results:
+        return None
+
+    node, creator, current_player, winner, players, ai_players, invited_groups = results[0]
+    return serialize_game_detail(
+        Game.inflate(node),
+        players,
+        ai_players,
+        creator=creator,
+        current_player=current_player,
+        winner=winner,
+        invited_groups=invited_groups
+    )
@@ -0,0 +1,91 @@
+from backend.card_game import neo4j_async
+from backend.game.models.player_group import PlayerGroup
+
+ACTIVE_GAME_STATUSES = ['waiting', 'in_progress']
+
+PLAYER_OVERVIEW_QUERY = """
+MATCH (p:Player {uid: $player_uid})
+RETURN
+    [(p)-[:PARTICIPATES_IN]->(g:Game) WHERE g.status IN $statuses | {
+        game_uid: g.uid,
+        status: g.status,
+        game_type: g.game_type
+    }] AS active_games,
+    [(p)-[:MEMBER_OF]->(pg:PlayerGroup) | {
+        group_uid: pg.uid,
+        name: pg.name,
+        is_owner: EXISTS { (p)-[:OWNS]->(pg) },
+        member_count: COUNT { (pg)<-[:MEMBER_OF]-(:Player) }
+    }] AS player_groups
+"""
+
+PLAYER_GROUP_QUERY = """
+MATCH (pg:PlayerGroup {uid: $group_uid})<-[:MEMBER_OF]-(p:Player {uid: $player_uid})
+RETURN pg,
+    head([(owner:Player)-[:OWNS]->(pg) | owner.uid]) AS owner,
+    [(m:Player)-[:MEMBER_OF]->(pg) | {
+        user_uid: m.uid,
+        username: m.username,
+        display_name: m.display_name
+    }] AS members,
+    [(pg)-[:PARTICIPATED_IN]->(g:Game) WHERE g.status IN $statuses | {
+        game_uid: g.uid,
+        game_type: g.game_type,
+        status: g.status
+    }] AS active_games
+"""
+
+
+async def afetch_player_overview(player_uid):
+    """
+    Load a player's active games and groups in a single query
+
+    Args:
+        player_uid (str): uid of the player
+
+    Returns:
+        dict: active_games and player_groups, both empty for an unknown player
+    """
+    results, _ = await neo4j_async.cypher_query(PLAYER_OVERVIEW_QUERY, {
+        "player_uid": player_uid,
+        "statuses": ACTIVE_GAME_STATUSES
+    })
+    if not results:
+        return {"active_games": [], "player_groups": []}
+
+    active_games, player_groups = results[0]
+    return {"active_games": list(active_games), "player_groups": list(player_groups)}
+
+
+async def afetch_player_group(group_uid, player_uid):
+    """
+    Load a player group's detail for one of its members in a single query
+
+    Args:
+        group_uid (str): uid of the group
+        player_uid (str): uid of the member asking
+
+    Returns:
+        dict: Group detail payload, or None if there is no such group or the
+            player is not a member
+    """
+    results, _ = await neo4j_async.cypher_query(PLAYER_GROUP_QUERY, {
+        "group_uid": group_uid,
+        "player_uid": player_uid,
+        "statuses": ACTIVE_GAME_STATUSES
+    })
+    if not results:
+        return None
+
+    node, owner, members, active_games = results[0]
+    group = PlayerGroup.inflate(node)
+    return {
+        "group_uid": group.uid,
+        "name": group.name,
+        "description": group.description,
+        "is_public": group.is_public,
+        "created_at": group.created_at.isoformat() if group.created_at else None,
+        "is_owner": owner == player_uid,
+        "members": [dict(member, is_owner=member["user_uid"] == owner) for member in members],
+        "active_games": list(active_games)
+    }
@@ -0,0 +1,124 @@
+import base64
+import json
+from neomodel import db
+from backend.game.models.game import Game
+from .fetch_game_detail import serialize_game_summary
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+PLAYER_GAMES_QUERY = """
+MATCH (:Player {uid: $player_uid})-[:PARTICIPATES_IN]->(g:Game)
+WHERE ($statuses IS NULL OR g.status IN $statuses)
+  AND ($after_created_at IS NULL
+       OR g.created_at < $after_created_at
+       OR (g.created_at = $after_created_at AND g.uid < $after_uid))
+WITH g
+ORDER BY g.created_at DESC, g.uid DESC
+LIMIT $limit
+RETURN g,
+    g.created_at AS sort_key,
+    head([(g)-[:CREATED_BY]->(p:Player) | p.uid]) AS creator,
+    head([(g)-[:CURRENT_TURN]->(p:Player) | p.uid]) AS current_player,
+    head([(g)-[:WON_BY]->(p:Player) | p.uid]) AS winner,
+    [(p:Player)-[:PARTICIPATES_IN]->(g) | {
+        user_uid: p.uid,
+        username: p.username,
+        display_name: p.display_name
+    }] AS players
+"""
+
+# The whole listing, for callers that do not paginate
+ALL_PLAYER_GAMES_QUERY = PLAYER_GAMES_QUERY.replace("LIMIT $limit\n", "")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a listing cursor cannot be decoded"""
+
+
+def encode_cursor(created_at, uid):
+    """
+    Encode the position after a game as an opaque cursor
+
+    Args:
+        created_at (float): Stored created_at of the last game on the page
+        uid (str): uid of the last game on the page
+
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = json.dumps([created_at, uid], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor (str): URL-safe cursor
+
+    Returns:
+        tuple: (created_at, uid)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, uid = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(created_at, (int, float)) or not isinstance(uid, str):
+        raise InvalidCursor("Invalid cursor")
+    return created_at, uid
+
+
+def list_player_games(player_uid, statuses=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    List a player's games, newest first, with their players, creator,
+    current player and winner in a single query
+
+    Args:
+        player_uid (str): uid of the player
+        statuses (list): Only include games in these statuses, None for all
+        cursor (str): Cursor returned with the previous page, None for the first page
+        limit (int): Maximum number of games, capped at MAX_PAGE_SIZE, or None
+            for all of them
+
+    Returns:
+        tuple: (list of game summary payloads, cursor for the next page or None)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    after_created_at, after_uid = decode_cursor(cursor) if cursor else (None, None)
+    params = {
+        "player_uid": player_uid,
+        "statuses": list(statuses) if statuses else None,
+        "after_created_at": after_created_at,
+        "after_uid": after_uid
+    }
+
+    if limit is None:
+        results, _ = db.cypher_query(ALL_PLAYER_GAMES_QUERY, params)
+    else:
+        # Fetch one extra row to learn whether there is a next page
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        results, _ = db.cypher_query(PLAYER_GAMES_QUERY, {**params, "limit": limit + 1})
+
+    games = []
+    for node, _, creator, current_player, winner, players in results[:limit]:
+        games.append(serialize_game_summary(
+            Game.inflate(node),
+            players,
+            creator=creator,
+            current_player=current_player,
+            winner=winner
+        ))
+
+    next_cursor = None
+    if limit is not None and len(results) > limit:
+        last = results[limit - 1]
+        next_cursor = encode_cursor(last[1], games[-1]["game_uid"])
+    return games, next_cursor
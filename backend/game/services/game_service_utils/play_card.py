@@ -1,8 +1,13 @@
 from datetime import datetime
 from backend.game.models import Game, GameState, GameCard, GameAction, Player
 from backend.game.services.rule_interpreter.base import get_rule_interpreter
+from backend.game.services.rule_interpreter.compiled_rule_set import get_cached_rule_set
 from backend.game.services.game_service_utils.action import Action
+from backend.game.services.game_state_engine import get_game_state_engine
+from backend.game.services.game_view_cache import invalidates_game_views
+from backend.game.services.unit_of_work import UnitOfWork
 
+@invalidates_game_views
 def play_card(game_uid, player_uid, card_uid):
     """
     Handle a player playing a card
@@ -23,66 +28,134 @@ def play_card(game_uid, player_uid, card_uid):
         if game.status != "in_progress":
             return {"error": "Game is not active"}
 
-        # Get the rule set
-        rule_set = game.rule_set.single()
+        # Get the live game state
+        engine = get_game_state_engine()
+        game_state = engine.get_state(
+            game_uid, lambda: game.game_state.single()
+        )
+        if not game_state:
+            return {"error": "Game state not found"}
+
+        # Get the rule set, skipping the traversal when it is already compiled
+        compiled = get_cached_rule_set(game_state.rule_set_uid, game_state.rule_set_version)
+        rule_set = compiled.rule_set if compiled else game.rule_set.single()
 
         # Get the rule interpreter
         interpreter = get_rule_interpreter(rule_set)
 
-        # Get the game state
-        game_state = GameState.nodes.filter(game=game).first()
-        if not game_state:
-            return {"error": "Game state not found"}
+        # Moves within a game are applied one at a time
+        with engine.lock(game_uid):
+            return _apply_card_play(engine, game, game_state, interpreter, player_uid, card_uid)
+
+    except Exception as e:
+        # Log the error
+        print(f"Error in play_card: {str(e)}")
+        return {"error": f"An error occurred: {str(e)}"}
+
+
+def _apply_card_play(engine, game, game_state, interpreter, player_uid, card_uid):
+    """
+    Validate a card play and apply it to the live game state
+
+    Args:
+        engine (GameStateEngine): Engine owning the live game state
+        game (Game): The game being played
+        game_state (GameState): The live game state
+        interpreter (GameRuleInterpreter): Interpreter for the game's rule set
+        player_uid (str): ID of the player
+        card_uid (str): ID of the card (GameCard uid)
+
+    Returns:
+        dict: Result of the action
+    """
+    # Check if it's the player's turn
+    if game_state.current_player_uid != player_uid:
+        return {"error": "Not your turn"}
+
+    # Get the player
+    player = Player.nodes.get(uid=player_uid)
+    player_state = game_state.get_player_state(player_uid)
+    if not player_state:
+        return {"error": "Player not found in game state"}
+
+    # Get the game card
+    game_card = GameCard.nodes.get(uid=card_uid)
+
+    # Find the card in player's hand
+    card_data = next((c for c in player_state["hand"] if c["id"] == card_uid), None)
+    if not card_data:
+        return {"error": "Card not in player's hand"}
+
+    # Create card object for validation
+    class CardObj:
+        def __init__(self, id, suit, value):
+            self.id = id
+            self.suit = suit
+            self.value = value
+
+        def __eq__(self, other):
+            if not isinstance(other, CardObj) and not isinstance(other, dict):
+                return False
+            if isinstance(other, dict):
+                return self.id == other.get("id")
+            return self.id == other.id
+
+    card_obj = CardObj(card_data["id"], card_data["suit"], card_data["value"])
+    action = Action(type="play_card", card=card_obj)
+
+    # Validate the action
+    if not interpreter.validate_action(game_state, player_state, action):
+        return {"error": "Invalid card play"}
+
+    # The interpreter changes the live state in place; undo that if the move doesn't commit
+    checkpoint = game_state.checkpoint()
+    try:
+        # Process the card play
+        updated_state = interpreter.process_card_play(game_state, player_state, card_obj)
+
+        # Apply any additional rules
+        final_state = interpreter.apply_rules(updated_state)
+
+        # Transfer all relevant properties to the live state
+        # Core properties
+        game_state.current_player_uid = final_state.current_player_uid
+        game_state.next_player_uid = final_state.next_player_uid
+        game_state.direction = final_state.direction
+        game_state.skipped_players = final_state.skipped_players
+        game_state.discard_pile = final_state.discard_pile
+        game_state.draw_pile = final_state.draw_pile
+        game_state.player_states = final_state.player_states
+        game_state.game_over = final_state.game_over
+        game_state.winner_id = final_state.winner_id
+
+        # Special properties for complex games
+        if hasattr(final_state, "revealed_cards"):
+            game_state.revealed_cards = final_state.revealed_cards
+
+        if hasattr(final_state, "current_suit"):
+            game_state.current_suit = final_state.current_suit
+
+        if hasattr(final_state, "chain_context"):
+            game_state.chain_context = final_state.chain_context
+
+        if hasattr(final_state, "last_card"):
+            game_state.last_card = {
+                "id": final_state.last_card.id,
+                "suit": final_state.last_card.suit,
+                "value": final_state.last_card.value
+            }
 
-        # Check if it's the player's turn
-        if game_state.current_player_uid != player_uid:
-            return {"error": "Not your turn"}
-
-        # Get the player
-        player = Player.nodes.get(uid=player_uid)
-        player_state = game_state.player_states.get(player_uid)
-        if not player_state:
-            return {"error": "Player not found in game state"}
-
-        # Get the game card
-        game_card = GameCard.nodes.get(uid=card_uid)
-
-        # Find the card in player's hand
-        card_data = next((c for c in player_state["hand"] if c["uid"] == card_uid), None)
-        if not card_data:
-            return {"error": "Card not in player's hand"}
-
-        # Create card object for validation
-        class CardObj:
-            def __init__(self, uid, suit, value):
-                self.uid = uid
-                self.suit = suit
-                self.value = value
-
-            def __eq__(self, other):
-                if not isinstance(other, CardObj) and not isinstance(other, dict):
-                    return False
-                if isinstance(other, dict):
-                    return self.uid == other.get("uid")
-                return self.uid == other.uid
-
-        card_obj = CardObj(card_data["uid"], card_data["suit"], card_data["value"])
-        action = Action(type="play_card", card=card_obj)
-
-        # Validate the action
-        if interpreter.validate_action(game_state, player_state, action):
-            # Process the card play
-            updated_state = interpreter.process_card_play(game_state, player_state, card_obj)
-
-            # Apply any additional rules
-            final_state = interpreter.apply_rules(updated_state)
+        if hasattr(final_state, "last_player"):
+            game_state.last_player = final_state.last_player
 
+        # The move's writes go to Neo4j together, in one transaction
+        with UnitOfWork() as unit:
             # Update the game card location
             game_card.location = 'field'
-            game_card.save()
+            unit.save(game_card)
 
             # Record the action
-            GameAction(
+            game_action = GameAction(
                 action_type="play_card",
                 action_data={
                     "card_uid": card_uid,
@@ -90,51 +163,26 @@ def play_card(game_uid, player_uid, card_uid):
                     "card_suit": card_data["suit"],
                     "card_value": card_data["value"]
                 }
-            ).save().game.connect(game).player.connect(player).affected_cards.connect(game_card)
-
-            # Save the updated state - transfer all relevant properties
-            # Core properties
-            game_state.current_player_uid = final_state.current_player_uid
-            game_state.next_player_uid = final_state.next_player_uid
-            game_state.direction = final_state.direction
-            game_state.skipped_players = final_state.skipped_players
-            game_state.discard_pile = final_state.discard_pile
-            game_state.draw_pile = final_state.draw_pile
-            game_state.player_states = final_state.player_states
-            game_state.game_over = final_state.game_over
-            game_state.winner_id = final_state.winner_id
-
-            # Special properties for complex games
-            if hasattr(final_state, "revealed_cards"):
-                game_state.revealed_cards = final_state.revealed_cards
-
-            if hasattr(final_state, "current_suit"):
-                game_state.current_suit = final_state.current_suit
-
-            if hasattr(final_state, "chain_context"):
-                game_state.chain_context = final_state.chain_context
-
-            if hasattr(final_state, "last_card"):
-                game_state.last_card = {
-                    "id": final_state.last_card.id,
-                    "suit": final_state.last_card.suit,
-                    "value": final_state.last_card.value
-                }
-
-            if hasattr(final_state, "last_player"):
-                game_state.last_player = final_state.last_player
-
-            game_state.save()
+            )
+            unit.save(game_action)
+            unit.connect(game_action, "game", game)
+            unit.connect(game_action, "player", player)
+            unit.connect(game_action, "affected_cards", game_card)
 
             # Check if game is over
             if final_state.game_over:
+                # The finished game's state is written with the move, and leaves the
+                # engine only once that has committed
+                game_state.commit(unit)
+                unit.on_commit(lambda: engine.end_game(game.uid))
+
                 game.status = "completed"
                 if final_state.winner_id:
                     winner = Player.nodes.get(uid=final_state.winner_id)
-                    game.winner.connect(winner)
+                    unit.connect(game, "winner", winner)
                 game.completed_at = datetime.now()
                 game.ended_at = datetime.now()
-                game.save()
+                unit.save(game)
 
                 return {
                     "success": True,
@@ -142,24 +190,19 @@ def play_card(game_uid, player_uid, card_uid):
                     "winner": final_state.winner_id
                 }
 
-            # Update current player
-            next_player = Player.nodes.get(uid=final_state.next_player_uid)
-            game.current_player.disconnect_all()
-            game.current_player.connect(next_player)
-
-            # Update game state
+            # Advance the turn in the same write as the rest of the move
             game_state.current_player_uid = final_state.next_player_uid
             game_state.next_player_uid = None
-            game_state.save()
+            game_state.commit(unit)
 
-            return {
-                "success": True,
-                "next_player": final_state.next_player_uid
-            }
-        else:
-            return {"error": "Invalid card play"}
-
-    except Exception as e:
-        # Log the error
-        print(f"Error in play_card: {str(e)}")
-        return {"error": f"An error occurred: {str(e)}"}
+            # Update current player
+            next_player = Player.nodes.get(uid=game_state.current_player_uid)
+            unit.replace(game, "current_player", next_player)
+
+        return {
+            "success": True,
+            "next_player": game_state.current_player_uid
+        }
+    except Exception:
+        game_state.rollback(checkpoint)
+        raise
@@ -0,0 +1,277 @@
+"""
+In-process game state engine.
+
+Keeps the live GameState of every active game in memory so moves are applied
+against an already-loaded copy, and writes dirty states back to Neo4j in
+batches from a background thread (write-behind). A move committed through a
+UnitOfWork writes the state in its own transaction instead, and the state then
+counts as flushed. A game's state is flushed immediately when the game ends. Each flushed state is written either as a full
+snapshot or, with GAME_STATE_PERSISTENCE = "delta", as a small delta record.
+
+The engine is authoritative only for the worker that owns a game, and nothing
+here coordinates workers. Write-behind is therefore off by default
+(GAME_STATE_WRITE_BEHIND) and must only be enabled when one worker process
+serves the game API, or when the deployment routes every request and socket
+of a game to the same worker (sticky routing). Otherwise each worker keeps
+its own copy of a state and their flushes overwrite each other. Moves not yet
+flushed, up to GAME_STATE_FLUSH_INTERVAL seconds of them, are lost if the
+worker crashes.
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+from contextlib import ExitStack
+
+from django.conf import settings
+
+from backend.game.models.game_state_delta import save_state_writes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+
+class GameStateEngine:
+    """
+    Owns the live GameState objects for the games handled by this process.
+    """
+
+    def __init__(self, enabled=True, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialize the engine.
+
+        Args:
+            enabled: Whether states are kept in memory and written behind
+            flush_interval: Seconds between background flushes
+        """
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self._states = {}
+        self._dirty = set()
+        self._game_locks = {}
+        self._watchers = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def get_state(self, game_uid, loader):
+        """
+        Get the live state of a game, loading it on first access.
+
+        Args:
+            game_uid: The uid of the game
+            loader: Callable returning the persisted GameState (or None)
+
+        Returns:
+            GameState: The live state, or None if the loader found nothing
+        """
+        if not self.enabled:
+            return loader()
+
+        with self._lock:
+            state = self._states.get(game_uid)
+        if state is not None:
+            return state
+
+        state = loader()
+        if state is None:
+            return None
+
+        with self._lock:
+            # Another thread may have loaded the same game in the meantime
+            state = self._states.setdefault(game_uid, state)
+            state._write_behind = self
+            state._engine_key = game_uid
+        return state
+
+    def lock(self, game_uid):
+        """
+        Get the lock that serializes moves within a game.
+
+        Args:
+            game_uid: The uid of the game
+
+        Returns:
+            threading.RLock: The per-game lock
+        """
+        with self._lock:
+            return self._game_locks.setdefault(game_uid, threading.RLock())
+
+    def mark_dirty(self, state):
+        """
+        Schedule a state to be written on the next flush.
+
+        Args:
+            state: A GameState owned by this engine
+        """
+        with self._lock:
+            self._dirty.add(state._engine_key)
+            watchers = self._watchers.pop(state._engine_key, ())
+        self._ensure_flusher()
+        self._wake(watchers)
+
+    def mark_written(self, state):
+        """
+        Record that a state was committed and written outside the engine.
+
+        Args:
+            state: A GameState owned by this engine, written with its move
+        """
+        with self._lock:
+            self._dirty.discard(state._engine_key)
+            watchers = self._watchers.pop(state._engine_key, ())
+        self._wake(watchers)
+
+    @staticmethod
+    def _wake(watchers):
+        """Set the events of requests waiting for a commit."""
+        for loop, event in watchers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The waiting request's event loop has already closed
+                pass
+
+    def watch(self, game_uid):
+        """
+        Get an asyncio event set by the next commit of a game's live state.
+
+        Must be called from a running event loop. Register before checking the
+        state so a commit in between is not missed, and pass the event to
+        unwatch when done waiting.
+
+        Args:
+            game_uid: The uid of the game
+
+        Returns:
+            asyncio.Event: Set once the state is committed
+        """
+        event = asyncio.Event()
+        with self._lock:
+            self._watchers.setdefault(game_uid, set()).add((asyncio.get_running_loop(), event))
+        return event
+
+    def unwatch(self, game_uid, event):
+        """
+        Stop waiting for a game's next commit.
+
+        Args:
+            game_uid: The uid of the game
+            event: The event returned by watch
+        """
+        with self._lock:
+            watchers = self._watchers.get(game_uid)
+            if watchers is None:
+                return
+            watchers.difference_update([w for w in watchers if w[1] is event])
+            if not watchers:
+                del self._watchers[game_uid]
+
+    def flush(self):
+        """
+        Write every dirty state to Neo4j in a single batch.
+
+        Returns:
+            int: The number of states written
+        """
+        with self._lock:
+            game_uids, self._dirty = self._dirty, set()
+            states = [(uid, self._states[uid]) for uid in game_uids if uid in self._states]
+
+        if not states:
+            return 0
+
+        # Moves hold their game's lock while writing the state themselves, so the
+        # locks of the states being flushed are kept until their writes are applied
+        with ExitStack() as held:
+            try:
+                writes = []
+                for game_uid, state in states:
+                    held.enter_context(self.lock(game_uid))
+                    write = state.prepare_write()
+                    if write is not None:
+                        writes.append((state, write))
+                if writes:
+                    save_state_writes([write for _, write in writes])
+            except Exception as e:
+                logger.error(f"Error flushing game states: {str(e)}")
+                with self._lock:
+                    self._dirty.update(uid for uid, _ in states)
+                return 0
+
+            for state, write in writes:
+                state.write_applied(write)
+        return len(writes)
+
+    def end_game(self, game_uid, persist=True):
+        """
+        Flush a finished game's state and stop tracking it.
+
+        Args:
+            game_uid: The uid of the game
+            persist: Write pending changes now; False when the caller commits
+                the state itself
+        """
+        with self._lock:
+            state = self._states.pop(game_uid, None)
+            was_dirty = game_uid in self._dirty
+            self._dirty.discard(game_uid)
+            self._game_locks.pop(game_uid, None)
+
+        if state is None:
+            return
+
+        state._write_behind = None
+        if was_dirty and persist:
+            state.persist()
+
+    def close(self):
+        """Stop the background flusher and write out pending states."""
+        self._stop.set()
+        self.flush()
+
+    def _ensure_flusher(self):
+        """Start the background flush thread on first use."""
+        if self._flusher is not None:
+            return
+
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher,
+                    name="game-state-flusher",
+                    daemon=True
+                )
+                self._flusher.start()
+
+    def _run_flusher(self):
+        """Flush dirty states every flush_interval seconds until closed."""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_game_state_engine():
+    """
+    Get the process-wide game state engine.
+
+    Returns:
+        GameStateEngine: The engine configured from settings
+    """
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = GameStateEngine(
+                    enabled=getattr(settings, "GAME_STATE_WRITE_BEHIND", False),
+                    flush_interval=getattr(settings, "GAME_STATE_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+                )
+                atexit.register(_engine.close)
+
+    return _engine
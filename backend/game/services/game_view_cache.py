@@ -0,0 +1,325 @@
+"""
+Read-through cache for serialized game views.
+
+Holds the public (hand-free) serialization of each GameState, the per-player
+hand overlays and the game detail payload, in an in-process LRU and,
+optionally, in Redis so every worker shares them. Entries are keyed by a
+version number rather than expired: GameState.state_version is bumped by
+every commit, and game level mutations (joins, turns, endings) bump a
+per-game version held by the cache. A bump drops the superseded entries, so
+a reader never sees a view older than the version it asked for.
+
+Without Redis the per-game versions are only known to this process, so a
+worker would keep serving a detail that another worker has since changed.
+The cache is therefore only enabled by default when Redis is configured;
+enable it explicitly without Redis only when a single worker serves the
+games (see game_state_engine).
+"""
+
+import functools
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_REDIS_TTL = 3600
+KEY_PREFIX = "game_view"
+
+
+class GameViewCache:
+    """
+    Versioned LRU of serialized game views with an optional Redis tier.
+    """
+
+    def __init__(self, enabled=True, max_entries=DEFAULT_MAX_ENTRIES, redis_client=None,
+                 redis_ttl=DEFAULT_REDIS_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            enabled: Whether views are cached at all
+            max_entries: Views kept in the in-process LRU
+            redis_client: redis.Redis instance for the shared tier, or None
+            redis_ttl: Seconds before an untouched Redis entry is reclaimed;
+                only bounds memory, invalidation does not depend on it
+        """
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self.redis_ttl = redis_ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Versions
+
+    def version(self, scope):
+        """
+        Get the current version of a scope.
+
+        Args:
+            scope: e.g. "game:<uid>"
+
+        Returns:
+            int: The version, or None if it cannot be determined
+        """
+        if self.redis is None:
+            with self._lock:
+                return self._versions.get(scope, 0)
+
+        try:
+            value = self.redis.get(self._version_key(scope))
+        except Exception as e:
+            logger.warning(f"Game view cache version lookup failed: {str(e)}")
+            return None
+        return int(value) if value is not None else 0
+
+    def invalidate(self, scope, version=None):
+        """
+        Move a scope to a new version, dropping the views of the old one.
+
+        Args:
+            scope: e.g. "game:<uid>" or "state:<uid>"
+            version: The new version when the caller tracks it (GameState),
+                None to increment the version held by the cache
+        """
+        if version is None:
+            version = self._next_version(scope)
+
+        with self._lock:
+            if version is not None:
+                self._versions[scope] = version
+            for key in [key for key in self._entries if key[0] == scope and key[1] != version]:
+                del self._entries[key]
+
+        if self.redis is not None and version is not None:
+            try:
+                self.redis.delete(self._entry_key(scope, version - 1))
+            except Exception as e:
+                logger.warning(f"Game view cache invalidation failed: {str(e)}")
+
+    def _next_version(self, scope):
+        """Increment the version held by the cache, None if Redis is unreachable"""
+        if self.redis is None:
+            with self._lock:
+                return self._versions.get(scope, 0) + 1
+
+        try:
+            return self.redis.incr(self._version_key(scope))
+        except Exception as e:
+            logger.warning(f"Game view cache invalidation failed: {str(e)}")
+            return None
+
+    # Entries
+
+    def get_or_set(self, scope, part, compute, version=None):
+        """
+        Get a view, computing and storing it on a miss.
+
+        Args:
+            scope: e.g. "game:<uid>"
+            part: Which view of the scope, e.g. "detail"
+            compute: Callable building the view; None results are not cached
+            version: The scope's version when the caller knows it
+
+        Returns:
+            The cached or freshly computed view. Callers must not mutate it.
+        """
+        if not self.enabled:
+            return compute()
+
+        version, value = self._lookup(scope, part, version)
+        if value is None:
+            value = compute()
+            self._store(scope, version, part, value)
+        return value
+
+    async def aget_or_set(self, scope, part, compute, version=None):
+        """
+        Like get_or_set, for a coroutine function computing the view.
+        """
+        if not self.enabled:
+            return await compute()
+
+        version, value = self._lookup(scope, part, version)
+        if value is None:
+            value = await compute()
+            self._store(scope, version, part, value)
+        return value
+
+    def _lookup(self, scope, part, version):
+        """Find a cached view; returns (version, view or None)"""
+        if version is None:
+            version = self.version(scope)
+            if version is None:
+                return None, None
+
+        key = (scope, version, part)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return version, self._entries[key]
+
+        value = self._redis_get(scope, version, part)
+        if value is None:
+            self.misses += 1
+            return version, None
+
+        self.hits += 1
+        self._remember(key, value)
+        return version, value
+
+    def _store(self, scope, version, part, value):
+        """Cache a freshly computed view, unless it is None or unversioned"""
+        if value is None or version is None:
+            return
+        self._redis_set(scope, version, part, value)
+        self._remember((scope, version, part), value)
+
+    def _remember(self, key, value):
+        """Keep a view in the in-process LRU"""
+        scope, version, part = key
+        with self._lock:
+            # A concurrent bump makes this version unreachable; keep only current ones
+            if self._versions.get(scope, version) <= version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every view held in this process."""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    # Game views
+
+    def state_view(self, state, for_player_id=None):
+        """
+        Get GameState.serialize(for_player_id) from the cache.
+
+        Args:
+            state: A committed GameState
+            for_player_id: Player whose hand is included
+
+        Returns:
+            dict: The serialized state
+        """
+        scope = f"state:{state.uid}"
+        version = state.state_version or 0
+        public = self.get_or_set(scope, "public", state.serialize, version)
+        if for_player_id is None or for_player_id not in public["players"]:
+            return dict(public)
+
+        hand = self.get_or_set(
+            scope, f"hand:{for_player_id}", lambda: list(state.player_states[for_player_id]["hand"]), version
+        )
+        players = dict(public["players"])
+        players[for_player_id] = dict(players[for_player_id], hand=hand)
+        return dict(public, players=players)
+
+    def game_detail(self, game_uid, loader):
+        """
+        Get a game's detail payload from the cache.
+
+        Args:
+            game_uid: The uid of the game
+            loader: Callable returning the payload, or None for a missing game
+
+        Returns:
+            dict: The payload, or None
+        """
+        return self.get_or_set(f"game:{game_uid}", "detail", loader)
+
+    async def agame_detail(self, game_uid, loader):
+        """
+        Like game_detail, for a coroutine function loading the payload.
+        """
+        return await self.aget_or_set(f"game:{game_uid}", "detail", loader)
+
+    # Redis tier
+
+    @staticmethod
+    def _version_key(scope):
+        return f"{KEY_PREFIX}:{scope}:version"
+
+    @staticmethod
+    def _entry_key(scope, version):
+        return f"{KEY_PREFIX}:{scope}:{version}"
+
+    def _redis_get(self, scope, version, part):
+        if self.redis is None:
+            return None
+        try:
+            value = self.redis.hget(self._entry_key(scope, version), part)
+        except Exception as e:
+            logger.warning(f"Game view cache read failed: {str(e)}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    def _redis_set(self, scope, version, part, value):
+        if self.redis is None:
+            return
+        key = self._entry_key(scope, version)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(key, part, json.dumps(value, separators=(",", ":")))
+            pipe.expire(key, self.redis_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Game view cache write failed: {str(e)}")
+
+
+def invalidates_game_views(func):
+    """
+    Decorate a GameService mutation taking game_uid first so the game's
+    cached views are invalidated once it returns.
+    """
+    @functools.wraps(func)
+    def wrapper(game_uid, *args, **kwargs):
+        try:
+            return func(game_uid, *args, **kwargs)
+        finally:
+            get_game_view_cache().invalidate(f"game:{game_uid}")
+
+    return wrapper
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_game_view_cache():
+    """
+    Get the process-wide game view cache.
+
+    Returns:
+        GameViewCache: The cache configured from settings
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                redis_client = None
+                redis_url = getattr(settings, "GAME_VIEW_CACHE_REDIS_URL", None)
+                if redis_url:
+                    import redis
+                    redis_client = redis.Redis.from_url(redis_url, socket_timeout=0.25)
+                _cache = GameViewCache(
+                    enabled=getattr(settings, "GAME_VIEW_CACHE_ENABLED", bool(redis_url)),
+                    max_entries=getattr(settings, "GAME_VIEW_CACHE_SIZE", DEFAULT_MAX_ENTRIES),
+                    redis_client=redis_client,
+                    redis_ttl=getattr(settings, "GAME_VIEW_CACHE_REDIS_TTL", DEFAULT_REDIS_TTL)
+                )
+
+    return _cache
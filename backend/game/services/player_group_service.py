@@ -1,9 +1,10 @@
 from datetime import datetime
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from backend.card_game.notification_dispatch import send_to_group, send_to_groups
 
 from backend.game.models import Game, Player, PlayerGroup, PlayerGroupInvitation
 from backend.game.services import GameService
+from backend.game.services.game_view_cache import invalidates_game_views
 
 
 class PlayerGroupService:
@@ -181,12 +182,12 @@ class PlayerGroupService:
         group.delete()
 
         # Send notifications to all members
-        for member in members:
-            PlayerGroupService.send_group_deleted_notification(group_uid, member)
+        PlayerGroupService.send_group_deleted_notification(group_uid, members)
 
         return True
 
     @staticmethod
+    @invalidates_game_views
     def invite_group_to_game(game_uid, group_uid, inviter_uid):
         """Invite an entire group to a game"""
         game = Game.nodes.get(uid=game_uid)
@@ -252,7 +253,8 @@ class PlayerGroupService:
             }
 
             # Send to the invitee's personal channel
-            async_to_sync(channel_layer.group_send)(
+            send_to_group(
+                channel_layer,
                 f'user_{invitee.uid}',
                 {
                     'type': 'group_invitation',
@@ -280,7 +282,8 @@ class PlayerGroupService:
 
             # Send to the group owner's personal channel
             owner = group.owner.get()
-            async_to_sync(channel_layer.group_send)(
+            send_to_group(
+                channel_layer,
                 f'user_{owner.user_uid}',
                 {
                     'type': 'group_invitation_response',
@@ -290,21 +293,21 @@ class PlayerGroupService:
 
             # If accepted, notify all group members
             if response == 'accepted':
-                for member in group.members.all():
-                    if member.user_uid != player.user_uid and member.user_uid != owner.user_uid:
-                        async_to_sync(channel_layer.group_send)(
-                            f'user_{member.user_uid}',
-                            {
-                                'type': 'group_member_joined',
-                                'data': {
-                                    'group_uid': group.group_uid,
-                                    'group_name': group.name,
-                                    'user_uid': player.user_uid,
-                                    'username': player.username,
-                                    'timestamp': datetime.now().isoformat()
-                                }
-                            }
-                        )
+                message = {
+                    'type': 'group_member_joined',
+                    'data': {
+                        'group_uid': group.group_uid,
+                        'group_name': group.name,
+                        'user_uid': player.user_uid,
+                        'username': player.username,
+                        'timestamp': datetime.now().isoformat()
+                    }
+                }
+                send_to_groups(channel_layer, [
+                    (f'user_{member.user_uid}', message)
+                    for member in group.members.all()
+                    if member.user_uid != player.user_uid and member.user_uid != owner.user_uid
+                ])
         except Exception as e:
             print(f"Error sending group invitation response notification: {str(e)}")
 
@@ -324,7 +327,8 @@ class PlayerGroupService:
             }
 
             # Send to the removed player
-            async_to_sync(channel_layer.group_send)(
+            send_to_group(
+                channel_layer,
                 f'user_{player.user_uid}',
                 {
                     'type': 'group_removed_from',
@@ -333,15 +337,14 @@ class PlayerGroupService:
             )
 
             # Notify all remaining group members
-            for member in group.members.all():
-                if member.user_uid != player.user_uid:
-                    async_to_sync(channel_layer.group_send)(
-                        f'user_{member.user_uid}',
-                        {
-                            'type': 'group_member_removed',
-                            'data': notification_data
-                        }
-                    )
+            message = {
+                'type': 'group_member_removed',
+                'data': notification_data
+            }
+            send_to_groups(channel_layer, [
+                (f'user_{member.user_uid}', message)
+                for member in group.members.all() if member.user_uid != player.user_uid
+            ])
         except Exception as e:
             print(f"Error sending group member removed notification: {str(e)}")
 
@@ -361,38 +364,34 @@ class PlayerGroupService:
             }
 
             # Notify all remaining group members
-            for member in group.members.all():
-                if member.user_uid != player.user_uid:
-                    async_to_sync(channel_layer.group_send)(
-                        f'user_{member.user_uid}',
-                        {
-                            'type': 'group_member_left',
-                            'data': notification_data
-                        }
-                    )
+            message = {
+                'type': 'group_member_left',
+                'data': notification_data
+            }
+            send_to_groups(channel_layer, [
+                (f'user_{member.user_uid}', message)
+                for member in group.members.all() if member.user_uid != player.user_uid
+            ])
         except Exception as e:
             print(f"Error sending group member left notification: {str(e)}")
 
     @staticmethod
-    def send_group_deleted_notification(group_uid, player):
-        """Send a notification that a group has been deleted"""
+    def send_group_deleted_notification(group_uid, players):
+        """Send a notification to the former members that a group has been deleted"""
         try:
             channel_layer = get_channel_layer()
 
-            # Prepare the notification data
-            notification_data = {
-                'group_uid': group_uid,
-                'timestamp': datetime.now().isoformat()
+            # Prepare the notification once for every member
+            message = {
+                'type': 'group_deleted',
+                'data': {
+                    'group_uid': group_uid,
+                    'timestamp': datetime.now().isoformat()
+                }
             }
 
-            # Send to the player
-            async_to_sync(channel_layer.group_send)(
-                f'user_{player.uid}',
-                {
-                    'type': 'group_deleted',
-                    'data': notification_data
-                }
-            )
+            # Send to the players
+            send_to_groups(channel_layer, [(f'user_{player.uid}', message) for player in players])
         except Exception as e:
             print(f"Error sending group deleted notification: {str(e)}")
 
@@ -414,18 +413,13 @@ class PlayerGroupService:
                 'timestamp': datetime.now().isoformat()
             }
 
-            # Send to all group members
-            for member in group.members.all():
-                # Skip the inviter
-                if member.uid == inviter.uid:
-                    continue
-
-                async_to_sync(channel_layer.group_send)(
-                    f'user_{member.uid}',
-                    {
-                        'type': 'group_game_invitation',
-                        'data': notification_data
-                    }
-                )
+            # Send to all group members except the inviter
+            message = {
+                'type': 'group_game_invitation',
+                'data': notification_data
+            }
+            send_to_groups(channel_layer, [
+                (f'user_{member.uid}', message) for member in group.members.all() if member.uid != inviter.uid
+            ])
         except Exception as e:
             print(f"Error sending group game invitation notification: {str(e)}")
@@ -8,7 +8,8 @@ from .idiot_chain_handler import IdiotChainHandler
 from .idiot_decision_handler import IdiotDecisionHandler
 from .idiot_state_tracker import IdiotStateTracker
 from .action_card_rule_interpreter import ActionCardRuleInterpreter
-from .base import get_rule_interpreter
+from .compiled_rule_set import CompiledRuleSet, get_compiled_rule_set, invalidate_compiled_rule_set
+from .base import InterpreterPool, get_rule_interpreter
 
 __all__ = [
     "ChainHandler",
@@ -21,5 +22,9 @@ __all__ = [
     "IdiotDecisionHandler",
     "IdiotStateTracker",
     "ActionCardRuleInterpreter",
+    "CompiledRuleSet",
+    "get_compiled_rule_set",
+    "invalidate_compiled_rule_set",
+    "InterpreterPool",
     "get_rule_interpreter"
 ]
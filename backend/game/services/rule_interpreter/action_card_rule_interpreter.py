@@ -5,17 +5,19 @@ from .basic_state_tracker import BasicStateTracker
 from .idiot_chain_handler import IdiotChainHandler
 from .idiot_decision_handler import IdiotDecisionHandler
 from .idiot_state_tracker import IdiotStateTracker
+from .compiled_rule_set import get_compiled_rule_set
 
 class ActionCardRuleInterpreter(GameRuleInterpreter):
     """Rule interpreter for action card games with extension points for complex rules"""
 
     def __init__(self, rule_set):
         super().__init__(rule_set)
-        self.card_actions = self.parameters.get("card_actions", {})
-        self.targeting_rules = self.parameters.get("targeting_rules", {})
-        self.turn_flow = self.parameters.get("turn_flow", {})
-        self.win_conditions = self.parameters.get("win_conditions", [])
-        self.play_rules = self.parameters.get("play_rules", {})
+        self.compiled = get_compiled_rule_set(rule_set)
+        self.card_actions = self.compiled.card_actions
+        self.targeting_rules = self.compiled.targeting_rules
+        self.turn_flow = self.compiled.turn_flow
+        self.win_conditions = self.compiled.win_conditions
+        self.play_rules = self.compiled.play_rules
 
         # Initialize game-specific extensions
         self.extensions = {}
@@ -37,6 +39,22 @@ class ActionCardRuleInterpreter(GameRuleInterpreter):
             self.extensions["decision_handler"] = IdiotDecisionHandler()
             self.extensions["state_tracker"] = IdiotStateTracker()
 
+        # Chain handlers look up counter cards and other extensions themselves
+        chain_handler = self.extensions.get("chain_handler")
+        if chain_handler:
+            chain_handler.card_actions = self.card_actions
+            chain_handler.extensions = self.extensions
+
+    def set_policy(self, policy):
+        """
+        Replace the source of random decisions made by the extensions
+
+        Args:
+            policy: Object with a choice() method, such as a seeded random.Random
+        """
+        for extension in self.extensions.values():
+            extension.policy = policy
+
     def get_card_action(self, card):
         """
         Get the action for a specific card
@@ -47,8 +65,7 @@ class ActionCardRuleInterpreter(GameRuleInterpreter):
         Returns:
             dict: Action configuration for the card
         """
-        card_uid = f"{card.suit}_{card.value}"
-        return self.card_actions.get(card_uid)
+        return self.compiled.action_for(card.suit, card.value)
 
     def resolve_target(self, game_state, player, action_config):
         """
@@ -148,11 +165,11 @@ class ActionCardRuleInterpreter(GameRuleInterpreter):
             amount = action_config.get("amount", 1)
             for target in targets:
                 for _ in range(amount):
-                    card = game_state.draw_card()
-                    if card:
+                    drawn = game_state.draw_card()
+                    if drawn:
                         target_state = game_state.player_states.get(target.id)
                         if target_state:
-                            target_state["hand"].append(card)
+                            target_state["hand"].append(drawn)
 
         elif effect == "give_card":
             # Implementation for giving a card to another player
@@ -177,11 +194,11 @@ class ActionCardRuleInterpreter(GameRuleInterpreter):
             amount = action_config.get("amount", 1)
             for target in targets:
                 for _ in range(amount):
-                    card = game_state.draw_card()
-                    if card:
+                    drawn = game_state.draw_card()
+                    if drawn:
                         target_state = game_state.player_states.get(target.id)
                         if target_state:
-                            target_state["hand"].append(card)
+                            target_state["hand"].append(drawn)
                 game_state.skipped_players.append(target.id)
 
         elif effect == "play_again":
@@ -320,22 +337,20 @@ class ActionCardRuleInterpreter(GameRuleInterpreter):
                                 game_state, player_uid
                             )
                             if penalty:
-                                player_state["score"] += penalty
+                                player_state["score"] = player_state.get("score", 0) + penalty
 
                         # Check for special last card points
                         special_points = self.play_rules.get("last_card_special_points", {})
-                        if last_card.value in special_points:
-                            points = special_points[last_card.value]
-                            if isinstance(points, int):
-                                player_state["score"] += points
-                            elif points == "continue_if_countered" and last_card.value == "7":
-                                # Special case for 7 as last card
-                                if not getattr(game_state, "countered_last_7", False):
-                                    game_state.winner_id = player_uid
-                                    game_state.game_over = True
-                    else:
-                        game_state.winner_id = player_uid
-                        game_state.game_over = True
+                        points = special_points.get(last_card.value)
+                        if isinstance(points, int):
+                            player_state["score"] = player_state.get("score", 0) + points
+                        elif points == "continue_if_countered" and last_card.value == "7":
+                            # Special case for 7 as last card: the game goes on if it was countered
+                            if getattr(game_state, "countered_last_7", False):
+                                continue
+
+                    game_state.winner_id = player_uid
+                    game_state.game_over = True
 
         # Determine next player based on turn flow
         if not game_state.game_over:
@@ -383,6 +398,9 @@ class ActionCardRuleInterpreter(GameRuleInterpreter):
             "value": card.value
         })
 
+        # A suit chosen with a Jack only applies to the play after it
+        game_state.current_suit = None
+
         # Store last card and player for win condition checking
         game_state.last_card = card
         game_state.last_player = player_state["id"]
@@ -1,8 +1,89 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
 from .action_card_rule_interpreter import ActionCardRuleInterpreter
+from .compiled_rule_set import get_compiled_rule_set
 
-def get_rule_interpreter(rule_set):
+DEFAULT_POOL_SIZE = 128
+
+
+class InterpreterPool:
     """
-    Factory function to get the appropriate rule interpreter
+    Bounded LRU registry of rule interpreters keyed by rule set uid and version.
+
+    Interpreters and their extensions hold no per-game state, so one warm
+    instance is shared by every game using the same rule set.
+    """
+
+    def __init__(self, max_size=DEFAULT_POOL_SIZE):
+        """
+        Initialize the pool
+
+        Args:
+            max_size (int): Maximum number of interpreters kept
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._interpreters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, rule_set):
+        """
+        Get a warm interpreter for a rule set, building it on a miss
+
+        Args:
+            rule_set (GameRuleSet): The rule set to interpret
+
+        Returns:
+            GameRuleInterpreter: The pooled interpreter
+        """
+        key = (getattr(rule_set, "uid", None), rule_set.version)
+        if not all(isinstance(part, str) for part in key):
+            return _build_interpreter(rule_set)
+
+        compiled = get_compiled_rule_set(rule_set)
+
+        with self._lock:
+            interpreter = self._interpreters.get(key)
+            # A rule set saved since the interpreter was built has been recompiled
+            if interpreter is not None and interpreter.compiled is compiled:
+                self._interpreters.move_to_end(key)
+                self.hits += 1
+                return interpreter
+            self.misses += 1
+
+        interpreter = _build_interpreter(rule_set)
+
+        with self._lock:
+            self._interpreters[key] = interpreter
+            self._interpreters.move_to_end(key)
+            while len(self._interpreters) > self.max_size:
+                self._interpreters.popitem(last=False)
+
+        return interpreter
+
+    def stats(self):
+        """
+        Get the pool counters
+
+        Returns:
+            dict: Size, hits and misses
+        """
+        with self._lock:
+            return {"size": len(self._interpreters), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """Drop every pooled interpreter"""
+        with self._lock:
+            self._interpreters.clear()
+
+
+def _build_interpreter(rule_set):
+    """
+    Build a new interpreter for a rule set
 
     Args:
         rule_set (GameRuleSet): The rule set to interpret
@@ -18,3 +99,19 @@ def get_rule_interpreter(rule_set):
         return ActionCardRuleInterpreter(rule_set)  # Uses the same interpreter with different extensions
     else:
         raise ValueError(f"No interpreter available for game type: {game_type}")
+
+
+interpreter_pool = InterpreterPool(getattr(settings, "RULE_INTERPRETER_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+
+def get_rule_interpreter(rule_set):
+    """
+    Factory function to get the appropriate rule interpreter
+
+    Args:
+        rule_set (GameRuleSet): The rule set to interpret
+
+    Returns:
+        GameRuleInterpreter: An appropriate interpreter instance
+    """
+    return interpreter_pool.get(rule_set)
@@ -35,8 +35,7 @@ class BasicStateTracker(StateTracker):
         """Check if a player announced having one card"""
         # In a real implementation, this would check if the player actually announced
         # For now, just return a random result
-        import random
-        return random.choice([True, False])
+        return self.policy.choice([True, False])
 
     def check_equal_sum_penalty(self, game_state, winner_id):
         """Check for equal sum penalty condition"""
@@ -1,6 +1,17 @@
+import random
+
+
 class ChainHandler:
     """Interface for handling chain actions like 7-8-10 sequences"""
 
+    # Source of the random choices stood in for player decisions; anything with
+    # a choice() method, e.g. a seeded random.Random in the simulator
+    policy = random
+
+    # Set by the interpreter that registers the handler
+    card_actions = {}
+    extensions = {}
+
     def start_chain(self, game_state, player, card, action_config, targets):
         """Start a new chain action"""
         pass
@@ -0,0 +1,136 @@
+"""
+Compiled rule sets.
+
+Turns a GameRuleSet's parameters into lookup tables indexed by card code
+once per saved rule set and version, so applying a card no longer formats string
+keys or walks the graph to reach the rule set.
+"""
+
+import threading
+
+from backend.game.services.card_codec import CardCodec
+
+
+class CompiledRuleSet:
+    """
+    Dense per-card lookup tables built from a rule set's parameters.
+    """
+
+    def __init__(self, rule_set):
+        """
+        Compile a rule set.
+
+        Args:
+            rule_set (GameRuleSet): The rule set to compile
+        """
+        parameters = rule_set.parameters
+        self.rule_set = rule_set
+        self.version = rule_set.version
+        self.codec = CardCodec(parameters.get("deck_configuration", {}))
+
+        self.card_actions = parameters.get("card_actions", {})
+        self.targeting_rules = parameters.get("targeting_rules", {})
+        self.turn_flow = parameters.get("turn_flow", {})
+        self.win_conditions = parameters.get("win_conditions", [])
+        self.play_rules = parameters.get("play_rules", {})
+        self.initial_direction = self.turn_flow.get("initial_direction", "clockwise")
+
+        # Actions by card code; keys that don't name a deck card stay in a dict
+        self.action_table = [None] * self.codec.size
+        self.extra_actions = {}
+        for key, action in self.card_actions.items():
+            suit, _, value = key.rpartition("_")
+            code = self.codec.encode(suit, value)
+            if code is None:
+                self.extra_actions[key] = action
+            else:
+                self.action_table[code] = action
+
+    def card_code(self, suit, value):
+        """
+        Get the code of a card, accepting suits in any case.
+
+        Args:
+            suit: Suit name
+            value: Value name
+
+        Returns:
+            int: The card code, or None if the card is not part of the deck
+        """
+        code = self.codec.encode(suit, value)
+        if code is None and isinstance(suit, str):
+            code = self.codec.encode(suit.lower(), value)
+        return code
+
+    def action_for(self, suit, value):
+        """
+        Get the action configured for a card.
+
+        Args:
+            suit: Suit name
+            value: Value name
+
+        Returns:
+            dict: The action configuration, or None if the card has none
+        """
+        code = self.card_code(suit, value)
+        if code is not None:
+            return self.action_table[code]
+        action = self.extra_actions.get(f"{suit}_{value}")
+        if action is None and isinstance(suit, str):
+            action = self.extra_actions.get(f"{suit.lower()}_{value}")
+        return action
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_rule_set(rule_set):
+    """
+    Get the compiled form of a rule set, compiling it once per saved rule set and version.
+
+    Args:
+        rule_set (GameRuleSet): The rule set
+
+    Returns:
+        CompiledRuleSet: The compiled rule set
+    """
+    key = (getattr(rule_set, "uid", None), rule_set.version)
+    if not all(isinstance(part, str) for part in key):
+        return CompiledRuleSet(rule_set)
+
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = CompiledRuleSet(rule_set)
+        with _compiled_lock:
+            compiled = _compiled.setdefault(key, compiled)
+    return compiled
+
+
+def get_cached_rule_set(uid, version):
+    """
+    Get an already compiled rule set without loading it.
+
+    Args:
+        uid (str): The rule set uid
+        version (str): The rule set version
+
+    Returns:
+        CompiledRuleSet: The compiled rule set, or None if it is not cached
+    """
+    if not uid or not version:
+        return None
+    return _compiled.get((uid, version))
+
+
+def invalidate_compiled_rule_set(uid):
+    """
+    Drop the compiled forms of a rule set after it changes.
+
+    Args:
+        uid (str): The rule set uid
+    """
+    with _compiled_lock:
+        for key in [key for key in _compiled if key[0] == uid]:
+            del _compiled[key]
@@ -94,8 +94,7 @@ class IdiotChainHandler(ChainHandler):
 
                 # In a real implementation, this would interact with the UI
                 # For now, just randomly choose
-                import random
-                if random.choice([True, False]):
+                if self.policy.choice([True, False]):
                     # Increase the penalty
                     increase_amount = chain_counter.get("increase_amount", 3)
                     chain_context["current_amount"] += increase_amount
@@ -138,3 +137,5 @@ class IdiotChainHandler(ChainHandler):
 
             # Reset the chain
             game_state.chain_context = None
+
+        return game_state
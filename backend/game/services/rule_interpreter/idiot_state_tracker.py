@@ -36,8 +36,7 @@ class IdiotStateTracker(StateTracker):
         """Check if a player announced having one card"""
         # In a real implementation, this would check if the player actually announced
         # For now, just return a random result
-        import random
-        return random.choice([True, False])
+        return self.policy.choice([True, False])
 
     def check_equal_sum_penalty(self, game_state, winner_id):
         """
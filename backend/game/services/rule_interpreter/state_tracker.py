@@ -1,7 +1,14 @@
 
+import random
+
+
 class StateTracker:
     """Interface for tracking game-specific state"""
 
+    # Source of the random choices stood in for player decisions; anything with
+    # a choice() method, e.g. a seeded random.Random in the simulator
+    policy = random
+
     def mark_revealed_card(self, game_state, player, action_config):
         """Mark a card as revealed (can't be played)"""
         pass
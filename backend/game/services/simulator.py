@@ -0,0 +1,319 @@
+"""
+Headless game simulator.
+
+Plays complete games of a rule set against ActionCardRuleInterpreter using
+a pure in-memory game state, without Neo4j, channels or HTTP. Every random
+decision (shuffles, the card a player picks, the choices the rule handlers
+make on a player's behalf) comes from one seeded random.Random per game, so
+a run is reproducible for a given seed whatever the number of workers.
+
+Games are spread over a process pool and the results report throughput,
+turns per game and which card actions were exercised.
+"""
+
+import os
+import random
+import statistics
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.game.models.game_rule_set import GameRuleSet
+from backend.game.models.game_state import PlayerState
+from backend.game.services.game_service_utils.action import Action
+from backend.game.services.game_service_utils.create_deck import create_deck
+from backend.game.services.game_service_utils.create_idiot_rule_set import idiot_rule_set_config
+from backend.game.services.game_service_utils.create_uno_rule_set import uno_rule_set_config
+from backend.game.services.rule_interpreter.action_card_rule_interpreter import ActionCardRuleInterpreter
+
+RULE_SETS = {
+    "idiot": ("idiot_cards", idiot_rule_set_config),
+    "uno": ("action_cards", uno_rule_set_config),
+}
+
+PARAMETER_KEYS = (
+    "deck_configuration",
+    "card_actions",
+    "targeting_rules",
+    "turn_flow",
+    "win_conditions",
+    "play_rules",
+    "dealing_config",
+)
+
+DEFAULT_MAX_TURNS = 500
+
+
+class SimulatedCard:
+    """Card being played, compared with hand entries by id"""
+
+    __slots__ = ("id", "suit", "value")
+
+    def __init__(self, card):
+        self.id = card["id"]
+        self.suit = card["suit"]
+        self.value = card["value"]
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self.id == other.get("id")
+        return isinstance(other, SimulatedCard) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class SimulatedGameState:
+    """In-memory stand-in for GameState with the attributes the interpreter uses"""
+
+    def __init__(self, player_ids, deck, cards_per_player, direction, rng):
+        """
+        Deal a new game
+
+        Args:
+            player_ids (list): Seat order of the players
+            deck (list): Shuffled card dicts
+            cards_per_player (int): Cards dealt to each player
+            direction (str): Initial direction of play
+            rng (random.Random): Source of randomness for reshuffles
+        """
+        self.rng = rng
+        self.draw_pile = deque(deck)
+        self.discard_pile = []
+        self.player_states = {
+            player_id: PlayerState(id=player_id, hand=[], score=0, announced_one_card=False)
+            for player_id in player_ids
+        }
+        for player_state in self.player_states.values():
+            for _ in range(cards_per_player):
+                card = self.draw_card()
+                if card:
+                    player_state["hand"].append(card)
+        self.discard_pile.append(self.draw_card())
+
+        self.current_player_uid = player_ids[0]
+        self.next_player_uid = None
+        self.direction = direction
+        self.skipped_players = []
+        self.game_over = False
+        self.winner_id = None
+        self.current_suit = None
+        self.chain_context = None
+
+    @property
+    def current_player(self):
+        return self.player_states.get(self.current_player_uid, {})
+
+    @property
+    def players(self):
+        return list(self.player_states.values())
+
+    def draw_card(self):
+        """Draw from the top of the draw pile, reshuffling the discard pile when it runs out"""
+        if not self.draw_pile and len(self.discard_pile) > 1:
+            top_card = self.discard_pile[-1]
+            reshuffled = self.discard_pile[:-1]
+            self.rng.shuffle(reshuffled)
+            self.draw_pile = deque(reshuffled)
+            self.discard_pile = [top_card]
+
+        if not self.draw_pile:
+            return None
+        return self.draw_pile.popleft()
+
+
+def build_rule_set(name):
+    """
+    Build an unsaved rule set from one of the built-in configurations
+
+    Args:
+        name (str): Key of RULE_SETS
+
+    Returns:
+        GameRuleSet: Rule set that is never written to Neo4j
+    """
+    game_type, build_config = RULE_SETS[name]
+    config = build_config()
+    return GameRuleSet(
+        version=f"{game_type}-simulated",
+        name=config["name"],
+        description=config["description"],
+        parameters={key: config[key] for key in PARAMETER_KEYS if key in config}
+    )
+
+
+def play_game(interpreter, seed, num_players=4, max_turns=DEFAULT_MAX_TURNS):
+    """
+    Play one game to the end or to the turn limit
+
+    Args:
+        interpreter (ActionCardRuleInterpreter): Interpreter for the rule set
+        seed (int): Seed for every random decision in the game
+        num_players (int): Number of players
+        max_turns (int): Turns after which the game is abandoned
+
+    Returns:
+        dict: Turns taken, winner seat and the card actions played
+    """
+    rng = random.Random(seed)
+    interpreter.set_policy(rng)
+    parameters = interpreter.parameters
+
+    deck = create_deck(parameters.get("deck_configuration", {}), None)
+    for index, card in enumerate(deck):
+        card["id"] = f"c{index}"
+    rng.shuffle(deck)
+
+    player_ids = [f"p{seat}" for seat in range(num_players)]
+    state = SimulatedGameState(
+        player_ids,
+        deck,
+        parameters.get("dealing_config", {}).get("cards_per_player", 7),
+        interpreter.turn_flow.get("initial_direction", "clockwise"),
+        rng
+    )
+
+    actions = Counter()
+    turns = 0
+    while not state.game_over and turns < max_turns:
+        turns += 1
+        player_state = state.current_player
+
+        playable = _playable_cards(interpreter, state, player_state)
+        if not playable and state.chain_context:
+            # Nothing to counter with: the penalty stands and the chain ends
+            state.chain_context = None
+            playable = _playable_cards(interpreter, state, player_state)
+
+        if playable:
+            card = rng.choice(playable)
+            key = f"{card.suit}_{card.value}"
+            if key in interpreter.card_actions:
+                actions[key] += 1
+            state = interpreter.process_card_play(state, player_state, card)
+        else:
+            card = state.draw_card()
+            if card:
+                player_state["hand"].append(card)
+
+        state = interpreter.apply_rules(state)
+        if not state.game_over:
+            state.current_player_uid = state.next_player_uid
+            state.next_player_uid = None
+
+    return {
+        "turns": turns,
+        "finished": state.game_over,
+        "winner_seat": player_ids.index(state.winner_id) if state.winner_id in player_ids else None,
+        "actions": actions,
+    }
+
+
+def _playable_cards(interpreter, state, player_state):
+    """Cards in a player's hand that the interpreter accepts"""
+    playable = []
+    for card in player_state["hand"]:
+        candidate = SimulatedCard(card)
+        if interpreter.validate_action(state, player_state, Action(type="play_card", card=candidate)):
+            playable.append(candidate)
+    return playable
+
+
+def _run_batch(rule_set_name, seeds, num_players, max_turns):
+    """
+    Play a batch of games in a worker process
+
+    Returns:
+        dict: Partial results to be merged by simulate()
+    """
+    interpreter = ActionCardRuleInterpreter(build_rule_set(rule_set_name))
+
+    turns = []
+    finished = 0
+    wins = Counter()
+    actions = Counter()
+    for seed in seeds:
+        result = play_game(interpreter, seed, num_players, max_turns)
+        turns.append(result["turns"])
+        actions.update(result["actions"])
+        if result["finished"]:
+            finished += 1
+            wins[result["winner_seat"]] += 1
+
+    return {"turns": turns, "finished": finished, "wins": wins, "actions": actions}
+
+
+def simulate(rule_set_name="idiot", games=1000, num_players=4, workers=None, seed=0,
+             max_turns=DEFAULT_MAX_TURNS):
+    """
+    Simulate many games of a rule set across a process pool
+
+    Args:
+        rule_set_name (str): Key of RULE_SETS
+        games (int): Number of games to play
+        num_players (int): Players per game
+        workers (int): Worker processes, defaults to the number of CPUs;
+            1 plays every game in this process
+        seed (int): Seed of the first game; game i uses seed + i
+        max_turns (int): Turns after which a game is abandoned
+
+    Returns:
+        dict: Throughput, turns per game, seat win rates and rule coverage
+    """
+    if rule_set_name not in RULE_SETS:
+        raise ValueError(f"Unknown rule set: {rule_set_name}")
+
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i::workers] for i in range(workers) if seeds[i::workers]]
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_run_batch(rule_set_name, batch, num_players, max_turns) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_run_batch, rule_set_name, batch, num_players, max_turns)
+                for batch in batches
+            ]
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    turns = []
+    finished = 0
+    wins = Counter()
+    actions = Counter()
+    for result in results:
+        turns.extend(result["turns"])
+        finished += result["finished"]
+        wins.update(result["wins"])
+        actions.update(result["actions"])
+
+    defined_actions = build_rule_set(rule_set_name).parameters.get("card_actions", {})
+    covered = [key for key in defined_actions if actions[key]]
+
+    return {
+        "rule_set": rule_set_name,
+        "games": games,
+        "players": num_players,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(games / elapsed, 1) if elapsed else None,
+        "finished": finished,
+        "turns": {
+            "mean": round(statistics.mean(turns), 1) if turns else 0,
+            "median": statistics.median(turns) if turns else 0,
+            "max": max(turns) if turns else 0,
+        },
+        "win_rate_by_seat": {
+            seat: round(wins[seat] / finished, 3) if finished else 0
+            for seat in range(num_players)
+        },
+        "rule_coverage": {
+            "covered": len(covered),
+            "defined": len(defined_actions),
+            "ratio": round(len(covered) / len(defined_actions), 3) if defined_actions else 1.0,
+            "never_played": sorted(key for key in defined_actions if not actions[key]),
+            "plays": dict(actions.most_common()),
+        },
+    }
@@ -0,0 +1,195 @@
+"""
+Versioned state patches for WebSocket clients.
+
+A client receives one snapshot of a game's state, tagged with
+GameState.state_version, and then one patch per committed move. A patch
+holds the diff_properties operations turning the public view at
+from_version into the view at version, plus each player's hand edits,
+which consumers pass on to that player only. Clients apply the operations
+with the same rules as apply_ops:
+
+    ["s", path, value]                    set the value at path
+    ["d", path]                           delete the key at path
+    ["l", path, removed_indices, added]   drop items from a list and append others
+
+Recent patches are kept per game so a client that missed a few can catch
+up; a client further behind than STATE_PATCH_MAX_GAP versions, or behind
+what is kept, is sent a fresh snapshot instead.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+from backend.game.models.game_state_delta import diff_properties
+from backend.game.services.game_view_cache import get_game_view_cache
+
+DEFAULT_HISTORY = 64
+DEFAULT_MAX_GAMES = 1024
+DEFAULT_MAX_GAP = 16
+
+
+class _GameLog:
+    """Last recorded view of one game and the patches leading to it"""
+
+    __slots__ = ("version", "public", "hands", "patches")
+
+    def __init__(self, version, public, hands, history):
+        self.version = version
+        self.public = public
+        self.hands = hands
+        self.patches = deque(maxlen=history)
+
+
+class StatePatchLog:
+    """
+    Records the patch produced by each committed move of the games in this
+    process.
+    """
+
+    def __init__(self, history=DEFAULT_HISTORY, max_games=DEFAULT_MAX_GAMES):
+        """
+        Initialize the log.
+
+        Args:
+            history: Patches kept per game for clients catching up
+            max_games: Games tracked before the least recently moved is dropped
+        """
+        self.history = history
+        self.max_games = max_games
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, game_uid, state):
+        """
+        Record a committed state. Call with the game's engine lock held so
+        the view and its version match.
+
+        Args:
+            game_uid: The uid of the game
+            state: The GameState just committed
+
+        Returns:
+            dict: The patch event. from_version and ops are None when no
+                earlier view is known, telling consumers to resync.
+        """
+        version = int(state.state_version or 0)
+        public = get_game_view_cache().state_view(state)
+        hands = {player_id: list(player_state["hand"]) for player_id, player_state in state.player_states.items()}
+
+        with self._lock:
+            log = self._games.get(game_uid)
+            if log is None or log.version >= version:
+                log = self._games[game_uid] = _GameLog(version, public, hands, self.history)
+                while len(self._games) > self.max_games:
+                    self._games.popitem(last=False)
+                return {"game_uid": game_uid, "from_version": None, "version": version, "ops": None, "hands": {}}
+
+            patch = {
+                "game_uid": game_uid,
+                "from_version": log.version,
+                "version": version,
+                "ops": diff_properties(log.public, public),
+                "hands": {}
+            }
+            for player_id, hand in hands.items():
+                if log.hands.get(player_id) != hand:
+                    patch["hands"][player_id] = diff_properties(
+                        {"players": {player_id: {"hand": log.hands.get(player_id, [])}}},
+                        {"players": {player_id: {"hand": hand}}}
+                    )
+
+            log.version, log.public, log.hands = version, public, hands
+            log.patches.append(patch)
+            self._games.move_to_end(game_uid)
+            return patch
+
+    def since(self, game_uid, version, max_gap=None):
+        """
+        Get the patches bringing a client from a version to the latest one.
+
+        Args:
+            game_uid: The uid of the game
+            version: The version the client holds
+            max_gap: Give up when the client is further behind than this
+
+        Returns:
+            list: Patches in order, empty if the client is current, or None
+                if the client has to be sent a snapshot
+        """
+        if max_gap is None:
+            max_gap = state_patch_max_gap()
+
+        with self._lock:
+            log = self._games.get(game_uid)
+            if log is None or version > log.version or log.version - version > max_gap:
+                return None
+            if version == log.version:
+                return []
+
+            patches = [patch for patch in log.patches if patch["from_version"] is not None
+                       and patch["from_version"] >= version]
+
+        if not patches or patches[0]["from_version"] != version:
+            return None
+        return patches
+
+    def forget(self, game_uid):
+        """
+        Stop tracking a game, e.g. once it has ended.
+
+        Args:
+            game_uid: The uid of the game
+        """
+        with self._lock:
+            self._games.pop(game_uid, None)
+
+
+def patch_for_player(patch, player_id):
+    """
+    Build the WebSocket message carrying a patch to one player.
+
+    Args:
+        patch: Patch event from StatePatchLog.record
+        player_id: The recipient, whose own hand edits are included
+
+    Returns:
+        dict: The message; ops is None when the client has to resync
+    """
+    ops = patch["ops"]
+    if ops is not None:
+        ops = ops + patch["hands"].get(player_id, [])
+    return {
+        "type": "state_patch",
+        "game_uid": patch["game_uid"],
+        "from_version": patch["from_version"],
+        "version": patch["version"],
+        "ops": ops
+    }
+
+
+def state_patch_max_gap():
+    """Versions a client may be behind and still be sent patches"""
+    return getattr(settings, "STATE_PATCH_MAX_GAP", DEFAULT_MAX_GAP)
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_state_patch_log():
+    """
+    Get the process-wide state patch log.
+
+    Returns:
+        StatePatchLog: The log configured from settings
+    """
+    global _log
+
+    if _log is None:
+        with _log_lock:
+            if _log is None:
+                _log = StatePatchLog(history=getattr(settings, "STATE_PATCH_HISTORY", DEFAULT_HISTORY))
+
+    return _log
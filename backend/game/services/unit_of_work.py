@@ -0,0 +1,188 @@
+"""
+Unit of work for the writes of one game move.
+
+Saving nodes, connecting relationships and persisting the game state one
+call at a time costs a round trip and an implicit transaction each, so a
+worker dying mid-move could leave the move half applied. A UnitOfWork
+collects the writes instead and commits them as a single statement in one
+explicit transaction when the block ends:
+
+    with UnitOfWork() as unit:
+        unit.save(game_card)
+        unit.connect(game_action, "game", game)
+        game_state.commit(unit)
+
+Each staged write becomes a unit subquery (CALL { ... }) of that statement,
+with its parameters renamed apart, and the writes apply in the order they
+were staged. Nothing is written if the block raises. Callbacks registered
+with on_commit run once the transaction has committed.
+
+Nodes are matched by label and uid, so only GameBaseModel nodes can take
+part. Nodes created through a unit are not refreshed afterwards; load them
+again by uid to change them outside it.
+"""
+
+import re
+from datetime import datetime
+
+from neomodel import db
+from neomodel.relationship_manager import INCOMING
+
+from backend.game.models.game_state_delta import state_write_statements
+
+PARAMETER = re.compile(r"\$(\w+)")
+
+
+def _relationship(node, name):
+    """Type of a relationship defined on a node's class and its arrow parts for (node)...(other)"""
+    definition = type(node).defined_properties(aliases=False, properties=False)[name].definition
+    relation_type = definition["relation_type"]
+    if definition["direction"] == INCOMING:
+        return relation_type, "<-", "-"
+    return relation_type, "-", "->"
+
+
+class UnitOfWork:
+    """
+    Writes staged for one transaction.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self._callbacks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+    def run(self, query, params=None):
+        """
+        Stage a write statement. It must not return rows.
+
+        Args:
+            query (str): Cypher statement
+            params (dict): Query parameters
+        """
+        self.statements.append((query, params or {}))
+
+    def save(self, node):
+        """
+        Stage creating a node, or updating the properties of a saved one.
+
+        Args:
+            node (GameBaseModel): The node
+        """
+        node.updated_at = datetime.now()
+        if hasattr(node, "pre_save"):
+            node.pre_save()
+        props = node.deflate(node.__properties__, node)
+
+        if not hasattr(node, "element_id_property"):
+            self.run(f"CREATE (n:{':'.join(node.inherited_labels())}) SET n = $props", {"props": props})
+        else:
+            self.run(f"MATCH (n:{node.__label__} {{uid: $uid}}) SET n += $props", {"uid": node.uid, "props": props})
+
+        if hasattr(node, "post_save"):
+            self.on_commit(node.post_save)
+
+    def connect(self, node, relationship, other):
+        """
+        Stage connecting two nodes, as node.<relationship>.connect(other) would.
+
+        Args:
+            node (GameBaseModel): Node the relationship is defined on
+            relationship (str): Name of the relationship on node's class
+            other (GameBaseModel): Node to connect to
+        """
+        relation_type, left, right = _relationship(node, relationship)
+        self.run(
+            f"MATCH (a:{node.__label__} {{uid: $start}}), (b:{other.__label__} {{uid: $end}}) "
+            f"MERGE (a){left}[:{relation_type}]{right}(b)",
+            {"start": node.uid, "end": other.uid}
+        )
+
+    def replace(self, node, relationship, other):
+        """
+        Stage replacing a node's relationships of a kind by one to other, as
+        disconnect_all() followed by connect(other) would.
+
+        Args:
+            node (GameBaseModel): Node the relationship is defined on
+            relationship (str): Name of the relationship on node's class
+            other (GameBaseModel): Node to connect to
+        """
+        relation_type, left, right = _relationship(node, relationship)
+        self.run(
+            f"MATCH (a:{node.__label__} {{uid: $start}}) "
+            f"OPTIONAL MATCH (a){left}[r:{relation_type}]{right}(:{other.__label__}) DELETE r "
+            f"WITH DISTINCT a MATCH (b:{other.__label__} {{uid: $end}}) "
+            f"MERGE (a){left}[:{relation_type}]{right}(b)",
+            {"start": node.uid, "end": other.uid}
+        )
+
+    def write_state(self, state):
+        """
+        Stage persisting a game state, as a delta or snapshot like GameState.persist.
+
+        Args:
+            state (GameState): A saved state
+        """
+        write = state.prepare_write()
+        if write is None:
+            return
+
+        for query, params in state_write_statements([write]):
+            self.run(query, params)
+        self.on_commit(lambda: state.write_applied(write))
+
+    def on_commit(self, callback):
+        """
+        Run a callable once the writes have been committed.
+
+        Args:
+            callback: Callable taking no arguments
+        """
+        self._callbacks.append(callback)
+
+    def statement(self):
+        """
+        Combine the staged writes into one statement.
+
+        Returns:
+            tuple: (query, params), or None if nothing is staged
+        """
+        if not self.statements:
+            return None
+        if len(self.statements) == 1:
+            return self.statements[0]
+
+        parts = []
+        params = {}
+        for index, (query, statement_params) in enumerate(self.statements):
+            prefix = f"s{index}_"
+            parts.append(f"CALL {{ {PARAMETER.sub(lambda match: '$' + prefix + match.group(1), query)} }}")
+            params.update({prefix + name: value for name, value in statement_params.items()})
+        return " ".join(parts) + " RETURN count(*)", params
+
+    def commit(self):
+        """Write everything staged in one transaction, then run the on_commit callbacks."""
+        statement = self.statement()
+        if statement is not None:
+            with db.transaction:
+                db.cypher_query(*statement)
+
+        callbacks, self._callbacks = self._callbacks, []
+        self.statements = []
+        for callback in callbacks:
+            callback()
+
+    def discard(self):
+        """Drop everything staged."""
+        self.statements = []
+        self._callbacks = []
@@ -3,6 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 import logging
 from backend.game.services import GameService
+from backend.game.services.game_service_utils import fetch_game_detail, list_player_games, InvalidCursor
+from backend.game.services.game_service_utils.list_player_games import DEFAULT_PAGE_SIZE
+from backend.game.services.game_view_cache import get_game_view_cache
 from backend.game.models import Game, Player
 
 logger = logging.getLogger(__name__)
@@ -11,60 +14,40 @@ class GameViewSet(viewsets.ViewSet):
     permission_classes = (permissions.IsAuthenticated,)
 
     def list(self, request):
-        """List all games the user is participating in"""
+        """
+        List the games the user is participating in, newest first
+
+        The listing is paginated once limit or cursor is given; without either
+        every game is returned.
+
+        Query parameters:
+            status: Comma-separated statuses to include
+            limit: Page size
+            cursor: Value of the X-Next-Cursor header of the previous page
+        """
         # Get the user's player node
         try:
             player = Player.nodes.get(uid=request.user.uid)
         except Player.DoesNotExist:
             return Response({"error": "Player not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Get all games the player is participating in
-        games = player.games.all()
-
-        # Format the response
-        game_data = []
-        for game in games:
-            players = [
-                {
-                    "user_uid": p.uid,
-                    "username": p.username,
-                    "display_name": p.display_name
-                }
-                for p in game.players.all()
-            ]
-
-            current_player = None
-            if game.current_player.all():
-                current_player = game.current_player.get().uid
-
-            winner = None
-            if game.winner.all():
-                winner = game.winner.get().uid
-
-            creator = None
-            if game.creator.all():
-                creator = game.creator.get().uid
-
-            game_data.append({
-                "game_uid": game.uid,
-                "game_type": game.game_type,
-                "max_players": game.max_players,
-                "time_limit": game.time_limit,
-                "use_ai": game.use_ai,
-                "status": game.status,
-                "current_turn": game.current_turn,
-                "created_at": game.created_at.isoformat() if game.created_at else None,
-                "started_at": game.started_at.isoformat() if game.started_at else None,
-                "ended_at": game.ended_at.isoformat() if game.ended_at else None,
-                "completed_at": game.completed_at.isoformat() if game.completed_at else None,
-                "players": players,
-                "creator": creator,
-                "current_player": current_player,
-                "winner": winner,
-                "rule_version": game.rule_version
-            })
+        statuses = [s for s in request.query_params.get('status', '').split(',') if s]
+        try:
+            paginated = 'limit' in request.query_params or 'cursor' in request.query_params
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE)) if paginated else None
+            game_data, next_cursor = list_player_games(
+                player.uid,
+                statuses=statuses or None,
+                cursor=request.query_params.get('cursor'),
+                limit=limit
+            )
+        except (ValueError, InvalidCursor) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(game_data)
+        response = Response(game_data)
+        if next_cursor:
+            response['X-Next-Cursor'] = next_cursor
+        return response
 
     def create(self, request):
         """Create a new game"""
@@ -112,81 +95,16 @@ class GameViewSet(viewsets.ViewSet):
     def retrieve(self, request, pk=None):
         """Get details of a specific game"""
         try:
-            game = Game.nodes.get(uid=pk)
+            game_data = get_game_view_cache().game_detail(pk, lambda: fetch_game_detail(pk))
+            if game_data is None:
+                return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
 
             # Check if the user is a participant
-            player = Player.nodes.get(uid=request.user.uid)
-            if not game.players.is_connected(player):
+            if not any(p.get("user_uid") == request.user.uid for p in game_data["players"]):
                 return Response({"error": "You are not a participant in this game"},
                                status=status.HTTP_403_FORBIDDEN)
 
-            # Format the response
-            players = []
-            for p in game.players.all():
-                # Find the GamePlayer for this player
-                game_player = None
-                for gp in p.game_players.all():
-                    try:
-                        if gp.game.get().game_uid == game.game_uid:
-                            game_player = gp
-                            break
-                    except:
-                        continue
-
-                player_data = {
-                    "user_uid": p.uid,
-                    "username": p.username,
-                    "display_name": p.display_name,
-                    "status": game_player.status if game_player else "unknown"
-                }
-                players.append(player_data)
-
-            # Add AI players
-            for gp in game.game_players.all():
-                if gp.is_ai:
-                    ai_player = {
-                        "is_ai": True,
-                        "ai_difficulty": gp.ai_difficulty,
-                        "status": gp.status
-                    }
-                    players.append(ai_player)
-
-            current_player = None
-            if game.current_player.all():
-                current_player = game.current_player.get().uid
-
-            winner = None
-            if game.winner.all():
-                winner = game.winner.get().uid
-
-            creator = None
-            if game.creator.all():
-                creator = game.creator.get().uid
-
-            game_data = {
-                "game_uid": game.uid,
-                "game_type": game.game_type,
-                "max_players": game.max_players,
-                "time_limit": game.time_limit,
-                "use_ai": game.use_ai,
-                "status": game.status,
-                "current_turn": game.current_turn,
-                "created_at": game.created_at.isoformat() if game.created_at else None,
-                "started_at": game.started_at.isoformat() if game.started_at else None,
-                "ended_at": game.ended_at.isoformat() if game.ended_at else None,
-                "completed_at": game.completed_at.isoformat() if game.completed_at else None,
-                "players": players,
-                "creator": creator,
-                "current_player": current_player,
-                "winner": winner,
-                "rule_version": game.rule_version
-            }
-
             return Response(game_data)
-        except Game.DoesNotExist:
-            return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
-        except Player.DoesNotExist:
-            return Response({"error": "Player not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
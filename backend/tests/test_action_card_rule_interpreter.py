@@ -0,0 +1,103 @@
+import random
+from unittest import TestCase
+
+from backend.game.services.game_service_utils.action import Action
+from backend.game.services.rule_interpreter.action_card_rule_interpreter import ActionCardRuleInterpreter
+from backend.game.services.simulator import SimulatedCard, SimulatedGameState, build_rule_set
+
+
+def card(suit, value):
+    """Card dict with an id derived from its suit and value"""
+    return {"id": f"{suit}_{value}", "suit": suit, "value": value}
+
+
+class IdiotRuleInterpreterTests(TestCase):
+    """Tests for the idiot rules applied by ActionCardRuleInterpreter on an in-memory state"""
+
+    def setUp(self):
+        """Seat three players with known hands, of unequal sums, on top of the 3 of hearts"""
+        self.interpreter = ActionCardRuleInterpreter(build_rule_set("idiot"))
+        self.interpreter.set_policy(random.Random(0))
+
+        deck = [card("diamonds", value) for value in ("2", "3", "4", "5", "6", "9")]
+        self.state = SimulatedGameState(["p1", "p2", "p3"], deck, 0, "clockwise", random.Random(0))
+        self.state.discard_pile = [card("hearts", "3")]
+        self.state.player_states["p2"]["hand"] = [card("clubs", "4"), card("clubs", "9"), card("spades", "6")]
+        self.state.player_states["p3"]["hand"] = [card("clubs", "5"), card("clubs", "9"), card("spades", "6")]
+
+    def play(self, player_id, suit, value):
+        """Play a card from a player's hand and apply the rules after it"""
+        self.state.current_player_uid = player_id
+        player_state = self.state.player_states[player_id]
+        if card(suit, value) not in player_state["hand"]:
+            player_state["hand"].append(card(suit, value))
+
+        state = self.interpreter.process_card_play(self.state, player_state, SimulatedCard(card(suit, value)))
+        self.assertIs(state, self.state)
+        return self.interpreter.apply_rules(state)
+
+    def can_play(self, player_id, suit, value):
+        """Whether the interpreter accepts a card, given to the player if needed"""
+        player_state = self.state.player_states[player_id]
+        if card(suit, value) not in player_state["hand"]:
+            player_state["hand"].append(card(suit, value))
+        action = Action(type="play_card", card=SimulatedCard(card(suit, value)))
+        return self.interpreter.validate_action(self.state, player_state, action)
+
+    def test_empty_hand_ends_game(self):
+        """Test that emptying a hand ends the game, also when the last card scores points"""
+        self.play("p1", "hearts", "J")
+
+        self.assertTrue(self.state.game_over)
+        self.assertEqual(self.state.winner_id, "p1")
+        self.assertEqual(self.state.player_states["p1"]["score"], 2)
+
+    def test_game_continues_after_countered_last_seven(self):
+        """Test that a last 7 which was countered does not end the game, and one that was not does"""
+        self.state.countered_last_7 = True
+        self.play("p1", "hearts", "7")
+
+        self.assertFalse(self.state.game_over)
+        self.assertIsNone(self.state.winner_id)
+        self.assertEqual(self.state.next_player_uid, "p2")
+
+        self.state.countered_last_7 = False
+        self.state.chain_context = None
+        self.play("p1", "hearts", "7")
+
+        self.assertTrue(self.state.game_over)
+        self.assertEqual(self.state.winner_id, "p1")
+
+    def test_chosen_suit_lasts_one_play(self):
+        """Test that the suit chosen with a Jack constrains the next play only"""
+        self.state.player_states["p1"]["hand"] = [card("clubs", "2"), card("clubs", "3")]
+        self.interpreter.extensions["decision_handler"].choose_suit = lambda game_state, player, config: "spades"
+        self.play("p1", "hearts", "J")
+        self.assertEqual(self.state.current_suit, "spades")
+        self.assertFalse(self.can_play("p2", "clubs", "9"))
+
+        self.play("p2", "spades", "6")
+
+        self.assertIsNone(self.state.current_suit)
+        self.assertTrue(self.can_play("p3", "clubs", "6"))
+
+    def test_chain_handler_gets_card_actions_and_extensions(self):
+        """Test that the registered chain handler shares the interpreter's card actions and extensions"""
+        chain_handler = self.interpreter.extensions["chain_handler"]
+
+        self.assertIs(chain_handler.card_actions, self.interpreter.card_actions)
+        self.assertIs(chain_handler.extensions, self.interpreter.extensions)
+
+    def test_counter_returns_state(self):
+        """Test that countering a 7 with a 10 bounces the penalty and hands back the game state"""
+        self.state.player_states["p1"]["hand"] = [card("clubs", "2"), card("clubs", "3")]
+        self.play("p1", "hearts", "7")
+        self.assertEqual(self.state.chain_context["current_amount"], 2)
+        self.assertTrue(self.can_play("p2", "hearts", "10"))
+        self.assertFalse(self.can_play("p2", "clubs", "9"))
+
+        self.play("p2", "hearts", "10")
+
+        self.assertIsNone(self.state.chain_context)
+        self.assertEqual(self.state.direction, "counterclockwise")
+        self.assertEqual(len(self.state.player_states["p1"]["hand"]), 4)
@@ -0,0 +1,150 @@
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from backend.authentication.auth_cache import BloomFilter, TokenBlacklist, UserProfileCache
+from backend.authentication.jwt_auth import Neo4jJWTAuthentication
+from backend.authentication.models import BlacklistedToken, hash_token
+
+
+class BloomFilterTests(TestCase):
+    """Tests for the blacklist bloom filter"""
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        """Test that added tokens are always found and others rarely are"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for number in range(1000):
+            bloom.add(f"listed.{number}")
+
+        self.assertTrue(all(f"listed.{number}" in bloom for number in range(1000)))
+        false_positives = sum(f"other.{number}" in bloom for number in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TokenBlacklistTests(TestCase):
+    """Tests for blacklist checks answered from memory"""
+
+    def setUp(self):
+        """Blacklist loaded from a stubbed query, with confirmation recorded"""
+        self.rows = [["revoked.token"]]
+        query = patch("backend.authentication.auth_cache.db.cypher_query",
+                      side_effect=lambda statement, params: (self.rows, ["t.token"]))
+        self.query = query.start()
+        self.addCleanup(query.stop)
+
+        confirm = patch("backend.authentication.models.BlacklistedToken.is_blacklisted", return_value=True)
+        self.confirm = confirm.start()
+        self.addCleanup(confirm.stop)
+
+        self.blacklist = TokenBlacklist(capacity=1000, refresh_seconds=30)
+
+    def test_unlisted_token_needs_no_query(self):
+        """Test that an unlisted token is accepted after only the initial load"""
+        for _ in range(5):
+            self.assertFalse(self.blacklist.is_blacklisted(b"valid.token"))
+
+        self.query.assert_called_once()
+        self.confirm.assert_not_called()
+
+    def test_listed_token_confirmed_in_neo4j(self):
+        """Test that filter positives are confirmed, with bytes tokens matched as text"""
+        self.assertTrue(self.blacklist.is_blacklisted(b"revoked.token"))
+        self.confirm.assert_called_once_with("revoked.token")
+
+    def test_logout_and_other_workers_seen(self):
+        """Test that local additions apply at once and other processes' on refresh"""
+        self.blacklist.add("logged.out")
+        self.assertTrue(self.blacklist.is_blacklisted("logged.out"))
+
+        self.rows = [["elsewhere"]]
+        self.assertFalse(self.blacklist.is_blacklisted("elsewhere"))
+        self.blacklist._loaded_at -= 31
+        self.assertTrue(self.blacklist.is_blacklisted("elsewhere"))
+        self.assertGreater(self.query.call_args.args[1]["since"], 0)
+
+    def test_hashed_tokens_found_by_raw_token(self):
+        """Test that tokens stored as hashes match the raw token being checked"""
+        self.rows = [[hash_token("hashed.token")]]
+
+        self.assertTrue(self.blacklist.is_blacklisted("hashed.token"))
+        self.confirm.assert_called_once_with("hashed.token")
+
+
+class TokenExpiryTests(TestCase):
+    """Tests for batched expiry and hashed storage of blacklisted tokens"""
+
+    def test_expiry_deletes_in_batches_and_reports(self):
+        """Test that expired tokens are deleted one bounded batch per query until none are left"""
+        batches = iter([[[2]], [[2]], [[1]]])
+        with patch("backend.authentication.models.db.cypher_query",
+                   side_effect=lambda statement, params: (next(batches), ["count(*)"])) as query:
+            out = StringIO()
+            call_command("expire_blacklisted_tokens", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(query.call_count, 3)
+        self.assertEqual({call.args[1]["batch_size"] for call in query.call_args_list}, {2})
+        self.assertIn('"deleted": 5', out.getvalue())
+        self.assertIn("duration_ms", out.getvalue())
+
+    def test_tokens_stored_hashed_when_configured(self):
+        """Test that JWT_BLACKLIST_HASH_TOKENS stores the hash and lookups check both forms"""
+        with override_settings(JWT_BLACKLIST_HASH_TOKENS=True), \
+                patch.object(BlacklistedToken, "save", lambda node: node):
+            node = BlacklistedToken.blacklist("raw.token", "user1", None)
+        self.assertEqual(node.token, hash_token("raw.token"))
+        self.assertEqual(len(node.token), 71)
+
+        with patch.object(BlacklistedToken, "nodes") as nodes:
+            nodes.filter.return_value.first_or_none.return_value = node
+            self.assertTrue(BlacklistedToken.is_blacklisted("raw.token"))
+        nodes.filter.assert_called_once_with(token__in=["raw.token", hash_token("raw.token")])
+
+
+class UserProfileCacheTests(TestCase):
+    """Tests for the UserProfile TTL LRU"""
+
+    def test_profile_loaded_once_per_ttl(self):
+        """Test that authenticating twice reads the profile once"""
+        profile = MagicMock(uid="user1")
+        cache = UserProfileCache(ttl=60)
+        auth = Neo4jJWTAuthentication()
+
+        with patch("backend.authentication.auth_cache.get_user_profile_cache", return_value=cache), \
+                patch("backend.authentication.models.UserProfile.nodes") as nodes:
+            nodes.get_or_none.return_value = profile
+            first = auth.get_user({"user_uid": "user1"})
+            second = auth.get_user({"user_uid": "user1"})
+
+        self.assertIs(first, profile)
+        self.assertIs(second, profile)
+        nodes.get_or_none.assert_called_once_with(uid="user1")
+
+    def test_expiry_eviction_and_invalidation(self):
+        """Test that entries expire, the least recently used is dropped and saves invalidate"""
+        load = MagicMock(side_effect=lambda: object())
+        cache = UserProfileCache(ttl=60, max_entries=2)
+
+        first = cache.get("a", load)
+        cache.get("b", load)
+        self.assertIs(cache.get("a", load), first)
+        cache.get("c", load)
+        self.assertEqual(list(cache._entries), ["a", "c"])
+
+        cache.invalidate("a")
+        self.assertIsNot(cache.get("a", load), first)
+
+        with patch("backend.authentication.auth_cache.time.monotonic", return_value=10 ** 9):
+            cache.get("c", load)
+        self.assertEqual(load.call_count, 5)
+
+    def test_missing_profile_not_cached(self):
+        """Test that an unknown uid is looked up again"""
+        load = MagicMock(return_value=None)
+        cache = UserProfileCache(ttl=60)
+
+        self.assertIsNone(cache.get("gone", load))
+        self.assertIsNone(cache.get("gone", load))
+        self.assertEqual(load.call_count, 2)
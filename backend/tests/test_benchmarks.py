@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from django.test import SimpleTestCase
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.benchmarks.suite import measure, run_suite
+from backend.game.models import Game, Player
+
+
+class FakeGraphTests(TestCase):
+    """Tests for the in-process graph the benchmarks run against"""
+
+    def test_models_round_trip(self):
+        """Test that nodes and relationships written through neomodel can be read back"""
+        graph = FakeGraph()
+        with graph.install():
+            player = Player(username="fake_graph_player").save()
+            game = Game(status="waiting").save()
+            game.players.connect(player)
+            game.creator.connect(player)
+
+            self.assertEqual(Game.nodes.get(uid=game.uid).status, "waiting")
+            self.assertEqual([p.uid for p in game.players.all()], [player.uid])
+            self.assertTrue(game.players.is_connected(player))
+            self.assertEqual([g.uid for g in player.games.all()], [game.uid])
+            self.assertEqual(len(Game.nodes.filter(status__in=["waiting", "in_progress"])), 1)
+
+            game.players.disconnect(player)
+            self.assertFalse(game.players.is_connected(player))
+
+        self.assertEqual(graph.statements["create_node"], 2)
+        self.assertEqual(graph.statements["merge_relationship"], 2)
+        self.assertEqual(graph.unhandled, {})
+
+    def test_measure_counts_queries_per_call(self):
+        """Test that measure reports percentiles and queries per call"""
+        graph = FakeGraph()
+        with graph.install():
+            player = Player(username="fake_graph_measured").save()
+            result = measure(graph, lambda: Player.nodes.get(uid=player.uid), iterations=5, warmup=1)
+
+        self.assertEqual(result["iterations"], 5)
+        self.assertEqual(result["queries_per_op"], 1.0)
+        self.assertEqual(result["statements_per_op"], {"match": 1.0})
+        self.assertLessEqual(result["latency_ms"]["p50"], result["latency_ms"]["p99"])
+
+
+class BenchmarkSuiteTests(SimpleTestCase):
+    """Tests for the benchmark suite"""
+
+    # The consumer benchmark closes stale Django connections like a real request
+    databases = {"default"}
+
+    def test_suite_reports_every_operation(self):
+        """Test that a short run covers each operation without unknown statements"""
+        report = run_suite(iterations=3, warmup=0)
+
+        self.assertEqual(set(report["operations"]), {
+            "create_game", "create_action_card_game", "play_card",
+            "game_state_serialize", "consumer_get_game_data", "notifications_send_to_game"
+        })
+        self.assertEqual(report["unhandled_statements"], {})
+        self.assertGreater(report["operations"]["play_card"]["queries_per_op"], 0)
+        self.assertEqual(report["operations"]["game_state_serialize"]["queries_per_op"], 0)
+
+    def test_unknown_operation_rejected(self):
+        """Test that asking for an unknown operation fails before running anything"""
+        with self.assertRaises(ValueError):
+            run_suite(["not_an_operation"], iterations=3)
@@ -0,0 +1,42 @@
+import json
+from unittest.mock import patch, MagicMock
+
+from backend.tests.fixtures import MockNeo4jTestCase
+from backend.game.services.game_service_utils import bulk_create_game_cards
+
+
+class BulkCreateGameCardsTests(MockNeo4jTestCase):
+    """Tests for creating a game's cards in one query"""
+
+    @patch('backend.game.services.game_service_utils.bulk_create_game_cards.db')
+    def test_creates_all_cards_in_one_query(self, mock_db):
+        """Test that every card and relationship is created by a single UNWIND query"""
+        game = MagicMock(uid="game1")
+        player = MagicMock(uid="player1")
+        cards = [
+            ({"suit": "hearts", "value": "7"}, player, 'hand'),
+            ({"suit": "spades", "value": "K"}, None, 'field'),
+            ({"suit": "clubs", "value": "2"}, None, 'deck'),
+        ]
+
+        uids = bulk_create_game_cards(game, cards)
+
+        mock_db.cypher_query.assert_called_once()
+        query, params = mock_db.cypher_query.call_args[0]
+        self.assertIn("UNWIND $rows", query)
+        self.assertIn("HAS_CARD", query)
+        self.assertIn("CONTROLLED_BY", query)
+        self.assertEqual(params["game_uid"], "game1")
+
+        rows = params["rows"]
+        self.assertEqual([row["props"]["uid"] for row in rows], uids)
+        self.assertEqual(len(set(uids)), 3)
+        self.assertEqual([row["owner_uid"] for row in rows], ["player1", None, None])
+        self.assertEqual(rows[1]["props"]["location"], "field")
+        self.assertEqual(json.loads(rows[0]["props"]["state"]), {"suit": "hearts", "value": "7"})
+
+    @patch('backend.game.services.game_service_utils.bulk_create_game_cards.db')
+    def test_no_cards_skips_query(self, mock_db):
+        """Test that an empty deck does not hit the database"""
+        self.assertEqual(bulk_create_game_cards(MagicMock(uid="game1"), []), [])
+        mock_db.cypher_query.assert_not_called()
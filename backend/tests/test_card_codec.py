@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from backend.game.services.card_codec import CardCodec
+
+
+class CardCodecTests(TestCase):
+    """Tests for the compact integer card encoding"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.codec = CardCodec({
+            "suits": ["hearts", "diamonds", "clubs", "spades"],
+            "values": ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"],
+            "special_cards": [{"type": "joker", "value": "joker", "count": 2}]
+        })
+
+    def test_round_trip(self):
+        """Test that every card decodes back to its suit and value"""
+        for code in range(self.codec.size):
+            card = self.codec.decode(code)
+            self.assertEqual(self.codec.encode(card["suit"], card["value"]), code)
+
+    def test_unknown_card_has_no_code(self):
+        """Test that cards outside the deck are not encoded"""
+        self.assertIsNone(self.codec.encode("stars", "7"))
@@ -0,0 +1,106 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.game.models import GameRuleSet
+from backend.game.models.game_state import GameState
+from backend.game.services.rule_interpreter.compiled_rule_set import (
+    CompiledRuleSet, get_compiled_rule_set, get_cached_rule_set, invalidate_compiled_rule_set
+)
+
+
+def make_rule_set(version="idiot_cards-compiled", uid="compiled-rs1"):
+    """Build a rule set stand-in with a few card actions"""
+    rule_set = MagicMock()
+    rule_set.uid = uid
+    rule_set.version = version
+    rule_set.parameters = {
+        "deck_configuration": {
+            "suits": ["hearts", "diamonds", "clubs", "spades"],
+            "values": ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+        },
+        "card_actions": {
+            "hearts_7": {"effect": "draw_cards", "amount": 2, "target": "next_player"},
+            "spades_J": {"effect": "choose_suit"},
+            "special_joker": {"effect": "skip_turn"}
+        },
+        "turn_flow": {"initial_direction": "counterclockwise"}
+    }
+    return rule_set
+
+
+class CompiledRuleSetTests(TestCase):
+    """Tests for the compiled rule set lookup tables and cache"""
+
+    def tearDown(self):
+        """Clean up the process-wide cache"""
+        invalidate_compiled_rule_set("compiled-rs1")
+        invalidate_compiled_rule_set("compiled-rs2")
+
+    def test_actions_indexed_by_card_code(self):
+        """Test that card actions are found by card code"""
+        compiled = CompiledRuleSet(make_rule_set())
+
+        code = compiled.card_code("hearts", "7")
+        self.assertEqual(compiled.action_table[code]["amount"], 2)
+        self.assertEqual(compiled.action_for("Hearts", "7")["effect"], "draw_cards")
+        self.assertIsNone(compiled.action_for("clubs", "2"))
+
+    def test_non_deck_keys_still_resolve(self):
+        """Test that actions for cards outside the deck are kept"""
+        compiled = CompiledRuleSet(make_rule_set())
+
+        self.assertEqual(compiled.action_for("special", "joker"), {"effect": "skip_turn"})
+        self.assertEqual(compiled.initial_direction, "counterclockwise")
+
+    def test_compiled_once_per_version(self):
+        """Test that a rule set version is compiled once and can be invalidated"""
+        rule_set = make_rule_set()
+
+        compiled = get_compiled_rule_set(rule_set)
+
+        self.assertIs(get_compiled_rule_set(rule_set), compiled)
+        self.assertIs(get_cached_rule_set("compiled-rs1", "idiot_cards-compiled"), compiled)
+
+        invalidate_compiled_rule_set("compiled-rs1")
+        self.assertIsNone(get_cached_rule_set("compiled-rs1", "idiot_cards-compiled"))
+
+    def test_rule_sets_sharing_a_version_compiled_apart(self):
+        """Test that two rule sets with the same version don't share a compiled form"""
+        first = make_rule_set()
+        second = make_rule_set(uid="compiled-rs2")
+        second.parameters = {"card_actions": {"hearts_7": {"effect": "skip_turn"}}}
+
+        self.assertEqual(get_compiled_rule_set(first).action_for("hearts", "7")["effect"], "draw_cards")
+        self.assertEqual(get_compiled_rule_set(second).action_for("hearts", "7")["effect"], "skip_turn")
+
+        invalidate_compiled_rule_set("compiled-rs2")
+        self.assertIsNone(get_cached_rule_set("compiled-rs2", "idiot_cards-compiled"))
+        self.assertIsNotNone(get_cached_rule_set("compiled-rs1", "idiot_cards-compiled"))
+
+    def test_game_state_skips_traversal_when_cached(self):
+        """Test that a game state with a known version doesn't load its rule set"""
+        get_compiled_rule_set(make_rule_set())
+        game_state = GameState(rule_set_uid="compiled-rs1", rule_set_version="idiot_cards-compiled")
+        game_state.game = MagicMock()
+
+        compiled = game_state._compiled_rules()
+
+        self.assertEqual(compiled.version, "idiot_cards-compiled")
+        game_state.game.get.assert_not_called()
+
+    def test_saving_rule_set_recompiles_it(self):
+        """Test that a saved rule set is compiled again from its new parameters"""
+        graph = FakeGraph()
+        self.addCleanup(graph.install().close)
+        rule_set = GameRuleSet(name="Compiled Rules", version="compiled-1.0",
+                               parameters={"card_actions": {"hearts_7": {"effect": "draw_cards"}}}).save()
+        self.addCleanup(invalidate_compiled_rule_set, rule_set.uid)
+        compiled = get_compiled_rule_set(rule_set)
+
+        rule_set.parameters = {"card_actions": {"hearts_7": {"effect": "skip_turn"}}}
+        rule_set.save()
+
+        self.assertIsNone(get_cached_rule_set(rule_set.uid, "compiled-1.0"))
+        self.assertIsNot(get_compiled_rule_set(rule_set), compiled)
+        self.assertEqual(get_compiled_rule_set(rule_set).action_for("hearts", "7"), {"effect": "skip_turn"})
@@ -4,7 +4,7 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from rest_framework import status
 
-from backend.tests.fixtures import MockNeo4jTestCase
+from backend.tests.fixtures import MockNeo4jTestCase, MockPlayers
 from backend.game.models import Game, GameState
 from backend.game.models.player import Player
 from backend.game.models.game_rule_set import GameRuleSet
@@ -39,6 +39,8 @@ class GameAPITestCase(MockNeo4jTestCase):
         self.get_object_or_404_patcher = patch('backend.game.api.views.get_object_or_404')
         self.mock_get_object_or_404 = self.get_object_or_404_patcher.start()
         self.mock_get_object_or_404.side_effect = self.mock_get_object
+        self.get_node_or_404_patcher = patch('backend.game.api.views.get_node_or_404', side_effect=self.mock_get_object)
+        self.get_node_or_404_patcher.start()
 
         # Mock the JWT authentication
         self.jwt_auth_patcher = patch('backend.authentication.jwt_auth.Neo4jJWTAuthentication.authenticate')
@@ -65,7 +67,7 @@ class GameAPITestCase(MockNeo4jTestCase):
         self.game.name = "Test Game"
         self.game.status = "waiting"
         self.game.creator_id = self.player.uid
-        self.game.players = [self.player.uid]
+        self.game.players = MockPlayers([self.player.uid])
         self.game.rule_set.get.return_value = self.rule_set
 
         # Create a game state
@@ -96,24 +98,21 @@ class GameAPITestCase(MockNeo4jTestCase):
             ]
         }
 
-        # Add state attribute to the game mock
-        self.game.state = MagicMock()
-
         # Link game state to game
-        self.game.state.all.return_value = [self.game_state]
-        self.game.state.get.return_value = self.game_state  # Add this line to mock the get method
+        self.game.game_state.single.return_value = self.game_state
 
     def tearDown(self):
         """Clean up after tests"""
         self.get_object_or_404_patcher.stop()
+        self.get_node_or_404_patcher.stop()
         self.jwt_auth_patcher.stop()  # Stop the JWT auth patcher
         self.jwt_validate_patcher.stop()  # Stop the JWT validate patcher
         super().tearDown()
 
     def mock_get_object(self, model, **kwargs):
-        """Mock implementation of get_object_or_404"""
+        """Mock implementation of get_object_or_404 and get_node_or_404"""
         if model == Player:
-            if kwargs.get('user') == self.user:
+            if kwargs.get('user') == self.user or kwargs.get('uid') == self.user.uid:
                 return self.player
         elif model == Game:
             if kwargs.get('uid') == self.game.uid:
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.authentication.auth_cache import TokenBlacklist, UserProfileCache
+from backend.game.api.middleware import TokenAuthMiddleware
+from backend.game.consumers import GameConsumer
+
+
+def make_consumer(kwargs=None, player_id="p1"):
+    """Build a consumer for a route with a recorded send and channel layer"""
+    consumer = GameConsumer()
+    consumer.scope = {"type": "websocket", "url_route": {"kwargs": kwargs or {}},
+                      "user": MagicMock(is_authenticated=True, uid=player_id)}
+    consumer.channel_name = "specific.channel"
+    consumer.channel_layer = MagicMock(group_add=AsyncMock(), group_discard=AsyncMock())
+    consumer.groups = []
+    consumer.player_id = player_id
+    consumer.state_versions = {}
+    consumer.base_send = AsyncMock()
+    consumer.get_state_snapshot = AsyncMock(return_value=None)
+    return consumer
+
+
+def sent(consumer):
+    return [json.loads(call.args[0]["text"]) for call in consumer.base_send.call_args_list
+            if "text" in call.args[0]]
+
+
+class GameConsumerTests(TestCase):
+    """Tests for the unified game consumer"""
+
+    def test_user_route_sends_overview_from_async_query(self):
+        """Test that /ws/user/ answers with one async Neo4j query"""
+        consumer = make_consumer()
+        rows = [[[{"game_uid": "game1", "status": "waiting", "game_type": "idiot"}], []]]
+
+        with patch("backend.card_game.neo4j_async.cypher_query",
+                   AsyncMock(return_value=(rows, ["active_games", "player_groups"]))) as query:
+            asyncio.run(consumer.connect())
+
+        query.assert_awaited_once()
+        self.assertEqual(query.call_args.args[1]["player_uid"], "p1")
+        messages = sent(consumer)
+        self.assertEqual(messages[-1]["type"], "user_state")
+        self.assertEqual(messages[-1]["data"]["active_games"][0]["game_uid"], "game1")
+        self.assertEqual(consumer.groups, ["user_p1", "player_p1"])
+
+    def test_unauthenticated_connection_closed(self):
+        """Test that a connection without a user or token is closed"""
+        consumer = make_consumer()
+        consumer.scope["user"] = MagicMock(is_authenticated=False)
+
+        asyncio.run(consumer.connect())
+
+        self.assertEqual(consumer.base_send.call_args.args[0]["type"], "websocket.close")
+
+    def test_one_socket_follows_several_games(self):
+        """Test that games are subscribed and unsubscribed over one connection"""
+        consumer = make_consumer()
+        consumer.get_game_data = AsyncMock(side_effect=lambda uid: {"game_uid": uid})
+
+        async def run():
+            for game_uid in ("game1", "game2", "game1"):
+                await consumer.receive(json.dumps({"type": "subscribe_game", "game_uid": game_uid}))
+            await consumer.receive(json.dumps({"type": "unsubscribe_game", "game_uid": "game1"}))
+
+        asyncio.run(run())
+
+        self.assertEqual(consumer.groups, ["game_game2"])
+        self.assertEqual(consumer.get_game_data.await_count, 2)
+        self.assertEqual([m["data"]["game_uid"] for m in sent(consumer)], ["game1", "game2"])
+        consumer.channel_layer.group_discard.assert_awaited_once_with("game_game1", "specific.channel")
+
+    def test_client_messages_routed_by_table(self):
+        """Test that known client messages reach their handler and others are ignored"""
+        consumer = make_consumer()
+
+        async def run():
+            await consumer.receive(json.dumps({"type": "ping"}))
+            await consumer.receive(json.dumps({"type": "drop_tables"}))
+            await consumer.receive("not json")
+
+        asyncio.run(run())
+
+        self.assertEqual(sent(consumer), [{"type": "pong"}])
+
+    def test_forwarded_events_share_one_handler(self):
+        """Test that pass-through channel events reach the client, in a batch too"""
+        consumer = make_consumer()
+
+        async def run():
+            await consumer.dispatch({"type": "group_member_joined", "data": {"user_uid": "p2"}})
+            await consumer.dispatch({"type": "batch_update", "messages": [
+                {"type": "game_invitation", "data": {"game_uid": "game1"}},
+                {"type": "game.notification", "event_type": "turn_changed", "data": {}},
+            ]})
+
+        asyncio.run(run())
+
+        messages = sent(consumer)
+        self.assertEqual(messages[0], {"type": "group_member_joined", "data": {"user_uid": "p2"}})
+        self.assertEqual([u["type"] for u in messages[1]["updates"]], ["game_invitation", "turn_changed"])
+
+
+class TokenAuthMiddlewareTests(TestCase):
+    """Tests for the WebSocket authentication handshake"""
+
+    def setUp(self):
+        """Fresh profile cache and an already loaded, empty blacklist"""
+        self.blacklist = TokenBlacklist()
+        with patch("backend.authentication.auth_cache.db.cypher_query", return_value=([], ["t.token"])):
+            self.blacklist._refresh()
+
+        for target, value in (("backend.authentication.auth_cache.get_user_profile_cache", UserProfileCache(ttl=60)),
+                              ("backend.game.api.middleware.get_token_blacklist", self.blacklist)):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        token = AccessToken()
+        token["user_uid"] = "p1"
+        self.token = str(token)
+
+    def connect(self, query_string):
+        """Run the middleware and return the scope the consumer would get"""
+        inner = AsyncMock()
+        asyncio.run(TokenAuthMiddleware(inner)({"type": "websocket", "query_string": query_string}, None, None))
+        return inner.call_args.args[0]
+
+    def test_reconnects_resolve_profile_once_without_threads(self):
+        """Test that the profile is read once on the async driver and then served from the cache"""
+        node = MagicMock()
+        with patch("backend.card_game.neo4j_async.cypher_query", AsyncMock(return_value=([[node]], ["u"]))) as query, \
+                patch("backend.authentication.models.UserProfile.inflate", return_value=MagicMock(uid="p1")), \
+                patch("backend.authentication.auth_cache.sync_to_async") as to_thread:
+            scopes = [self.connect(f"token={self.token}".encode()) for _ in range(3)]
+
+        query.assert_awaited_once()
+        to_thread.assert_not_called()
+        self.assertEqual({scope["player_id"] for scope in scopes}, {"p1"})
+        self.assertTrue(all(scope["user"] is scopes[0]["user"] for scope in scopes))
+
+    def test_invalid_or_blacklisted_token_is_anonymous(self):
+        """Test that bad tokens leave the connection unauthenticated"""
+        self.blacklist.add(self.token)
+        with patch("backend.authentication.models.BlacklistedToken.is_blacklisted", return_value=True):
+            blacklisted = self.connect(f"token={self.token}".encode())
+        invalid = self.connect(b"token=not.a.jwt")
+
+        for scope in (blacklisted, invalid):
+            self.assertFalse(scope["user"].is_authenticated)
+            self.assertNotIn("player_id", scope)
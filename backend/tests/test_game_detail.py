@@ -0,0 +1,76 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.game.models import Game, GamePlayer, Player, PlayerGroup
+from backend.game.services.game_service_utils import fetch_game_detail
+from backend.game.views.game_viewset import GameViewSet
+
+
+class FetchGameDetailTests(TestCase):
+    """Tests for loading a game's detail payload in one query"""
+
+    def test_detail_loaded_in_one_query(self):
+        """Test that players, AI players, turn and invited groups come back from a single statement"""
+        graph = FakeGraph()
+        with graph.install():
+            alice = Player(username="detail_alice").save()
+            bob = Player(username="detail_bob").save()
+            game = Game(status="in_progress", is_tournament=True).save()
+            for player in (alice, bob):
+                game.players.connect(player)
+            game.creator.connect(alice)
+            game.current_player.connect(bob)
+
+            game_player = GamePlayer(status="accepted").save()
+            alice.game_players.connect(game_player)
+            game.game_players.connect(game_player)
+            ai_player = GamePlayer(is_ai=True, ai_difficulty="hard", status="accepted").save()
+            game.game_players.connect(ai_player)
+            group = PlayerGroup(name="Friday night").save()
+            game.invited_groups.connect(group)
+
+            before = graph.queries
+            detail = fetch_game_detail(game.uid)
+            queries = graph.queries - before
+
+        self.assertEqual(queries, 1)
+        self.assertEqual(detail["game_uid"], game.uid)
+        self.assertEqual(detail["creator"], alice.uid)
+        self.assertEqual(detail["current_player"], bob.uid)
+        self.assertIsNone(detail["winner"])
+        self.assertTrue(detail["is_tournament"])
+        statuses = {p.get("user_uid"): p["status"] for p in detail["players"]}
+        self.assertEqual(statuses, {alice.uid: "accepted", bob.uid: "unknown", None: "accepted"})
+        self.assertIn({"is_ai": True, "ai_difficulty": "hard", "status": "accepted"}, detail["players"])
+        self.assertEqual(detail["invited_groups"], [{"group_uid": group.uid, "name": "Friday night"}])
+
+    def test_missing_game_returns_none(self):
+        """Test that an unknown uid yields no payload"""
+        with FakeGraph().install():
+            self.assertIsNone(fetch_game_detail("no-such-game"))
+
+
+class GameRetrieveTests(TestCase):
+    """Tests for GameViewSet.retrieve on top of the detail projection"""
+
+    def _retrieve(self, game_data):
+        request = APIRequestFactory().get("/api/games/game1/")
+        force_authenticate(request, user=MagicMock(uid="user1", is_authenticated=True))
+        with patch("backend.game.views.game_viewset.fetch_game_detail", return_value=game_data):
+            return GameViewSet.as_view({"get": "retrieve"})(request, pk="game1")
+
+    def test_participant_gets_detail(self):
+        """Test that a participant receives the payload unchanged"""
+        game_data = {"game_uid": "game1", "players": [{"user_uid": "user1", "status": "active"}]}
+        response = self._retrieve(game_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, game_data)
+
+    def test_non_participant_forbidden(self):
+        """Test that other users are refused and unknown games are not found"""
+        response = self._retrieve({"game_uid": "game1", "players": [{"is_ai": True, "status": "active"}]})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self._retrieve(None).status_code, 404)
@@ -87,6 +87,21 @@ class GameStateTests(MockNeo4jTestCase):
         # Check draw pile size decreased
         self.assertEqual(len(self.game_state.draw_pile), initial_draw_pile_size - 1)
 
+    def test_draw_pile_keeps_stored_format(self):
+        """Test that the draw pile draws from the top and is still stored as a JSON list"""
+        self.game_state.draw_pile = [
+            {"suit": "hearts", "value": "2"},
+            {"suit": "clubs", "value": "9"}
+        ]
+
+        card = self.game_state.draw_card()
+        stored = GameState.deflate(self.game_state.__properties__, self.game_state)["draw_pile"]
+        restored = GameState.defined_properties()["draw_pile"].inflate(stored)
+
+        self.assertEqual(card, {"suit": "hearts", "value": "2"})
+        self.assertEqual(stored, '[{"suit": "clubs", "value": "9"}]')
+        self.assertEqual(list(restored), [{"suit": "clubs", "value": "9"}])
+
     def test_play_card_basic(self):
         """Test playing a card - basic case"""
         # Set up a card in player's hand
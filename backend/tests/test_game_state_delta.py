@@ -0,0 +1,149 @@
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.tests.fixtures import MockNeo4jTestCase
+from backend.game.models.game_state import GameState
+from backend.game.models.game_state_delta import (
+    capture_properties, diff_properties, apply_ops
+)
+
+
+def make_state():
+    """Build a stored game state with two players mid-game"""
+    state = GameState(uid="state1")
+    state.element_id_property = "4:state:1"
+    state.draw_pile = [{"suit": "hearts", "value": str(v)} for v in range(2, 11)]
+    state.discard_pile = [{"suit": "spades", "value": "5"}]
+    state.player_states = {
+        "p1": {"hand": [{"suit": "clubs", "value": "7"}], "announced_one_card": False, "penalties": 0},
+        "p2": {"hand": [{"suit": "hearts", "value": "A"}], "announced_one_card": False, "penalties": 0},
+    }
+    state.current_player_uid = "p1"
+    state.skipped_players = []
+    return state
+
+
+@override_settings(GAME_STATE_PERSISTENCE="delta", GAME_STATE_SNAPSHOT_INTERVAL=3)
+class GameStateDeltaTests(MockNeo4jTestCase):
+    """Tests for delta-encoded game state persistence"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+        self.state = make_state()
+        self.state._baseline = capture_properties(self.state)
+
+    def draw_for(self, player_id):
+        """Move the top draw pile card to a player's hand"""
+        self.state.player_states[player_id]["hand"].append(self.state.draw_card())
+
+    def test_diff_round_trip(self):
+        """Test that applying a diff reproduces the new properties"""
+        old = capture_properties(self.state)
+        self.draw_for("p2")
+        self.state.direction = "counterclockwise"
+        self.state.skipped_players = ["p2"]
+        new = capture_properties(self.state)
+
+        ops = diff_properties(old, new)
+        apply_ops(old, ops)
+
+        self.assertEqual(old, new)
+
+    def test_draw_writes_small_delta(self):
+        """Test that drawing a card is recorded as a small delta instead of a snapshot"""
+        self.draw_for("p2")
+
+        write = self.state.prepare_write()
+
+        self.assertIsNone(write["props"])
+        self.assertEqual(write["seq"], 1)
+        self.assertLess(len(write["ops"]), 120)
+        self.assertEqual(json.loads(write["ops"]), [
+            ["l", ["draw_pile"], [0], []],
+            ["l", ["player_states", "p2", "hand"], [], [{"suit": "hearts", "value": "2"}]],
+        ])
+
+    def test_unchanged_state_writes_nothing(self):
+        """Test that committing an unchanged state produces no write"""
+        self.assertIsNone(self.state.prepare_write())
+
+    def test_compacts_into_snapshot_at_interval(self):
+        """Test that every interval deltas the state is written as a snapshot"""
+        for _ in range(2):
+            self.draw_for("p1")
+            self.state.write_applied(self.state.prepare_write())
+
+        self.draw_for("p1")
+        write = self.state.prepare_write()
+
+        self.assertIsNotNone(write["props"])
+        self.assertIsNone(write["ops"])
+        self.assertEqual(write["seq"], 3)
+        self.assertEqual(self.state.snapshot_seq, 3)
+
+    def test_player_reorder_is_written_in_full(self):
+        """Test that a change in turn order replaces the player states"""
+        old = capture_properties(self.state)
+        self.state.player_states = dict(reversed(list(self.state.player_states.items())))
+
+        ops = diff_properties(old, capture_properties(self.state))
+
+        self.assertEqual(ops, [["s", ["player_states"], self.state.player_states]])
+
+    @patch('backend.game.models.game_state.save_state_writes')
+    def test_persist_records_delta(self, mock_save_writes):
+        """Test that persisting a tracked state appends one delta"""
+        self.draw_for("p1")
+
+        self.state.persist()
+
+        writes = mock_save_writes.call_args[0][0]
+        self.assertEqual(len(writes), 1)
+        self.assertIsNone(writes[0]["props"])
+        self.assertEqual(self.state._delta_seq, 1)
+        self.assertIsNone(self.state.prepare_write())
+
+    @patch('backend.game.models.game_state.load_deltas')
+    def test_restore_replays_deltas(self, mock_load_deltas):
+        """Test that loading a state replays the deltas after its snapshot"""
+        old = capture_properties(self.state)
+        self.draw_for("p1")
+        self.state.direction = "counterclockwise"
+        ops = diff_properties(old, capture_properties(self.state))
+        expected = capture_properties(self.state)
+
+        stored = make_state()
+        stored.snapshot_seq = 4
+        mock_load_deltas.return_value = [(5, ops)]
+
+        stored.restore()
+
+        mock_load_deltas.assert_called_once_with("state1", 4)
+        self.assertEqual(capture_properties(stored), expected)
+        self.assertEqual(stored._delta_seq, 5)
+
+
+class GameStateDeltaReloadTests(TestCase):
+    """Tests for reloading delta-persisted states from the benchmark graph"""
+
+    @override_settings(GAME_STATE_PERSISTENCE="delta")
+    def test_state_version_survives_reload(self):
+        """Test that a reloaded state has the version of its last delta, not of its snapshot"""
+        graph = FakeGraph()
+        self.addCleanup(graph.install().close)
+        stored = make_state()
+        state = GameState(uid="state2", player_states=stored.player_states, draw_pile=stored.draw_pile).save()
+
+        for _ in range(2):
+            state.player_states["p1"]["hand"].append(state.draw_card())
+            state.commit()
+
+        reloaded = GameState.nodes.get(uid="state2")
+        self.assertEqual(reloaded.snapshot_seq, 0)
+        self.assertEqual(reloaded.state_version, 2)
+        self.assertEqual(capture_properties(reloaded), capture_properties(state))
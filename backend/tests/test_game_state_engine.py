@@ -0,0 +1,87 @@
+from unittest.mock import patch, MagicMock
+
+from backend.tests.fixtures import MockNeo4jTestCase
+from backend.game.models.game_state import GameState
+from backend.game.services.game_state_engine import GameStateEngine
+
+
+class GameStateEngineTests(MockNeo4jTestCase):
+    """Tests for the in-memory game state engine"""
+
+    def setUp(self):
+        """Set up test environment"""
+        super().setUp()
+
+        self.engine = GameStateEngine(enabled=True, flush_interval=60)
+
+        # Start the flusher as already running so tests control flushing
+        self.engine._flusher = MagicMock()
+
+        self.game_state = GameState(uid="state1")
+        self.game_state.save = MagicMock()
+        self.loader = MagicMock(return_value=self.game_state)
+
+    def test_state_is_loaded_once(self):
+        """Test that the live state is reused after the first load"""
+        first = self.engine.get_state("game1", self.loader)
+        second = self.engine.get_state("game1", self.loader)
+
+        self.assertIs(first, self.game_state)
+        self.assertIs(second, self.game_state)
+        self.loader.assert_called_once()
+
+    def test_disabled_engine_always_loads(self):
+        """Test that a disabled engine hands out freshly loaded states"""
+        engine = GameStateEngine(enabled=False)
+
+        state = engine.get_state("game1", self.loader)
+        state.commit()
+
+        self.assertEqual(self.loader.call_count, 1)
+        self.game_state.save.assert_called_once()
+
+    def test_commit_defers_write(self):
+        """Test that committing an owned state marks it dirty instead of saving"""
+        state = self.engine.get_state("game1", self.loader)
+        state.direction = "counterclockwise"
+        state.commit()
+
+        state.save.assert_not_called()
+        self.assertIn("game1", self.engine._dirty)
+
+    @patch('backend.game.services.game_state_engine.save_state_writes')
+    def test_flush_writes_dirty_states_in_one_batch(self, mock_save_states):
+        """Test that a flush writes all dirty states together"""
+        other_state = GameState(uid="state2")
+        self.engine.get_state("game1", self.loader).commit()
+        self.engine.get_state("game2", lambda: other_state).commit()
+
+        written = self.engine.flush()
+
+        self.assertEqual(written, 2)
+        mock_save_states.assert_called_once()
+        rows = mock_save_states.call_args[0][0]
+        self.assertEqual(sorted(row["uid"] for row in rows), ["state1", "state2"])
+        self.assertEqual(self.engine._dirty, set())
+
+    @patch('backend.game.services.game_state_engine.save_state_writes')
+    def test_failed_flush_keeps_states_dirty(self, mock_save_states):
+        """Test that states are retried when a flush fails"""
+        mock_save_states.side_effect = Exception("Neo4j unavailable")
+        self.engine.get_state("game1", self.loader).commit()
+
+        written = self.engine.flush()
+
+        self.assertEqual(written, 0)
+        self.assertIn("game1", self.engine._dirty)
+
+    def test_end_game_saves_and_evicts(self):
+        """Test that ending a game writes its state and forgets it"""
+        self.engine.get_state("game1", self.loader).commit()
+
+        self.engine.end_game("game1")
+
+        self.game_state.save.assert_called_once()
+        self.assertIsNone(self.game_state._write_behind)
+        self.assertNotIn("game1", self.engine._states)
+        self.assertNotIn("game1", self.engine._dirty)
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from corsheaders.middleware import CorsMiddleware
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from neomodel import config
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.game.api.views import GetGameStateView, get_game_state
+from backend.game.models import Game, Player
+from backend.game.models.game_state import GameState
+from backend.game.services import game_state_engine
+from backend.game.services.game_state_engine import GameStateEngine
+
+
+def make_state():
+    """Build a two player game state"""
+    state = GameState(uid="etag_state")
+    state.discard_pile = [{"suit": "spades", "value": "5"}]
+    state.draw_pile = [{"suit": "hearts", "value": "2"}]
+    state.player_states = {
+        "p1": {"hand": [{"suit": "clubs", "value": "7"}], "announced_one_card": False, "penalties": 0},
+        "p2": {"hand": [{"suit": "hearts", "value": "A"}], "announced_one_card": False, "penalties": 0},
+    }
+    state.current_player_uid = "p1"
+    return state
+
+
+def project_cors_settings():
+    """CORS settings of the project settings module, which the test settings leave out"""
+    with patch.object(config, "DATABASE_URL", config.DATABASE_URL):
+        from backend.card_game import settings as project_settings
+    return {name: getattr(project_settings, name) for name in dir(project_settings) if name.startswith("CORS_")}
+
+
+class GameStateETagTests(TestCase):
+    """Tests for conditional and long-polled game state requests"""
+
+    def setUp(self):
+        """Serve an engine-owned state to player p1"""
+        self.engine = GameStateEngine(enabled=True, flush_interval=3600)
+        self.addCleanup(self.engine._stop.set)
+        self.state = self.engine.get_state("game1", make_state)
+        self.player = MagicMock(uid="p1")
+
+        patchers = [
+            patch.object(game_state_engine, "_engine", self.engine),
+            patch.object(GetGameStateView, "get_game_and_validate_player",
+                         lambda view, request, game_id: (MagicMock(uid=game_id), self.player, self.state)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def request(self, query="", **headers):
+        request = APIRequestFactory().get(f"/api/games/game1/state/{query}", **headers)
+        force_authenticate(request, user=MagicMock(uid="p1", is_authenticated=True))
+        return request
+
+    def test_matching_etag_gets_304(self):
+        """Test that the ETag follows the state version and a match is answered without a body"""
+        response = GetGameStateView.as_view()(self.request(), game_id="game1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"etag_state-0"')
+        self.assertIn("hand", response.data["players"]["p1"])
+
+        response = GetGameStateView.as_view()(self.request(HTTP_IF_NONE_MATCH='"etag_state-0"'), game_id="game1")
+        self.assertEqual(response.status_code, 304)
+
+        self.state.commit()
+        response = GetGameStateView.as_view()(self.request(HTTP_IF_NONE_MATCH='"etag_state-0"'), game_id="game1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Game-State-Version"], "1")
+
+    def test_invalid_wait_for_version(self):
+        """Test that a non-numeric version is rejected"""
+        response = GetGameStateView.as_view()(self.request("?wait_for_version=abc"), game_id="game1")
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(GAME_STATE_LONG_POLL_TIMEOUT=5, GAME_STATE_LONG_POLL_INTERVAL=5)
+    def test_long_poll_wakes_on_commit(self):
+        """Test that a parked request returns as soon as the state is committed"""
+        def commit_later():
+            time.sleep(0.05)
+            with self.engine.lock("game1"):
+                self.state.current_player_uid = "p2"
+                self.state.commit()
+
+        threading.Thread(target=commit_later).start()
+        started = time.monotonic()
+        response = asyncio.run(get_game_state(self.request("?wait_for_version=0"), "game1"))
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["current_player"], "p2")
+        self.assertEqual(self.engine._watchers, {})
+
+    @override_settings(GAME_STATE_LONG_POLL_TIMEOUT=0.1, GAME_STATE_LONG_POLL_INTERVAL=0.05)
+    def test_long_poll_times_out_with_304(self):
+        """Test that an unchanged state is answered 304 once the timeout passes"""
+        response = asyncio.run(get_game_state(self.request("?wait_for_version=0"), "game1"))
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Game-State-Version"], "0")
+
+
+class GameStateLookupTests(TestCase):
+    """Tests for the game state endpoint loading its game, player and state from the graph"""
+
+    def setUp(self):
+        """Store a game of two players with its state in the benchmark graph"""
+        graph = FakeGraph()
+        self.addCleanup(graph.install().close)
+        engine = GameStateEngine(enabled=True, flush_interval=3600)
+        self.addCleanup(engine._stop.set)
+        patcher = patch.object(game_state_engine, "_engine", engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.game = Game(status="in_progress").save()
+        self.players = {uid: Player(uid=uid, username=f"lookup_{uid}").save() for uid in ("p1", "p2")}
+        for player in self.players.values():
+            self.game.players.connect(player)
+        state = make_state()
+        state.uid = "lookup_state"
+        state.save()
+        state.game.connect(self.game)
+
+    def get(self, user_uid, **headers):
+        request = APIRequestFactory().get(f"/api/games/{self.game.uid}/state/", **headers)
+        force_authenticate(request, user=MagicMock(uid=user_uid, is_authenticated=True))
+        return GetGameStateView.as_view()(request, game_id=self.game.uid)
+
+    def test_state_served_from_the_graph(self):
+        """Test that a participant gets the stored state and can revalidate it by ETag"""
+        response = self.get("p1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"lookup_state-0"')
+        self.assertEqual(response.data["current_player"], "p1")
+
+        self.assertEqual(self.get("p1", HTTP_IF_NONE_MATCH='"lookup_state-0"').status_code, 304)
+
+    def test_outsiders_refused(self):
+        """Test that other players are refused and unknown players get 404"""
+        Player(uid="p3", username="lookup_p3").save()
+
+        self.assertEqual(self.get("p3").status_code, 403)
+        self.assertEqual(self.get("nobody").status_code, 404)
+
+
+class GameStateCorsTests(TestCase):
+    """Tests for cross-origin conditional game state requests"""
+
+    def test_conditional_request_allowed_cross_origin(self):
+        """Test that the frontend may send If-None-Match and read the ETag and version back"""
+        middleware = CorsMiddleware(lambda request: HttpResponse())
+        origin = "http://localhost:3000"
+
+        with override_settings(**project_cors_settings()):
+            preflight = middleware(RequestFactory().options(
+                "/api/games/game1/state/",
+                HTTP_ORIGIN=origin,
+                HTTP_ACCESS_CONTROL_REQUEST_METHOD="GET",
+                HTTP_ACCESS_CONTROL_REQUEST_HEADERS="authorization, if-none-match"
+            ))
+            response = middleware(RequestFactory().get("/api/games/game1/state/", HTTP_ORIGIN=origin))
+
+        self.assertEqual(preflight["Access-Control-Allow-Origin"], origin)
+        self.assertIn("if-none-match", preflight["Access-Control-Allow-Headers"].split(", "))
+        exposed = response["Access-Control-Expose-Headers"].split(", ")
+        self.assertIn("etag", exposed)
+        self.assertIn("x-game-state-version", exposed)
@@ -0,0 +1,215 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.game.api.views import StartGameView
+from backend.game.models import Game, Player, PlayerGroup
+from backend.game.models.game_state import GameState
+from backend.game.services import game_view_cache
+from backend.game.services.game_service_utils.fetch_game_detail import fetch_game_detail
+from backend.game.services.game_view_cache import GameViewCache, get_game_view_cache, invalidates_game_views
+from backend.game.services.player_group_service import PlayerGroupService
+from backend.tests.fixtures import MockPlayers
+
+
+class FakeRedis:
+    """The handful of Redis commands the cache issues, kept in a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+
+    def expire(self, key, seconds):
+        pass
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+
+def make_state():
+    """Build an engine-owned game state so commits stay in memory"""
+    state = GameState(uid="cached_state")
+    state.discard_pile = [{"suit": "spades", "value": "5"}]
+    state.draw_pile = [{"suit": "hearts", "value": "2"}]
+    state.player_states = {
+        "p1": {"hand": [{"suit": "clubs", "value": "7"}], "announced_one_card": False, "penalties": 0},
+        "p2": {"hand": [{"suit": "hearts", "value": "A"}], "announced_one_card": False, "penalties": 0},
+    }
+    state.current_player_uid = "p1"
+    state._write_behind = MagicMock()
+    return state
+
+
+class GameViewCacheTests(TestCase):
+    """Tests for the versioned game view cache"""
+
+    def setUp(self):
+        """Route GameState commits to a fresh cache"""
+        self.cache = GameViewCache()
+        patcher = patch("backend.game.services.game_view_cache.get_game_view_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_state_view_matches_serialize(self):
+        """Test that the cached view equals serialize and each player only sees their own hand"""
+        state = make_state()
+
+        self.assertEqual(self.cache.state_view(state, "p1"), state.serialize(for_player_id="p1"))
+        view = self.cache.state_view(state, "p2")
+        self.assertEqual(view, state.serialize(for_player_id="p2"))
+        self.assertNotIn("hand", view["players"]["p1"])
+        self.assertEqual(self.cache.misses, 3)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_commit_invalidates_state_view(self):
+        """Test that a committed mutation is visible on the next read"""
+        state = make_state()
+        self.cache.state_view(state, "p1")
+
+        state.player_states["p1"]["hand"].append(state.draw_card())
+        state.commit()
+
+        self.assertEqual(state.state_version, 1)
+        view = self.cache.state_view(state, "p1")
+        self.assertEqual(view["draw_pile_count"], 0)
+        self.assertEqual(len(view["players"]["p1"]["hand"]), 2)
+        self.assertEqual([key for key in self.cache._entries if key[1] == 0], [])
+
+    def test_game_detail_invalidated_by_mutation(self):
+        """Test that a decorated mutation invalidates the cached game detail"""
+        loader = MagicMock(side_effect=[{"status": "waiting"}, {"status": "in_progress"}])
+
+        @invalidates_game_views
+        def start_game(game_uid):
+            return True
+
+        self.assertEqual(self.cache.game_detail("game1", loader)["status"], "waiting")
+        self.assertEqual(self.cache.game_detail("game1", loader)["status"], "waiting")
+        start_game("game1")
+        self.assertEqual(self.cache.game_detail("game1", loader)["status"], "in_progress")
+        self.assertEqual(loader.call_count, 2)
+
+    def test_redis_tier_shared_between_workers(self):
+        """Test that views and invalidations propagate through Redis"""
+        redis = FakeRedis()
+        worker1 = GameViewCache(redis_client=redis)
+        worker2 = GameViewCache(redis_client=redis)
+
+        worker1.game_detail("game1", lambda: {"status": "waiting"})
+        self.assertEqual(worker2.game_detail("game1", lambda: {"status": "stale"}), {"status": "waiting"})
+
+        worker1.invalidate("game:game1")
+        self.assertEqual(worker2.game_detail("game1", lambda: {"status": "in_progress"}),
+                         {"status": "in_progress"})
+        self.assertNotIn("game_view:game:game1:0", redis.data)
+
+
+class GameDetailInvalidationTests(TestCase):
+    """Tests that game mutations outside GameService drop the cached game detail"""
+
+    def setUp(self):
+        """Route every cache lookup to a fresh enabled cache"""
+        self.cache = GameViewCache()
+        for target in ("backend.game.services.game_view_cache.get_game_view_cache",
+                       "backend.game.api.views.get_game_view_cache"):
+            patcher = patch(target, return_value=self.cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_starting_a_game_invalidates_detail(self):
+        """Test that the started status shows in the detail read after StartGameView"""
+        game = MagicMock(uid="game1", status="waiting", creator_id="p1", players=MockPlayers(["p1", "p2"]))
+        game.rule_set.get.return_value.parameters = {}
+        game_state = MagicMock(player_states={"p1": {"hand": []}, "p2": {"hand": []}})
+        engine = MagicMock()
+        engine.get_state.return_value = game_state
+        player = MagicMock(uid="p1")
+        patches = [
+            patch("backend.game.api.views.get_node_or_404", side_effect=lambda model, **filters: (
+                game if model is Game else player)),
+            patch("backend.game.api.views.get_game_state_engine", return_value=engine),
+            patch("backend.game.api.views.get_state_patch_log"),
+            patch("backend.game.api.views.GameNotifications"),
+            patch.object(StartGameView, "serialize_state", return_value={}),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        loader = lambda: {"status": game.status}
+
+        self.assertEqual(self.cache.game_detail("game1", loader)["status"], "waiting")
+        request = APIRequestFactory().post("/api/games/game1/start/")
+        force_authenticate(request, user=MagicMock(uid="p1", is_authenticated=True))
+        response = StartGameView.as_view()(request, game_id="game1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.cache.game_detail("game1", loader)["status"], "active")
+
+    def test_inviting_a_group_invalidates_detail(self):
+        """Test that an invited group shows in the detail read after the invitation"""
+        graph = FakeGraph()
+        self.addCleanup(graph.install().close)
+        creator = Player(uid="host", username="invite_host").save()
+        game = Game(status="waiting").save()
+        game.creator.connect(creator)
+        group = PlayerGroup(name="invite_group").save()
+        group.owner.connect(creator)
+        group.members.connect(creator)
+        patcher = patch.object(PlayerGroupService, "send_group_game_invitation_notification")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        loader = lambda: fetch_game_detail(game.uid)
+
+        self.assertEqual(self.cache.game_detail(game.uid, loader)["invited_groups"], [])
+        PlayerGroupService.invite_group_to_game(game.uid, group.uid, "host")
+
+        self.assertEqual(self.cache.game_detail(game.uid, loader)["invited_groups"],
+                         [{"group_uid": group.uid, "name": "invite_group"}])
+
+
+class GameViewCacheSettingsTests(TestCase):
+    """Tests for the process-wide cache built from settings"""
+
+    def build(self, **options):
+        """Build the process-wide cache from the given settings"""
+        patcher = patch.object(game_view_cache, "settings", SimpleNamespace(**options))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(game_view_cache, "_cache", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return get_game_view_cache()
+
+    def test_disabled_by_default_without_redis(self):
+        """Test that per-process caching has to be asked for"""
+        self.assertFalse(self.build().enabled)
+        self.assertTrue(self.build(GAME_VIEW_CACHE_ENABLED=True).enabled)
+
+    def test_enabled_by_default_with_redis(self):
+        """Test that a shared Redis tier turns the cache on"""
+        with patch("redis.Redis.from_url") as from_url:
+            cache = self.build(GAME_VIEW_CACHE_REDIS_URL="redis://redis:6379/1")
+
+        self.assertTrue(cache.enabled)
+        self.assertIs(cache.redis, from_url.return_value)
@@ -1,8 +1,11 @@
+import asyncio
 import json
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from django.test import TestCase
 
 from backend.tests.fixtures import MockNeo4jTestCase
+from backend.card_game.notification_dispatch import group_send_many
+from backend.game.api.consumers import GameConsumer
 from backend.game.api.notifications import GameNotifications
 
 
@@ -285,3 +288,80 @@ class GameNotificationsTestCase(MockNeo4jTestCase):
 
         # Check the result
         self.assertFalse(result)
+
+    def test_notify_card_drawn_with_private_card(self):
+        """Test that the drawn card only goes to the drawing player's group"""
+        # Call the notification method
+        result = GameNotifications.notify_card_drawn(
+            game_id=self.game_id,
+            player_id=self.player_id,
+            card=self.card
+        )
+
+        # Check the result
+        self.assertTrue(result)
+
+        # Check that every message went out in one batch
+        self.mock_async_to_sync.assert_called_once_with(group_send_many)
+        args, kwargs = self.mock_wrapped_func.call_args
+        public, private = args[1]
+
+        self.assertEqual(public[0], f"game_{self.game_id}")
+        self.assertEqual(public[1]["exclude_player_ids"], [self.player_id])
+        self.assertNotIn("private", public[1])
+        self.assertEqual(private[0], f"player_{self.player_id}")
+        self.assertEqual(private[1]["data"], {"player_id": self.player_id})
+        self.assertEqual(private[1]["private"], {"card": self.card})
+
+    def test_notify_game_started_with_hands(self):
+        """Test that each player gets their own dealt hand"""
+        hands = {"player1": [self.card], "player2": []}
+
+        result = GameNotifications.notify_game_started(self.game_id, hands=hands)
+
+        self.assertTrue(result)
+        args, kwargs = self.mock_wrapped_func.call_args
+        groups = [group for group, message in args[1]]
+        self.assertEqual(groups, ["game_game1", "player_player1", "player_player2"])
+        self.assertEqual(args[1][0][1]["exclude_player_ids"], ["player1", "player2"])
+        self.assertEqual(args[1][2][1]["private"], {"hand": []})
+
+
+class GameConsumerNotificationTestCase(TestCase):
+    """Test case for forwarding game notifications to a player's socket"""
+
+    def setUp(self):
+        """Set up a consumer for player1"""
+        self.consumer = GameConsumer()
+        self.consumer.player_id = "player1"
+        self.consumer.send = AsyncMock()
+
+    def test_private_overlay_forwarded(self):
+        """Test that the private part of an event reaches the player"""
+        asyncio.run(self.consumer.game_notification({
+            "type": "game.notification",
+            "event_type": "card_drawn",
+            "data": {"player_id": "player1"},
+            "private": {"card": {"suit": "hearts", "value": "A"}}
+        }))
+
+        message = json.loads(self.consumer.send.call_args.kwargs["text_data"])
+        self.assertEqual(message["type"], "card_drawn")
+        self.assertEqual(message["private"]["card"]["value"], "A")
+
+    def test_public_copy_skipped_for_private_recipient(self):
+        """Test that a player with an overlay does not also get the public copy"""
+        event = {
+            "type": "game.notification",
+            "event_type": "card_drawn",
+            "data": {"player_id": "player1"},
+            "exclude_player_ids": ["player1"]
+        }
+
+        asyncio.run(self.consumer.game_notification(event))
+        self.consumer.player_id = "player2"
+        asyncio.run(self.consumer.game_notification(event))
+
+        self.assertEqual(self.consumer.send.call_count, 1)
+        message = json.loads(self.consumer.send.call_args.kwargs["text_data"])
+        self.assertNotIn("private", message)
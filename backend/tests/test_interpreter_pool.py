@@ -0,0 +1,72 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from backend.game.services.rule_interpreter.base import InterpreterPool
+from backend.game.services.rule_interpreter.compiled_rule_set import invalidate_compiled_rule_set
+
+
+def make_rule_set(uid, version):
+    """Build a rule set stand-in"""
+    rule_set = MagicMock()
+    rule_set.uid = uid
+    rule_set.version = version
+    rule_set.parameters = {"card_actions": {}}
+    return rule_set
+
+
+class InterpreterPoolTests(TestCase):
+    """Tests for the rule interpreter LRU pool"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.pool = InterpreterPool(max_size=2)
+        self.versions = ["idiot_cards-pool1", "idiot_cards-pool2", "action_cards-pool3"]
+
+    def tearDown(self):
+        """Clean up the compiled rule set cache"""
+        for uid in ("rs0", "rs1", "rs2"):
+            invalidate_compiled_rule_set(uid)
+
+    def test_reuses_warm_interpreter(self):
+        """Test that the same rule set gets the same interpreter"""
+        rule_set = make_rule_set("rs1", self.versions[0])
+
+        first = self.pool.get(rule_set)
+        second = self.pool.get(rule_set)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.pool.stats(), {"size": 1, "hits": 1, "misses": 1})
+
+    def test_evicts_least_recently_used(self):
+        """Test that the pool stays bounded and drops the oldest interpreter"""
+        rule_sets = [make_rule_set(f"rs{i}", version) for i, version in enumerate(self.versions)]
+        first = self.pool.get(rule_sets[0])
+        self.pool.get(rule_sets[1])
+        self.pool.get(rule_sets[0])
+        self.pool.get(rule_sets[2])
+
+        self.assertEqual(self.pool.stats()["size"], 2)
+        self.assertIs(self.pool.get(rule_sets[0]), first)
+        self.pool.get(rule_sets[1])
+        self.assertEqual(self.pool.stats()["misses"], 4)
+
+    def test_rebuilds_after_rule_set_changes(self):
+        """Test that saving a rule set replaces its pooled interpreter"""
+        rule_set = make_rule_set("rs1", self.versions[0])
+        first = self.pool.get(rule_set)
+
+        invalidate_compiled_rule_set("rs1")
+
+        self.assertIsNot(self.pool.get(rule_set), first)
+
+    def test_rule_sets_sharing_a_version_pooled_apart(self):
+        """Test that rule sets with the same version get their own interpreters"""
+        first = make_rule_set("rs1", self.versions[0])
+        second = make_rule_set("rs2", self.versions[0])
+
+        first_interpreter = self.pool.get(first)
+        second_interpreter = self.pool.get(second)
+
+        self.assertIsNot(first_interpreter, second_interpreter)
+        self.assertIs(second_interpreter.compiled.rule_set, second)
+        self.assertIs(self.pool.get(first), first_interpreter)
@@ -0,0 +1,95 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.game.models import Game, Player
+from backend.game.services.game_service_utils import InvalidCursor, list_player_games
+from backend.game.views.game_viewset import GameViewSet
+from backend.tests.test_game_state_etag import project_cors_settings
+
+
+class ListPlayerGamesTests(TestCase):
+    """Tests for the batched, cursor-paginated game listing"""
+
+    def setUp(self):
+        """Create a player in five games, two of them completed"""
+        self.graph = FakeGraph()
+        stack = self.graph.install()
+        stack.__enter__()
+        self.addCleanup(stack.close)
+
+        self.player = Player(username="veteran").save()
+        self.other = Player(username="opponent").save()
+        self.games = []
+        for index in range(5):
+            game = Game(status="completed" if index % 2 else "in_progress").save()
+            game.players.connect(self.player)
+            game.players.connect(self.other)
+            game.creator.connect(self.player)
+            self.games.append(game)
+        self.games[1].winner.connect(self.other)
+
+    def test_pages_cover_all_games_newest_first(self):
+        """Test that following cursors walks every game once, one query per page"""
+        seen = []
+        cursor = None
+        pages = 0
+        before = self.graph.queries
+        while True:
+            games, cursor = list_player_games(self.player.uid, cursor=cursor, limit=2)
+            seen.extend(games)
+            pages += 1
+            if not cursor:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(self.graph.queries - before, 3)
+        expected = sorted(self.games, key=lambda g: (g.created_at, g.uid), reverse=True)
+        self.assertEqual([g["game_uid"] for g in seen], [g.uid for g in expected])
+        self.assertEqual({p["username"] for p in seen[0]["players"]}, {"veteran", "opponent"})
+        self.assertEqual(seen[0]["creator"], self.player.uid)
+
+    def test_unlimited_listing(self):
+        """Test that without a limit every game comes back in one query, with no cursor"""
+        before = self.graph.queries
+        games, cursor = list_player_games(self.player.uid, limit=None)
+
+        self.assertIsNone(cursor)
+        self.assertEqual(self.graph.queries - before, 1)
+        self.assertEqual(len(games), 5)
+
+    def test_view_paginates_only_when_asked(self):
+        """Test that the list endpoint returns every game unless given a limit or cursor"""
+        def get(query=""):
+            request = APIRequestFactory().get(f"/api/games/{query}")
+            force_authenticate(request, user=MagicMock(uid=self.player.uid, is_authenticated=True))
+            return GameViewSet.as_view({"get": "list"})(request)
+
+        unpaginated = get()
+        first = get("?limit=3")
+        rest = get(f"?cursor={first['X-Next-Cursor']}")
+
+        self.assertEqual(len(unpaginated.data), 5)
+        self.assertFalse(unpaginated.has_header("X-Next-Cursor"))
+        self.assertEqual(len(first.data), 3)
+        self.assertEqual(len(rest.data), 2)
+        self.assertFalse(rest.has_header("X-Next-Cursor"))
+        self.assertEqual([g["game_uid"] for g in first.data + rest.data],
+                         [g["game_uid"] for g in unpaginated.data])
+        self.assertIn("x-next-cursor", project_cors_settings()["CORS_EXPOSE_HEADERS"])
+
+    def test_status_filter(self):
+        """Test that only games in the requested statuses are returned"""
+        games, cursor = list_player_games(self.player.uid, statuses=["completed"])
+
+        self.assertIsNone(cursor)
+        self.assertEqual({g["game_uid"] for g in games}, {self.games[1].uid, self.games[3].uid})
+        winners = {g["game_uid"]: g["winner"] for g in games}
+        self.assertEqual(winners[self.games[1].uid], self.other.uid)
+
+    def test_invalid_cursor_rejected(self):
+        """Test that a malformed cursor raises InvalidCursor"""
+        with self.assertRaises(InvalidCursor):
+            list_player_games(self.player.uid, cursor="not-a-cursor")
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from unittest import TestCase, mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from neomodel import config
+
+from backend.card_game import neo4j_connection
+from backend.card_game.middleware import Neo4jSessionMiddleware
+from backend.card_game.neo4j_connection import Neo4jConnectionManager, session_scope
+from backend.card_game.query_stats import collect_queries
+
+
+class FakePool:
+    """Connection pool whose acquisitions take a fixed time"""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.connections = {"neo4j:7687": [mock.Mock(in_use=True), mock.Mock(in_use=False)]}
+
+    def acquire(self, **kwargs):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return mock.Mock()
+
+    def in_use_connection_count(self, address):
+        return sum(connection.in_use for connection in self.connections[address])
+
+
+class FakeDriver:
+    """Driver opening a fresh mock session per call"""
+
+    def __init__(self, pool=None):
+        self._pool = pool or FakePool()
+        self.opened = []
+
+    def session(self, **parameters):
+        session = mock.MagicMock(parameters=parameters)
+        self.opened.append(session)
+        return session
+
+
+def fake_graph_driver(uri, **options):
+    driver = FakeDriver()
+    driver.uri, driver.options = uri, options
+    return driver
+
+
+class ConnectionManagerTests(TestCase):
+    """Tests for the process-wide Neo4j driver"""
+
+    def setUp(self):
+        """Keep neomodel's connection settings as they were"""
+        saved = {name: getattr(config, name, None) for name in
+                 ("DATABASE_URL", "DATABASE_NAME", "DRIVER", "MAX_CONNECTION_POOL_SIZE",
+                  "CONNECTION_ACQUISITION_TIMEOUT")}
+        self.addCleanup(lambda: [setattr(config, name, value) for name, value in saved.items()])
+
+        manager = mock.patch.object(neo4j_connection, "_manager", None)
+        manager.start()
+        self.addCleanup(manager.stop)
+
+    def connect(self, pool=None):
+        manager = Neo4jConnectionManager("bolt://neo4j:p%40ss@db:7688/cards", pool_size=7, acquisition_timeout=2)
+        with mock.patch.object(neo4j_connection.GraphDatabase, "driver", side_effect=fake_graph_driver):
+            manager.connect()
+        if pool is not None:
+            manager.driver._pool = pool
+            manager._instrument_pool()
+        return manager
+
+    @override_settings(NEOMODEL_NEO4J_BOLT_URL="bolt://neo4j:pw@db:7687", NEOMODEL_MAX_CONNECTION_POOL_SIZE=12)
+    def test_configured_once_from_settings(self):
+        """Test that one driver is built from settings and handed to neomodel"""
+        with mock.patch.object(neo4j_connection.GraphDatabase, "driver", side_effect=fake_graph_driver) as driver:
+            manager = neo4j_connection.configure()
+            self.assertIs(neo4j_connection.configure(), manager)
+
+        driver.assert_called_once()
+        self.assertEqual(manager.driver.uri, "bolt://db:7687")
+        self.assertEqual(manager.driver.options["max_connection_pool_size"], 12)
+        self.assertEqual(manager.driver.options["auth"], ("neo4j", "pw"))
+        self.assertIs(config.DRIVER, manager.driver)
+        self.assertEqual(config.MAX_CONNECTION_POOL_SIZE, 12)
+
+    def test_url_credentials_and_database(self):
+        """Test that quoted passwords are decoded and the URL path names the database"""
+        manager = self.connect()
+
+        self.assertEqual(manager.driver.options["auth"], ("neo4j", "p@ss"))
+        self.assertEqual(manager.driver.options["connection_acquisition_timeout"], 2)
+        self.assertEqual(config.DATABASE_NAME, "cards")
+
+    def test_session_scope_shares_one_session(self):
+        """Test that statements in a scope share a session, closed once when the scope ends"""
+        manager = self.connect()
+        driver = manager.driver
+
+        with session_scope():
+            with driver.session(database="cards", impersonated_user=None) as first:
+                pass
+            first.close()
+            second = driver.session(default_access_mode="WRITE", database="cards", impersonated_user=None)
+            with session_scope():
+                driver.session(database="cards")
+            other_database = driver.session(database="system")
+            driver.session(database="cards", impersonated_user="admin")
+
+        self.assertEqual(len(driver.opened), 3)
+        self.assertIs(second._session, first._session)
+        self.assertIsNot(other_database._session, first._session)
+        first._session.close.assert_called_once()
+        driver.opened[1].close.assert_called_once()
+
+        driver.session(database="cards")
+        self.assertEqual(len(driver.opened), 4)
+
+    def test_pool_wait_measured(self):
+        """Test that acquisitions are timed into the metrics and the current QueryStats"""
+        manager = self.connect(FakePool(delay=0.01))
+
+        with collect_queries() as stats:
+            manager.driver._pool.acquire(access_mode="WRITE", timeout=2)
+        manager.driver._pool.error = RuntimeError("pool exhausted")
+        with self.assertRaises(RuntimeError):
+            manager.driver._pool.acquire(access_mode="WRITE", timeout=2)
+
+        metrics = manager.metrics()
+        self.assertEqual(metrics["acquisitions"], 2)
+        self.assertEqual(metrics["failures"], 1)
+        self.assertEqual(metrics["in_use"], 1)
+        self.assertEqual(metrics["pool_size"], 7)
+        self.assertGreaterEqual(metrics["max_wait_ms"], 10)
+        self.assertGreaterEqual(stats.as_dict(5)["pool_wait_ms"], 10)
+
+
+class Neo4jSessionMiddlewareTests(TestCase):
+    """Tests for the per-request session scope"""
+
+    def test_request_runs_in_a_scope(self):
+        """Test that views run inside a session scope, sync and async, unless disabled"""
+        request = RequestFactory().get("/api/games/")
+        seen = []
+
+        def view(request):
+            seen.append(neo4j_connection._scope.get())
+            return HttpResponse()
+
+        async def async_view(request):
+            return view(request)
+
+        Neo4jSessionMiddleware(view)(request)
+        asyncio.run(Neo4jSessionMiddleware(async_view)(request))
+        with override_settings(NEO4J_REQUEST_SESSION=False):
+            Neo4jSessionMiddleware(view)(request)
+
+        self.assertEqual(seen[:2], [{}, {}])
+        self.assertIsNone(seen[2])
+        self.assertIsNone(neo4j_connection._scope.get())
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import threading
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from channels.layers import InMemoryChannelLayer
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.card_game import json_codec
+from backend.card_game.middleware import NotificationBatchMiddleware
+from backend.card_game.notification_dispatch import (
+    NotificationDispatcher, coalesce, collect_notifications, group_send_many, send_to_groups
+)
+from backend.game.api.consumers import GameConsumer
+from backend.game.api.notifications import GameNotifications
+from backend.game.models import Game, Player
+from backend.game.services.game_service import GameService
+
+
+class RecordingLayer:
+    """Channel layer recording the group messages sent through it"""
+
+    def __init__(self):
+        self.sent = []
+        self.done = threading.Event()
+
+    async def group_send(self, group_name, message):
+        self.sent.append((group_name, message))
+        self.done.set()
+
+
+class NotificationDispatchTests(TestCase):
+    """Tests for collecting and coalescing channel layer notifications"""
+
+    def test_request_events_coalesce_into_one_batch(self):
+        """Test that a move's notifications become one message per group"""
+        with patch("backend.game.api.notifications.async_to_sync") as mock_async_to_sync:
+            with collect_notifications() as messages:
+                GameNotifications.notify_card_played("game1", "player1", {"suit": "hearts", "value": "7"})
+                GameNotifications.notify_turn_changed("game1", "player2")
+                GameNotifications.send_to_player("player2", "your_turn", {})
+
+        mock_async_to_sync.assert_not_called()
+        batch = coalesce(messages)
+        self.assertEqual([group_name for group_name, message in batch], ["game_game1", "player_player2"])
+        self.assertEqual(batch[0][1]["type"], "batch_update")
+        self.assertEqual([m["event_type"] for m in batch[0][1]["messages"]], ["card_played", "turn_changed"])
+        self.assertEqual(batch[1][1]["event_type"], "your_turn")
+
+    def test_full_queue_drops_oldest_and_merges_the_rest(self):
+        """Test that a group's bounded queue is drained as a single batch"""
+        layer = RecordingLayer()
+        dispatcher = NotificationDispatcher(background=True, max_queue=2)
+
+        async def run():
+            dispatcher._loop = asyncio.get_running_loop()
+            for number in range(3):
+                dispatcher._enqueue([("game_game1", {"type": "game.notification", "number": number})])
+            await dispatcher._draining
+
+        with patch("backend.card_game.notification_dispatch.get_channel_layer", return_value=layer):
+            asyncio.run(run())
+
+        self.assertEqual(dispatcher.dropped, 1)
+        self.assertEqual(len(layer.sent), 1)
+        self.assertEqual([m["number"] for m in layer.sent[0][1]["messages"]], [1, 2])
+
+    def test_background_dispatch_does_not_wait(self):
+        """Test that background dispatch sends from its own loop"""
+        layer = RecordingLayer()
+        dispatcher = NotificationDispatcher(background=True)
+
+        with patch("backend.card_game.notification_dispatch.get_channel_layer", return_value=layer):
+            dispatcher.dispatch([("game_game1", {"type": "game.notification"})])
+            self.assertTrue(layer.done.wait(2))
+
+        self.assertEqual(layer.sent, [("game_game1", {"type": "game.notification"})])
+        dispatcher._loop.call_soon_threadsafe(dispatcher._loop.stop)
+
+    def test_middleware_dispatches_once_per_request(self):
+        """Test that notifications sent by a view are dispatched after the response"""
+        def view(request):
+            GameNotifications.notify_card_drawn("game1", "player1")
+            GameNotifications.notify_turn_changed("game1", "player2")
+            return HttpResponse()
+
+        dispatcher = MagicMock()
+        with patch("backend.card_game.middleware.get_notification_dispatcher", return_value=dispatcher):
+            NotificationBatchMiddleware(view)(RequestFactory().post("/api/games/game1/draw-card/"))
+
+        dispatcher.dispatch.assert_called_once()
+        messages = dispatcher.dispatch.call_args.args[0]
+        self.assertEqual([m["event_type"] for group_name, m in messages], ["card_drawn", "turn_changed"])
+
+
+class BatchUpdateConsumerTests(TestCase):
+    """Tests for unpacking a coalesced batch_update in a consumer"""
+
+    def test_batch_runs_each_handler_and_sends_one_frame(self):
+        """Test that every message goes through its handler and the client gets one frame"""
+        consumer = GameConsumer()
+        consumer.player_id = "player1"
+        consumer.base_send = AsyncMock()
+
+        asyncio.run(consumer.batch_update({"type": "batch_update", "messages": [
+            {"type": "game.notification", "event_type": "card_played", "data": {"player_id": "player2"}},
+            {"type": "game.notification", "event_type": "turn_changed", "data": {"player_id": "player1"}},
+            {"type": "unknown.event", "data": {}},
+        ]}))
+
+        consumer.base_send.assert_awaited_once()
+        frame = json.loads(consumer.base_send.call_args.args[0]["text"])
+        self.assertEqual(frame["type"], "batch_update")
+        self.assertEqual([update["type"] for update in frame["updates"]], ["card_played", "turn_changed"])
+
+
+class BroadcastFrameTests(TestCase):
+    """Tests for encoding client frames once per broadcast"""
+
+    def test_shared_message_encoded_once(self):
+        """Test that a message sent to many groups is encoded a single time"""
+        message = {"type": "game_started", "data": {"game_uid": "game1"}}
+        with patch("backend.card_game.notification_dispatch.dumps", wraps=json_codec.dumps) as dumps:
+            with collect_notifications() as messages:
+                send_to_groups(MagicMock(), [(f"user_p{number}", message) for number in range(8)])
+
+        dumps.assert_called_once()
+        self.assertEqual(json.loads(messages[0][1]["frame"]), {"type": "game_started", "data": {"game_uid": "game1"}})
+
+    def test_consumers_forward_frame_untouched(self):
+        """Test that every socket sends the pre-encoded frame without encoding again"""
+        with collect_notifications() as messages:
+            GameNotifications.notify_turn_changed("game1", "player2")
+        event = messages[0][1]
+
+        consumers = []
+        for number in range(10):
+            consumer = GameConsumer()
+            consumer.player_id = f"player{number}"
+            consumer.base_send = AsyncMock()
+            consumers.append(consumer)
+
+        with patch("backend.game.consumers.dumps") as dumps:
+            for consumer in consumers:
+                asyncio.run(consumer.game_notification(event))
+
+        dumps.assert_not_called()
+        for consumer in consumers:
+            self.assertIs(consumer.base_send.call_args.args[0]["text"], event["frame"])
+        self.assertEqual(json.loads(event["frame"]), {"type": "turn_changed", "data": {"player_id": "player2"}})
+
+    def test_orjson_backend_selectable(self):
+        """Test that the orjson backend encodes the same value, or falls back to json"""
+        value = {"type": "card_played", "data": {"card": {"suit": "hearts", "value": "7"}, "hand": [1, 2]}}
+        with override_settings(WEBSOCKET_JSON_BACKEND="orjson"):
+            self.assertEqual(json.loads(json_codec.dumps(value)), value)
+        with override_settings(WEBSOCKET_JSON_BACKEND="xml"):
+            with self.assertRaises(ImproperlyConfigured):
+                json_codec.dumps(value)
+
+
+class FakeRedisPipeline:
+    """Pipeline recording the commands group_send_many queues"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.commands = []
+
+    def zremrangebyscore(self, key, min, max):
+        self.commands.append(("zremrangebyscore", key))
+
+    def zrange(self, key, start, end):
+        self.commands.append(("zrange", key))
+
+    def eval(self, script, numkeys, *args):
+        self.commands.append(("eval", args[:numkeys], args[numkeys:2 * numkeys], args[3 * numkeys:4 * numkeys]))
+
+    async def execute(self):
+        self.connection.round_trips += 1
+        results = []
+        for command in self.commands:
+            if command[0] == "zrange":
+                results.append([name.encode("utf8") for name in self.connection.groups.get(command[1], [])])
+            elif command[0] == "eval":
+                self.connection.writes.extend(zip(*command[1:3]))
+                self.connection.scores.extend(command[3])
+                results.append(0)
+            else:
+                results.append(0)
+        return results
+
+
+class FakeRedisConnection:
+    """Redis connection holding group members and the channel writes"""
+
+    def __init__(self):
+        self.groups = {}
+        self.writes = []
+        self.scores = []
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
+
+
+class GroupSendManyTests(TestCase):
+    """Tests for publishing to many groups at once"""
+
+    def test_redis_publish_takes_two_round_trips(self):
+        """Test that eight player groups are published in one read and one write"""
+        from channels_redis.core import RedisChannelLayer
+
+        layer = RedisChannelLayer(hosts=[("localhost", 6379)])
+        connection = FakeRedisConnection()
+        layer.connection = lambda index: connection
+        for number in range(8):
+            connection.groups[layer._group_key(f"user_p{number}")] = [f"specific.worker!p{number}"]
+
+        message = {"type": "game_started", "data": {"game_uid": "game1"}}
+        asyncio.run(group_send_many(layer, [(f"user_p{number}", message) for number in range(8)]))
+
+        self.assertEqual(connection.round_trips, 2)
+        self.assertEqual(len(connection.writes), 8)
+        delivered = [layer.deserialize(payload) for key, payload in connection.writes]
+        self.assertEqual([m["__asgi_channel__"] for m in delivered], [[f"specific.worker!p{n}"] for n in range(8)])
+        self.assertEqual({json.dumps(m["data"]) for m in delivered}, {'{"game_uid": "game1"}'})
+
+    def test_redis_writes_ordered_once_per_channel(self):
+        """Test that a channel in two groups gets a shared message once, and writes are scored in order"""
+        from channels_redis.core import RedisChannelLayer
+
+        layer = RedisChannelLayer(hosts=[("localhost", 6379)])
+        connection = FakeRedisConnection()
+        layer.connection = lambda index: connection
+        connection.groups[layer._group_key("game_game1")] = ["specific.worker!p1", "specific.worker!p2"]
+        connection.groups[layer._group_key("user_p1")] = ["specific.worker!p1"]
+
+        started = {"type": "game_started", "data": {"game_uid": "game1"}}
+        turn = {"type": "turn_changed", "data": {"player_id": "p1"}}
+        asyncio.run(group_send_many(layer, [("game_game1", started), ("user_p1", started), ("user_p1", turn)]))
+
+        delivered = [layer.deserialize(payload) for key, payload in connection.writes]
+        self.assertEqual([(m["type"], m["__asgi_channel__"]) for m in delivered], [
+            ("game_started", ["specific.worker!p1", "specific.worker!p2"]),
+            ("turn_changed", ["specific.worker!p1"])
+        ])
+        self.assertEqual(connection.scores, sorted(set(connection.scores)))
+        self.assertEqual(len(connection.scores), 2)
+
+    def test_other_layers_send_per_group(self):
+        """Test that layers without a pipeline still receive every message"""
+        layer = InMemoryChannelLayer()
+
+        async def run():
+            await layer.group_add("user_p1", "channel1")
+            await layer.group_add("user_p2", "channel2")
+            await group_send_many(layer, [("user_p1", {"type": "a"}), ("user_p2", {"type": "b"})])
+            return await layer.receive("channel1"), await layer.receive("channel2")
+
+        self.assertEqual(asyncio.run(run()), ({"type": "a"}, {"type": "b"}))
+
+
+class GameServiceNotificationTests(TestCase):
+    """Tests for the lobby notifications GameService publishes to several groups"""
+
+    def setUp(self):
+        """Store a started game of two players in the benchmark graph"""
+        graph = FakeGraph()
+        self.addCleanup(graph.install().close)
+        self.layer = RecordingLayer()
+        patcher = patch("backend.game.services.game_service.get_channel_layer", return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.game = Game(status="in_progress").save()
+        self.host = Player(uid="host", username="notify_host").save()
+        self.guest = Player(uid="guest", username="notify_guest").save()
+        for player in (self.host, self.guest):
+            self.game.players.connect(player)
+        self.game.current_player.connect(self.guest)
+
+    def test_player_joined_sent_to_game_and_other_players(self):
+        """Test that a join reaches the game group and every other player's group"""
+        GameService.send_player_joined_notification(self.game, self.guest)
+
+        self.assertEqual([group for group, _ in self.layer.sent], [f"game_{self.game.uid}", "user_host"])
+        self.assertEqual(self.layer.sent[0][1]["data"]["game_uid"], self.game.uid)
+        self.assertEqual(self.layer.sent[1][1]["data"]["player"]["user_uid"], "guest")
+
+    def test_game_started_sent_to_game_and_each_player(self):
+        """Test that a start reaches the game group and tells each player whose turn it is"""
+        GameService.send_game_started_notification(self.game)
+
+        sent = dict(self.layer.sent)
+        self.assertEqual(set(sent), {f"game_{self.game.uid}", "user_host", "user_guest"})
+        self.assertEqual(sent[f"game_{self.game.uid}"]["data"]["current_player"], "guest")
+        self.assertTrue(sent["user_guest"]["data"]["is_your_turn"])
+        self.assertFalse(sent["user_host"]["data"]["is_your_turn"])
@@ -0,0 +1,93 @@
+import asyncio
+from unittest import TestCase, mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from neomodel import db
+from neomodel.util import Database
+
+from backend.card_game.middleware import QueryStatsMiddleware
+from backend.card_game.query_stats import (
+    QueryStatsConsumerMixin, collect_queries, instrument, query_shape
+)
+
+
+def fake_cypher_query(db, query, params=None, *args, **kwargs):
+    """Stand-in for the Bolt round trip"""
+    return [], []
+
+
+class QueryStatsTests(TestCase):
+    """Tests for the per-request Neo4j query counter"""
+
+    def setUp(self):
+        """Route cypher_query to an instrumented stand-in"""
+        patcher = mock.patch.object(Database, "cypher_query", instrument(fake_cypher_query))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shapes_ignore_literals_and_whitespace(self):
+        """Test that statements differing only in literals share a shape"""
+        self.assertEqual(
+            query_shape("MATCH (g:Game {uid: 'a'})\n  RETURN g LIMIT 1"),
+            query_shape("MATCH (g:Game {uid: 'b'}) RETURN g LIMIT 2")
+        )
+        self.assertIn("$uid", query_shape("MATCH (g:Game {uid: $uid}) RETURN g"))
+
+    def test_queries_counted_only_while_collecting(self):
+        """Test that statements are recorded inside collect_queries only"""
+        db.cypher_query("MATCH (n) RETURN n")
+        with collect_queries() as stats:
+            for _ in range(3):
+                db.cypher_query("MATCH (p:Player) WHERE p.uid = $uid RETURN p", {"uid": "x"})
+            db.cypher_query("MATCH (g:Game) RETURN g")
+
+        self.assertEqual(stats.count, 4)
+        summary = stats.as_dict(threshold=3)
+        self.assertTrue(summary["n_plus_one"])
+        self.assertEqual(summary["repeated"][0]["count"], 3)
+        self.assertFalse(stats.as_dict(threshold=4)["n_plus_one"])
+
+    @override_settings(DEBUG=True, QUERY_STATS_ENABLED=True, QUERY_STATS_N_PLUS_ONE_THRESHOLD=2)
+    def test_middleware_sets_headers_in_debug(self):
+        """Test that the middleware reports the request's queries in headers and logs"""
+        def view(request):
+            for _ in range(2):
+                db.cypher_query("MATCH (g:Game) RETURN g")
+            return HttpResponse()
+
+        with self.assertLogs("backend.card_game.query_stats", level="WARNING") as logs:
+            response = QueryStatsMiddleware(view)(RequestFactory().get("/api/games/"))
+
+        self.assertEqual(response["X-Neo4j-Query-Count"], "2")
+        self.assertEqual(response["X-Neo4j-Repeated-Queries"], "1")
+        self.assertIn('"n_plus_one": true', logs.output[0])
+        self.assertIn("GET /api/games/", logs.output[0])
+
+    @override_settings(DEBUG=False, QUERY_STATS_ENABLED=True)
+    def test_middleware_omits_headers_outside_debug(self):
+        """Test that headers are only added in debug mode"""
+        def view(request):
+            db.cypher_query("MATCH (g:Game) RETURN g")
+            return HttpResponse()
+
+        with self.assertLogs("backend.card_game.query_stats", level="INFO"):
+            response = QueryStatsMiddleware(view)(RequestFactory().get("/api/games/"))
+
+        self.assertFalse(response.has_header("X-Neo4j-Query-Count"))
+
+    @override_settings(QUERY_STATS_ENABLED=True)
+    def test_consumer_messages_collected(self):
+        """Test that each message handled by a consumer is collected separately"""
+        class Base:
+            async def dispatch(self, message):
+                db.cypher_query("MATCH (g:Game) RETURN g")
+
+        class Consumer(QueryStatsConsumerMixin, Base):
+            scope = {"path": "/ws/game/1/"}
+
+        with self.assertLogs("backend.card_game.query_stats", level="INFO") as logs:
+            asyncio.run(Consumer().dispatch({"type": "websocket.receive"}))
+
+        self.assertIn('"scope": "websocket"', logs.output[0])
+        self.assertIn("websocket.receive /ws/game/1/", logs.output[0])
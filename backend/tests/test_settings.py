@@ -38,7 +38,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'backend.card_game.middleware.Neo4jConfigMiddleware',
+    'backend.card_game.middleware.Neo4jSessionMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.card_game.urls'
@@ -103,6 +103,9 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Game view cache (tests construct their own GameViewCache)
+GAME_VIEW_CACHE_ENABLED = False
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
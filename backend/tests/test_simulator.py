@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from backend.game.services.rule_interpreter.action_card_rule_interpreter import ActionCardRuleInterpreter
+from backend.game.services.simulator import build_rule_set, play_game, simulate
+
+
+class SimulatorTests(TestCase):
+    """Tests for the headless game simulator"""
+
+    def test_games_are_reproducible(self):
+        """Test that a seed always plays out the same game"""
+        interpreter = ActionCardRuleInterpreter(build_rule_set("idiot"))
+
+        first = play_game(interpreter, seed=7, max_turns=200)
+        second = play_game(interpreter, seed=7, max_turns=200)
+
+        self.assertEqual(first, second)
+
+    def test_simulate_reports_statistics(self):
+        """Test that a run reports throughput, turns and rule coverage"""
+        report = simulate("uno", games=20, workers=1, seed=1, max_turns=200)
+
+        self.assertEqual(report["games"], 20)
+        self.assertGreater(report["games_per_second"], 0)
+        self.assertGreater(report["finished"], 0)
+        self.assertGreater(report["turns"]["mean"], 0)
+        self.assertEqual(report["rule_coverage"]["defined"], 13)
+        self.assertGreater(report["rule_coverage"]["covered"], 0)
+
+    def test_results_do_not_depend_on_workers(self):
+        """Test that splitting games across workers gives the same totals"""
+        single = simulate("uno", games=6, workers=1, seed=3, max_turns=100)
+        split = simulate("uno", games=6, workers=2, seed=3, max_turns=100)
+
+        self.assertEqual(single["finished"], split["finished"])
+        self.assertEqual(single["rule_coverage"]["plays"], split["rule_coverage"]["plays"])
+
+    def test_unknown_rule_set(self):
+        """Test that an unknown rule set is rejected"""
+        with self.assertRaises(ValueError):
+            simulate("chess", games=1, workers=1)
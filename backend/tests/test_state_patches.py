@@ -0,0 +1,117 @@
+import asyncio
+import copy
+import json
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.game.consumers import GameConsumer
+from backend.game.models.game_state import GameState
+from backend.game.models.game_state_delta import apply_ops
+from backend.game.services.game_view_cache import GameViewCache
+from backend.game.services.state_patches import StatePatchLog, patch_for_player
+
+
+def make_state():
+    """Build an engine-owned three player game state"""
+    state = GameState(uid="patched_state")
+    state.discard_pile = [{"suit": "spades", "value": "5"}]
+    state.draw_pile = [{"suit": "hearts", "value": str(v)} for v in range(2, 10)]
+    state.player_states = {
+        player_id: {"hand": [{"suit": "clubs", "value": str(v)} for v in range(2, 7)],
+                    "announced_one_card": False, "penalties": 0}
+        for player_id in ("p1", "p2", "p3")
+    }
+    state.current_player_uid = "p1"
+    state._write_behind = MagicMock()
+    return state
+
+
+def draw(state, player_id):
+    """Move the top of the draw pile into a hand and commit"""
+    state.player_states[player_id]["hand"].append(state.draw_card())
+    state.current_player_uid = "p2"
+    state.commit()
+
+
+class StatePatchLogTests(TestCase):
+    """Tests for the versioned state patch log"""
+
+    def setUp(self):
+        """Route commits and recorded views through one private view cache"""
+        cache = GameViewCache()
+        for target in ("backend.game.services.game_view_cache.get_game_view_cache",
+                       "backend.game.services.state_patches.get_game_view_cache"):
+            patcher = patch(target, return_value=cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.log = StatePatchLog()
+        self.state = make_state()
+
+    def test_patches_rebuild_each_players_view(self):
+        """Test that applying a patch to a snapshot gives the new view, hands included"""
+        first = self.log.record("game1", self.state)
+        self.assertIsNone(first["from_version"])
+        snapshots = {pid: copy.deepcopy(self.state.serialize(for_player_id=pid)) for pid in ("p1", "p2")}
+
+        draw(self.state, "p1")
+        patch_event = self.log.record("game1", self.state)
+
+        for pid, view in snapshots.items():
+            message = patch_for_player(patch_event, pid)
+            apply_ops(view, message["ops"])
+            self.assertEqual(view, self.state.serialize(for_player_id=pid))
+        self.assertLess(len(json.dumps(patch_for_player(patch_event, "p2"))), 200)
+        self.assertNotIn("hand", json.dumps(patch_for_player(patch_event, "p2")))
+
+    def test_since_returns_missed_patches_or_none(self):
+        """Test that clients close behind get patches and clients far behind get nothing"""
+        self.log.record("game1", self.state)
+        for _ in range(3):
+            draw(self.state, "p1")
+            self.log.record("game1", self.state)
+
+        patches = self.log.since("game1", 1, max_gap=5)
+        self.assertEqual([(p["from_version"], p["version"]) for p in patches], [(1, 2), (2, 3)])
+        self.assertEqual(self.log.since("game1", 3), [])
+        self.assertIsNone(self.log.since("game1", 1, max_gap=1))
+        self.assertIsNone(self.log.since("game2", 0))
+
+
+class ConsumerStatePatchTests(TestCase):
+    """Tests for how the game consumer follows a client's state version"""
+
+    def setUp(self):
+        """Build a consumer with a recorded send and snapshot lookup"""
+        self.consumer = GameConsumer()
+        self.consumer.player_id = "p1"
+        self.consumer.state_versions = {"game1": 3}
+        self.consumer.send = AsyncMock()
+        self.consumer.get_state_snapshot = AsyncMock(return_value={"game_uid": "game1", "version": 9, "data": {}})
+
+    def sent(self):
+        return [json.loads(call.kwargs["text_data"]) for call in self.consumer.send.call_args_list]
+
+    def event(self, from_version, version):
+        return {"type": "state.patch", "game_uid": "game1", "from_version": from_version, "version": version,
+                "ops": [["s", ["current_player"], "p2"]], "hands": {"p1": [["l", ["players", "p1", "hand"], [0], []]]}}
+
+    def test_in_sequence_patch_forwarded(self):
+        """Test that the next patch is forwarded with the player's own hand edits"""
+        asyncio.run(self.consumer.state_patch(self.event(3, 4)))
+        asyncio.run(self.consumer.state_patch(self.event(2, 3)))
+
+        messages = self.sent()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]["version"], 4)
+        self.assertEqual(len(messages[0]["ops"]), 2)
+        self.assertEqual(self.consumer.state_versions["game1"], 4)
+
+    def test_gap_resyncs_with_snapshot(self):
+        """Test that a client whose missed patches are not kept gets a snapshot"""
+        with patch("backend.game.consumers.get_state_patch_log") as get_log:
+            get_log.return_value.since.return_value = None
+            asyncio.run(self.consumer.state_patch(self.event(7, 8)))
+
+        self.assertEqual(self.sent()[0]["type"], "state_snapshot")
+        self.assertEqual(self.consumer.state_versions["game1"], 9)
@@ -0,0 +1,222 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from django.test import override_settings
+
+from backend.benchmarks.fake_graph import FakeGraph
+from backend.game.models import Game, GameAction, GameCard, Player
+from backend.game.models.game_state_delta import capture_properties
+from backend.game.services import game_state_engine
+from backend.game.services.game_service_utils.action import Action
+from backend.game.services.game_service_utils.create_action_card_game import create_action_card_game
+from backend.game.services.game_service_utils.create_idiot_rule_set import create_idiot_rule_set
+from backend.game.services.game_service_utils.play_card import play_card
+from backend.game.services.game_state_engine import GameStateEngine
+from backend.game.services.game_view_cache import GameViewCache
+from backend.game.services.rule_interpreter.base import get_rule_interpreter
+from backend.game.services.simulator import SimulatedCard
+from backend.game.services.unit_of_work import UnitOfWork
+from backend.tests.test_game_state_delta import make_state
+
+
+def saved(node, element_id):
+    """Mark a node as loaded from the database"""
+    node.element_id_property = element_id
+    return node
+
+
+class UnitOfWorkTests(TestCase):
+    """Tests for collecting a move's writes into one transaction"""
+
+    def setUp(self):
+        """Stub the database the unit commits to"""
+        patcher = patch("backend.game.services.unit_of_work.db")
+        self.db = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_writes_sent_as_one_statement(self):
+        """Test that staged writes become one statement in one transaction, in order"""
+        game = saved(Game(uid="game1"), "4:game:1")
+        card = saved(GameCard(uid="card1", location="hand"), "4:card:1")
+        player = saved(Player(uid="player1"), "4:player:1")
+        action = GameAction(action_type="play_card")
+        committed = MagicMock()
+
+        with UnitOfWork() as unit:
+            card.location = "field"
+            unit.save(card)
+            unit.save(action)
+            unit.connect(action, "game", game)
+            unit.replace(game, "current_player", player)
+            unit.on_commit(committed)
+            committed.assert_not_called()
+
+        self.db.cypher_query.assert_called_once()
+        self.db.transaction.__enter__.assert_called_once()
+        query, params = self.db.cypher_query.call_args.args
+
+        self.assertEqual(query.count("CALL {"), 4)
+        self.assertLess(query.index("SET n += $s0_props"), query.index("CREATE (n:GameAction:GameBaseModel)"))
+        self.assertIn("MERGE (a)-[:OCCURRED_IN]->(b)", query)
+        self.assertIn("OPTIONAL MATCH (a)-[r:CURRENT_TURN]->(:Player) DELETE r", query)
+        self.assertEqual(params["s0_uid"], "card1")
+        self.assertEqual(params["s0_props"]["location"], "field")
+        self.assertEqual(params["s2_start"], action.uid)
+        self.assertEqual(params["s3_end"], "player1")
+        committed.assert_called_once()
+
+    def test_nothing_written_when_move_fails(self):
+        """Test that a block that raises writes nothing and runs no callbacks"""
+        committed = MagicMock()
+
+        with self.assertRaises(ValueError):
+            with UnitOfWork() as unit:
+                unit.save(saved(GameCard(uid="card1"), "4:card:1"))
+                unit.on_commit(committed)
+                raise ValueError("invalid move")
+
+        self.db.cypher_query.assert_not_called()
+        committed.assert_not_called()
+
+    @override_settings(GAME_STATE_PERSISTENCE="delta")
+    def test_state_written_with_the_move(self):
+        """Test that a state commit joins the unit, engine-owned or not"""
+        state = make_state()
+        state._baseline = capture_properties(state)
+        state.current_player_uid = "p2"
+
+        with UnitOfWork() as unit:
+            state.commit(unit)
+            self.assertEqual(state._delta_seq, 0)
+        query, params = self.db.cypher_query.call_args.args
+        self.assertIn("CREATE (:GameStateDelta", query)
+        self.assertEqual(params["rows"][0]["seq"], 1)
+        self.assertEqual(state._delta_seq, 1)
+
+        engine = GameStateEngine(enabled=True, flush_interval=3600)
+        engine._flusher = MagicMock()
+        state = engine.get_state("game1", lambda: state)
+        state.commit()
+        state.current_player_uid = "p1"
+        with UnitOfWork() as unit:
+            state.commit(unit)
+            unit.on_commit(lambda: engine.end_game("game1"))
+            self.assertIn("game1", engine._dirty)
+        _, params = self.db.cypher_query.call_args.args
+        self.assertEqual(params["rows"][0]["seq"], 2)
+        self.assertEqual(state._delta_seq, 2)
+        self.assertEqual(engine._dirty, set())
+        self.assertNotIn("game1", engine._states)
+
+    @override_settings(GAME_STATE_PERSISTENCE="delta")
+    def test_engine_keeps_state_when_move_fails_to_commit(self):
+        """Test that a failed commit leaves an engine-owned state live and unflushed"""
+        engine = GameStateEngine(enabled=True, flush_interval=3600)
+        engine._flusher = MagicMock()
+        state = make_state()
+        state._baseline = capture_properties(state)
+        state = engine.get_state("game1", lambda: state)
+        state.current_player_uid = "p2"
+        state.commit()
+        self.db.cypher_query.side_effect = Exception("Neo4j unavailable")
+
+        with self.assertRaises(Exception):
+            with UnitOfWork() as unit:
+                state.commit(unit)
+                unit.on_commit(lambda: engine.end_game("game1"))
+
+        self.assertIs(engine._states["game1"], state)
+        self.assertIn("game1", engine._dirty)
+        self.assertEqual(state._delta_seq, 0)
+
+    def test_version_bumped_once_the_move_commits(self):
+        """Test that a state takes its new version, and drops its cached views, only when the unit commits"""
+        cache = GameViewCache()
+        patcher = patch("backend.game.services.game_view_cache.get_game_view_cache", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        state = saved(make_state(), "4:state:1")
+        cache.state_view(state, "p1")
+        misses = cache.misses
+        self.db.cypher_query.side_effect = Exception("Neo4j unavailable")
+
+        with self.assertRaises(Exception):
+            with UnitOfWork() as unit:
+                state.commit(unit)
+        self.assertEqual(state.state_version, 0)
+        self.assertEqual(cache.state_view(state, "p1"), state.serialize(for_player_id="p1"))
+        self.assertEqual(cache.misses, misses)
+
+        self.db.cypher_query.side_effect = None
+        with UnitOfWork() as unit:
+            state.commit(unit)
+            self.assertEqual(state.state_version, 0)
+        self.assertEqual(state.state_version, 1)
+        self.assertEqual(self.db.cypher_query.call_args.args[1]["rows"][0]["props"]["state_version"], 1)
+        self.assertEqual([key for key in cache._entries if key[1] == 0], [])
+
+
+class UnitOfWorkGraphTests(TestCase):
+    """Tests for the unit's statements against the benchmark graph"""
+
+    def test_move_applied_in_one_round_trip(self):
+        """Test that a card play's writes land together as a single statement"""
+        graph = FakeGraph()
+        self.addCleanup(graph.install().close)
+        game = Game(uid="game1").save()
+        first, second = Player(uid="p1").save(), Player(uid="p2").save()
+        card = GameCard(uid="card1", location="hand").save()
+        game.current_player.connect(first)
+        before, _ = graph.snapshot()
+
+        with UnitOfWork() as unit:
+            card.location = "field"
+            unit.save(card)
+            action = GameAction(action_type="play_card")
+            unit.save(action)
+            unit.connect(action, "game", game)
+            unit.connect(action, "affected_cards", card)
+            unit.replace(game, "current_player", second)
+
+        queries, _ = graph.snapshot()
+        self.assertEqual(queries - before, 1)
+        self.assertEqual(graph.unhandled, {})
+        self.assertEqual(GameCard.nodes.get(uid="card1").location, "field")
+        self.assertEqual([player.uid for player in game.current_player.all()], ["p2"])
+        stored = GameAction.nodes.get(uid=action.uid)
+        self.assertEqual(stored.game.single().uid, "game1")
+        self.assertEqual(stored.affected_cards.single().uid, "card1")
+
+    def test_failed_move_leaves_live_state_unchanged(self):
+        """Test that a card play whose writes fail is undone on the engine's live state"""
+        graph = FakeGraph()
+        self.addCleanup(graph.install().close)
+        engine = GameStateEngine(enabled=True, flush_interval=3600)
+        self.addCleanup(engine._stop.set)
+        patcher = patch.object(game_state_engine, "_engine", engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        players = [Player(username=f"unit_player_{seat}").save().uid for seat in range(2)]
+        rule_set = create_idiot_rule_set()
+        interpreter = get_rule_interpreter(rule_set)
+
+        for _ in range(20):
+            game_uid = create_action_card_game("Unit", players, rule_set.uid)["game_id"]
+            state = engine.get_state(game_uid, lambda: Game.nodes.get(uid=game_uid).game_state.single())
+            player_state = state.get_player_state(state.current_player_uid)
+            card = next((card for card in player_state["hand"] if interpreter.validate_action(
+                state, player_state, Action(type="play_card", card=SimulatedCard(card)))), None)
+            if card is not None:
+                break
+        before = capture_properties(state)
+
+        with patch.object(UnitOfWork, "commit", side_effect=Exception("Neo4j unavailable")):
+            result = play_card(game_uid, state.current_player_uid, card["id"])
+
+        self.assertIn("error", result)
+        self.assertEqual(capture_properties(state), before)
+        self.assertIn(card, state.get_player_state(state.current_player_uid)["hand"])
+
+        result = play_card(game_uid, state.current_player_uid, card["id"])
+        self.assertTrue(result["success"])
+        self.assertEqual(state.state_version, before["state_version"] + 1)